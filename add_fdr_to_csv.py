@@ -3,10 +3,18 @@ Script to append FDR ratings to the existing fpl_players_gw_X.csv file.
 Adds a new column with the average FDR for each team over the next N gameweeks.
 """
 
+import os
+import sys
+
 import pandas as pd
 import requests
 from datetime import datetime
 
+# The transfer model's modules import each other by name
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'squad_selection_model'))
+
+from fixture_index import get_fixture_index
+
 def get_current_gameweek():
     """
     Get the current gameweek from FPL API
@@ -33,13 +41,19 @@ def get_current_gameweek():
         print(f"Error getting current gameweek: {e}")
         return 1
 
-def get_team_fdr_ratings(start_gw=None, weeks=5):
+def get_team_fdr_table(start_gw=None, horizons=(5,)):
     """
-    Get FDR ratings for each team over the next N gameweeks
+    Get FDR ratings for each team over several horizons from one fetch
+    
+    Bootstrap and fixtures are fetched once; every horizon is then a lookup in
+    the fixture index's rolling FDR prefix sums.
     
     Args:
         start_gw: Gameweek to start from (None = current/next GW)
-        weeks: Number of gameweeks to look ahead
+        horizons: Numbers of gameweeks to look ahead
+    
+    Returns:
+        dict: horizon -> {team_id: average FDR}
     """
     if start_gw is None:
         start_gw = get_current_gameweek()
@@ -47,8 +61,6 @@ def get_team_fdr_ratings(start_gw=None, weeks=5):
     else:
         print(f"Using specified gameweek: GW {start_gw}")
     
-    print(f"Calculating FDR ratings from GW {start_gw} for {weeks} weeks...")
-    
     try:
         # Fetch FPL data
         response = requests.get('https://fantasy.premierleague.com/api/bootstrap-static/')
@@ -60,50 +72,37 @@ def get_team_fdr_ratings(start_gw=None, weeks=5):
         
         # Get teams
         teams = {team['id']: team['name'] for team in data['teams']}
+        index = get_fixture_index(fixtures, team_ids=list(teams))
         
-        end_gw = start_gw + weeks - 1
-        team_fdrs = {}
+        ratings = {}
+        for weeks in horizons:
+            end_gw = start_gw + weeks - 1
+            print(f"Calculating FDR ratings GW {start_gw} to GW {end_gw}...")
+            ratings[weeks] = index.fdr_ratings(start_gw, weeks)
         
-        print(f"Analyzing fixtures GW {start_gw} to GW {end_gw}...")
+        if len(horizons) == 1:
+            window = index.counts[:, max(start_gw, 1) - 1:start_gw + horizons[0] - 1].sum(axis=1)
+            fixture_counts = dict(zip(index.team_ids, window))
+            print(f"Processed {int(window.sum()) // 2} fixtures")
+            for team_id, avg_fdr in ratings[horizons[0]].items():
+                print(f"  {teams[team_id]}: {avg_fdr:.2f} FDR ({fixture_counts[team_id]} fixtures)")
         
-        # Process fixtures for the specified period
-        fixture_count = 0
-        for fixture in fixtures:
-            gw = fixture['event']
-            if not gw or gw < start_gw or gw > end_gw:
-                continue
-                
-            home_team = fixture['team_h']
-            away_team = fixture['team_a']
-            home_difficulty = fixture['team_h_difficulty']
-            away_difficulty = fixture['team_a_difficulty']
-            
-            # Initialize if needed
-            if home_team not in team_fdrs:
-                team_fdrs[home_team] = []
-            if away_team not in team_fdrs:
-                team_fdrs[away_team] = []
-                
-            team_fdrs[home_team].append(home_difficulty)
-            team_fdrs[away_team].append(away_difficulty)
-            fixture_count += 1
-        
-        print(f"Processed {fixture_count} fixtures")
-        
-        # Calculate averages
-        team_fdr_averages = {}
-        for team_id, difficulties in team_fdrs.items():
-            if difficulties:
-                avg_fdr = sum(difficulties) / len(difficulties)
-                team_fdr_averages[team_id] = round(avg_fdr, 2)
-                print(f"  {teams[team_id]}: {avg_fdr:.2f} FDR ({len(difficulties)} fixtures)")
-        
-        return team_fdr_averages
+        return ratings
         
     except Exception as e:
         print(f"Error fetching FDR data: {e}")
         return {}
 
+def get_team_fdr_ratings(start_gw=None, weeks=5):
+    """
+    Get FDR ratings for each team over the next N gameweeks
+    
+    Args:
+        start_gw: Gameweek to start from (None = current/next GW)
+        weeks: Number of gameweeks to look ahead
+    """
+    return get_team_fdr_table(start_gw, (weeks,)).get(weeks, {})
+
 def append_fdr_to_df(csv_path=None, start_gw=None, weeks=5, save_csv=False):
     """
     Add FDR column to the existing CSV file and return the DataFrame
@@ -111,12 +110,14 @@ def append_fdr_to_df(csv_path=None, start_gw=None, weeks=5, save_csv=False):
     Args:
         csv_path: Path to CSV file (None = auto-detect based on gameweek)
         start_gw: Gameweek to start from (None = current)
-        weeks: Number of gameweeks to look ahead
+        weeks: Number of gameweeks to look ahead, or a list of them to add
+               one team_fdr_{weeks}gw column each in a single pass
         save_csv: Whether to save the updated DataFrame to CSV (default: False)
     
     Returns:
-        pandas.DataFrame: Updated DataFrame with FDR column
+        pandas.DataFrame: Updated DataFrame with FDR column(s)
     """
+    horizons = [weeks] if isinstance(weeks, int) else list(weeks)
     # Auto-detect CSV path if not provided
     if csv_path is None:
         if start_gw is None:
@@ -130,16 +131,17 @@ def append_fdr_to_df(csv_path=None, start_gw=None, weeks=5, save_csv=False):
         df = pd.read_csv(csv_path)
         print(f"Loaded {len(df)} players")
         
-        # Get FDR ratings
-        team_fdr_ratings = get_team_fdr_ratings(start_gw, weeks)
+        # Get FDR ratings for every horizon from one fetch
+        team_fdr_table = get_team_fdr_table(start_gw, horizons)
         
-        if not team_fdr_ratings:
+        if not team_fdr_table or not team_fdr_table[horizons[0]]:
             print("Failed to get FDR ratings")
             return None
         
-        # Add FDR column
-        fdr_column_name = f'team_fdr_{weeks}gw'
-        df[fdr_column_name] = df['team_id'].map(team_fdr_ratings)
+        # Add FDR columns; the first horizon's is reported below
+        for horizon in horizons:
+            df[f'team_fdr_{horizon}gw'] = df['team_id'].map(team_fdr_table[horizon])
+        fdr_column_name = f'team_fdr_{horizons[0]}gw'
         
         # Check for any missing mappings
         missing_fdr = df[df[fdr_column_name].isna()]
@@ -152,11 +154,11 @@ def append_fdr_to_df(csv_path=None, start_gw=None, weeks=5, save_csv=False):
         
         # Save updated CSV if requested
         if save_csv:
-            output_path = csv_path.replace('.csv', f'_with_fdr_{weeks}gw.csv')
+            output_path = csv_path.replace('.csv', f"_with_fdr_{'-'.join(map(str, horizons))}gw.csv")
             df.to_csv(output_path, index=False)
             print(f"\nUpdated CSV saved to: {output_path}")
         
-        print(f"Added FDR column: {fdr_column_name}")
+        print(f"Added FDR columns: {', '.join(f'team_fdr_{horizon}gw' for horizon in horizons)}")
         
         # Show sample of updated data - use available columns
         print("\nSample of updated data:")
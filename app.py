@@ -1,13 +1,161 @@
 # simple_fpl_app.py
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import streamlit as st
 import requests
 import pandas as pd
 
+# The transfer model's modules import each other by name
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'squad_selection_model'))
+
+from service import DEFAULT_PARAMS, OptimisationService, ServiceError, normalise_request
+from solution_cache import SolutionCache
+from team_class import Team
+
+FPL_API = 'https://fantasy.premierleague.com/api'
+DATA_DIR = 'data'
+POSITIONS = {1: 'GK', 2: 'DEF', 3: 'MID', 4: 'FWD'}
+
 st.set_page_config(page_title="FPL Team Fetcher", page_icon="⚽")
 
 st.title("FPL Team Fetcher")
 
 
+# ----- shared across sessions -----
+
+@st.cache_resource
+def get_session():
+    """One HTTP session (connection pool) for every visitor"""
+    session = requests.Session()
+    session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=8))
+    return session
+
+
+@st.cache_resource
+def get_fetch_pool():
+    return ThreadPoolExecutor(max_workers=8)
+
+
+@st.cache_resource(ttl=300)
+def load_bootstrap():
+    """
+    bootstrap-static with its lookups, refreshed every 5 minutes.
+
+    Returns:
+        tuple: (bootstrap JSON, current gameweek, player table indexed by id)
+    """
+    bootstrap = get_session().get(f'{FPL_API}/bootstrap-static/').json()
+
+    # Find current gameweek
+    current_gw = next((e['id'] for e in bootstrap['events'] if e['is_current']),
+                      next((e['id'] for e in bootstrap['events'] if e['is_next']), 1))
+
+    # Player lookup: id -> name, position, team, price
+    elements = pd.DataFrame(bootstrap['elements'])
+    teams = pd.Series({t['id']: t['name'] for t in bootstrap['teams']})
+    players = pd.DataFrame({
+        'name': elements['web_name'].to_numpy(),
+        'position': elements['element_type'].map(POSITIONS).fillna('?').to_numpy(),
+        'team': elements['team'].map(teams).fillna('Unknown').to_numpy(),
+        'price': elements['now_cost'].to_numpy() / 10,
+    }, index=elements['id'])
+    return bootstrap, current_gw, players
+
+
+@st.cache_resource
+def get_optimisation_service():
+    """Transfer optimiser with warm model templates and a solution cache on disk"""
+    cache = SolutionCache(max_entries=256, cache_dir=os.path.join(DATA_DIR, 'solution_cache'))
+    return OptimisationService(data_dir=DATA_DIR, n_workers=2, cache=cache)
+
+
+def fetch_entry_and_picks(team_id, gameweek):
+    """Fetch the entry and its picks concurrently; returns the two responses"""
+    session, pool = get_session(), get_fetch_pool()
+    entry = pool.submit(session.get, f'{FPL_API}/entry/{team_id}/')
+    picks = pool.submit(session.get, f'{FPL_API}/entry/{team_id}/event/{gameweek}/picks/')
+    return entry.result(), picks.result()
+
+
+def label_captaincy(names, is_captain, is_vice_captain):
+    """Append (C) / (VC) to names"""
+    return names + np.select([is_captain, is_vice_captain], [' (C)', ' (VC)'], default='')
+
+
+def run_optimisation(team, bank, free_transfers, gameweek, params):
+    """
+    Optimise transfers in the background, showing progress until done.
+
+    Results are cached per team, gameweek data and parameter set, so a
+    repeat visit returns straight away.
+    """
+    service = get_optimisation_service()
+    request = normalise_request({'team_id': team.team_id, 'bank': bank, 'free_transfers': free_transfers,
+                                 'gameweek': gameweek, 'params': params})
+    future, _ = service.submit(request, team=team)
+
+    # Expected duration from recent solves, for the progress bar
+    solve_times = [latency['solve_seconds'] for latency in service.latencies if 'solve_seconds' in latency]
+    expected = float(np.median(solve_times)) if solve_times else 10.0
+
+    start = time.perf_counter()
+    progress = st.progress(0.0, text="Optimising transfers...")
+    while not future.done():
+        elapsed = time.perf_counter() - start
+        progress.progress(min(0.95, elapsed / expected), text=f"Optimising transfers... {elapsed:.0f}s")
+        time.sleep(0.1)
+    progress.empty()
+    return future.result()
+
+
+def show_recommendation(result, players):
+    """Render an optimiser result (league_batch.summarise_solution format)"""
+    if result['status'] != 'Optimal':
+        st.error(f"Optimiser finished with status: {result['status']}")
+        return
+
+    st.markdown("---")
+    st.markdown(f"### Recommended Transfers (GW{result['gameweek']})")
+    if result.get('cached'):
+        st.caption("Cached result")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Objective", f"{result['objective']:.2f}")
+    with col2:
+        st.metric("Transfers", len(result['transfers_in']))
+    with col3:
+        st.metric("Hits", result['hits'])
+
+    if result['transfers_in']:
+        transfers = pd.DataFrame({
+            'out': [player['name'] for player in result['transfers_out']],
+            'in': [player['name'] for player in result['transfers_in']],
+        })
+        st.dataframe(transfers, hide_index=True, use_container_width=True)
+    else:
+        st.info("No transfers recommended - roll the transfer.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Starting XI**")
+        starting = players.reindex(result['starting'])
+        starting['name'] = label_captaincy(
+            starting['name'].fillna('Unknown'),
+            starting.index == result['captain']['id'],
+            starting.index == result['vice_captain']['id'],
+        )
+        st.dataframe(starting[['name', 'position', 'team', 'price']], hide_index=True, use_container_width=True)
+    with col2:
+        st.markdown("**Bench**")
+        bench = players.reindex(result['bench'])
+        st.dataframe(bench[['name', 'position', 'team', 'price']], hide_index=True, use_container_width=True)
+
+
 # Input fields
 col1, col2, col3 = st.columns(3)
 
@@ -20,6 +168,15 @@ with col2:
 with col3:
     free_transfers = st.selectbox("Free Transfers", [1, 2], index=0)
 
+with st.expander("⚙️ Optimiser settings"):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        penalty_points = st.number_input("Hit penalty (pts)", min_value=0.0, value=float(DEFAULT_PARAMS['penalty_points']), step=1.0)
+    with col2:
+        base_opposing_penalty = st.number_input("Opposing penalty", min_value=0.0, value=float(DEFAULT_PARAMS['base_opposing_penalty']), step=0.1)
+    with col3:
+        fdr_penalty_weight = st.number_input("FDR weight", min_value=0.0, value=float(DEFAULT_PARAMS['fdr_penalty_weight']), step=0.1)
+
 # Instructions
 with st.expander("ℹ️ How to find your Team ID"):
     st.markdown("""
@@ -27,45 +184,35 @@ with st.expander("ℹ️ How to find your Team ID"):
     2. Click on "My Team" or "Points"
     3. Look at the URL in your browser
     4. Find the number after `/entry/` - that's your Team ID
-    
+
     Example: `https://fantasy.premierleague.com/entry/2562804/event/20`
-    
+
     Team ID = **2562804**
     """)
 
 
-# Fetch button
-if st.button("Get Team Data", type="primary"):
+# Fetch / optimise buttons
+col1, col2 = st.columns(2)
+with col1:
+    fetch_clicked = st.button("Get Team Data", type="primary")
+with col2:
+    optimise_clicked = st.button("Optimise Transfers")
+
+if fetch_clicked or optimise_clicked:
     if team_id:
         try:
-            # Get general team info (no auth needed!)
-            team_resp = requests.get(f'https://fantasy.premierleague.com/api/entry/{team_id}/')
-            
+            bootstrap, current_gw, players = load_bootstrap()
+            team_resp, picks_resp = fetch_entry_and_picks(team_id, current_gw)
+
             if team_resp.status_code == 200:
                 team_data = team_resp.json()
-                
-                # Get all player data
-                bootstrap_resp = requests.get('https://fantasy.premierleague.com/api/bootstrap-static/')
-                bootstrap = bootstrap_resp.json()
-                
-                # Find current gameweek
-                current_gw = next((e['id'] for e in bootstrap['events'] if e['is_current']), 
-                                 next((e['id'] for e in bootstrap['events'] if e['is_next']), 1))
-                
-                # Get team picks for current gameweek
-                picks_resp = requests.get(f'https://fantasy.premierleague.com/api/entry/{team_id}/event/{current_gw}/picks/')
-                
+
                 if picks_resp.status_code == 200:
                     picks_data = picks_resp.json()
-                    
-                    # Create lookups
-                    players = {p['id']: p for p in bootstrap['elements']}
-                    teams = {t['id']: t['name'] for t in bootstrap['teams']}
-                    positions = {1: 'GK', 2: 'DEF', 3: 'MID', 4: 'FWD'}
-                    
+
                     # Show team info
                     st.success(f"Found team: **{team_data['name']}**")
-                    
+
                     col1, col2, col3, col4 = st.columns(4)
                     with col1:
                         st.metric("Points", team_data.get('summary_overall_points', 0))
@@ -75,60 +222,57 @@ if st.button("Get Team Data", type="primary"):
                         st.metric("Bank", f"£{budget}m")
                     with col4:
                         st.metric("Free Transfers", free_transfers)
-                    
+
                     # Build squad data
-                    squad_data = []
-                    for pick in picks_data['picks']:
-                        player = players.get(pick['element'], {})
-                        squad_data.append({
-                            'player_id': pick['element'],
-                            'name': player.get('web_name', 'Unknown'),
-                            'position': positions.get(player.get('element_type'), '?'),
-                            'team': teams.get(player.get('team'), 'Unknown'),
-                            'price': player.get('now_cost', 0) / 10,
-                            'squad_position': 'starting' if pick['position'] <= 11 else 'bench',
-                            'is_captain': pick.get('is_captain', False),
-                            'is_vice_captain': pick.get('is_vice_captain', False)
-                        })
-                    
-                    df = pd.DataFrame(squad_data)
-                    
+                    picks = pd.DataFrame(picks_data['picks'])
+                    df = players.reindex(picks['element'])
+                    df['name'] = df['name'].fillna('Unknown')
+                    df['squad_position'] = np.where(picks['position'].to_numpy() <= 11, 'starting', 'bench')
+                    df['is_captain'] = picks['is_captain'].to_numpy() if 'is_captain' in picks else False
+                    df['is_vice_captain'] = picks['is_vice_captain'].to_numpy() if 'is_vice_captain' in picks else False
+
                     # Display squad
                     st.markdown("---")
                     st.markdown("### Your Squad")
-                    
+
                     col1, col2 = st.columns(2)
-                    
+
                     with col1:
                         st.markdown("**Starting XI**")
                         starting = df[df['squad_position'] == 'starting'].copy()
-                        starting['name'] = starting.apply(
-                            lambda x: x['name'] + ' (C)' if x['is_captain'] else x['name'] + ' (VC)' if x['is_vice_captain'] else x['name'], 
-                            axis=1
-                        )
+                        starting['name'] = label_captaincy(starting['name'], starting['is_captain'], starting['is_vice_captain'])
                         st.dataframe(
-                            starting[['name', 'position', 'team', 'price']], 
+                            starting[['name', 'position', 'team', 'price']],
                             hide_index=True,
                             use_container_width=True
                         )
-                    
+
                     with col2:
                         st.markdown("**Bench**")
                         bench = df[df['squad_position'] == 'bench']
                         st.dataframe(
-                            bench[['name', 'position', 'team', 'price']], 
+                            bench[['name', 'position', 'team', 'price']],
                             hide_index=True,
                             use_container_width=True
                         )
-                    
+
+                    if optimise_clicked:
+                        team = Team.from_picks(int(team_id), bootstrap, picks_data, budget=budget,
+                                               free_transfers=free_transfers)
+                        params = {'penalty_points': penalty_points, 'base_opposing_penalty': base_opposing_penalty,
+                                  'fdr_penalty_weight': fdr_penalty_weight}
+                        try:
+                            result = run_optimisation(team, budget, free_transfers, current_gw + 1, params)
+                            show_recommendation(result, players)
+                        except ServiceError as e:
+                            st.error(str(e))
+
                 else:
                     st.error("Could not fetch squad data. Team might not have been picked yet.")
             else:
                 st.error(f"Team ID {team_id} not found. Please check and try again.")
-                
+
         except Exception as e:
             st.error(f"Error: {str(e)}")
     else:
         st.warning("Please enter a Team ID")
-
-
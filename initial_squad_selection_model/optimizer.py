@@ -1,13 +1,15 @@
 # optimizer.py
 # Main script to run the FPL team selection optimization
 
+import sys
+
 import pandas as pd
 from pulp import LpProblem, LpMaximize, PULP_CBC_CMD
 from objective_function import *
 from decision_variables import *
 from constraints import *
 from squad_creation import create_squad
-from output_window import display_in_window
+from report import build_report, render_text, write_report
 
 # Load data
 df_players = pd.read_csv('data/fpl_players_gw_1.csv')
@@ -35,6 +37,13 @@ prob.solve(PULP_CBC_CMD(msg=False))
 # Create squad with post-processing
 squad = create_squad(prob, df_players, starting_vars, bench_vars, captain_vars)
 
-# Display results
-display_in_window(prob, squad)
+# Write JSON/HTML/text reports; the tkinter window is opt-in (python optimizer.py --gui)
+report = build_report(prob, squad)
+print(render_text(report))
+paths = write_report(report, f"output/initial_squad_gw_{report['gameweek']}", formats=('json', 'html', 'txt'))
+print(f"\nReports written: {', '.join(paths)}")
+
+if '--gui' in sys.argv:
+    from output_window import display_in_window
+    display_in_window(prob, squad)
 
@@ -2,14 +2,15 @@
 # Display squad results in a window
 
 import pandas as pd
-import tkinter as tk
-from tkinter import ttk, scrolledtext
 from pulp import LpStatus, value
 
 def display_in_window(prob, squad):
     """
-    Display squad results in a tkinter window
+    Display squad results in a tkinter window (opt-in; blocks until closed, see report.py for headless output)
     """
+    import tkinter as tk
+    from tkinter import ttk, scrolledtext
+
     # Create window
     root = tk.Tk()
     gw_text = f" - Gameweek {squad['gameweek']}" if squad['gameweek'] else ""
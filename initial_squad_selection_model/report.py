@@ -0,0 +1,148 @@
+# report.py
+# Headless rendering of the initial squad: structured JSON plus static text/HTML reports
+
+import html
+import json
+import os
+
+import numpy as np
+from pulp import LpStatus, value
+
+POSITION_ORDER = ['Goalkeeper', 'Defender', 'Midfielder', 'Forward']
+
+PLAYER_FIELDS = ['id', 'name', 'position', 'team', 'price', 'expected_points']
+
+
+def _native(val):
+    """numpy scalars as plain Python values (NaN as None)"""
+    if isinstance(val, np.generic):
+        val = val.item()
+    if isinstance(val, float) and np.isnan(val):
+        return None
+    return val
+
+
+def _players(df, extra_fields=()):
+    fields = [field for field in PLAYER_FIELDS + list(extra_fields) if field in df.columns]
+    return [
+        {field: _native(val) for field, val in zip(fields, row)}
+        for row in df[fields].itertuples(index=False, name=None)
+    ]
+
+
+def build_report(prob, squad, budget=100.0):
+    """
+    Structured, JSON-serialisable report of a solved initial-squad model.
+
+    Args:
+        prob: Solved PuLP problem
+        squad: Squad dictionary from create_squad
+        budget: Squad budget in £m
+
+    Returns:
+        dict: gameweek, status, objective, captaincy, starting, bench, formation and costs
+    """
+    formation = squad['formation']
+    return {
+        'gameweek': _native(squad['gameweek']),
+        'status': LpStatus[prob.status],
+        'objective': round(float(value(prob.objective)), 3) if prob.status == 1 else None,
+        'captain': {'name': squad['captain_name'], 'expected_points': _native(squad['captain_points'])},
+        'vice_captain': {'name': squad['vice_captain_name'], 'expected_points': _native(squad['vice_captain_points'])},
+        'starting': _players(squad['starting_df'], ['is_captain', 'is_vice_captain']),
+        'bench': _players(squad['bench_df'], ['bench_order']),
+        'formation': '-'.join(str(_native(formation.get(pos, 0))) for pos in POSITION_ORDER),
+        'total_cost': round(float(squad['total_cost']), 1),
+        'money_remaining': round(budget - float(squad['total_cost']), 1) or 0.0,
+    }
+
+
+def _role(player):
+    return "(C)" if player.get('is_captain') else "(VC)" if player.get('is_vice_captain') else ""
+
+
+def render_text(report):
+    """Plain-text report (the same content as the GUI window's team tab)"""
+    captain, vice_captain = report['captain'], report['vice_captain']
+    output = ["=" * 70, " " * 25 + "FPL TEAM SELECTION"]
+    if report['gameweek']:
+        output.append(" " * 28 + f"GAMEWEEK {report['gameweek']}")
+    output.append("=" * 70)
+    output.append(f"\nSTATUS: {report['status']}")
+    if report['objective'] is not None:
+        output.append(f"TOTAL EXPECTED POINTS: {report['objective']:.2f}")
+    output.append(f"CAPTAIN: {captain['name']} ({captain['expected_points']:.1f} x 2 = {captain['expected_points'] * 2:.1f} pts)")
+    output.append(f"VICE-CAPTAIN: {vice_captain['name']} ({vice_captain['expected_points']:.1f} pts)")
+
+    output += [f"\n{'=' * 70}", "STARTING XI", "-" * 70,
+               f"{'Name':<20} {'Position':<12} {'Team':<15} {'£m':<6} {'xP':<5}  {'Role':<4}", "-" * 70]
+    for p in report['starting']:
+        output.append(f"{p['name']:<20} {p['position']:<12} {p['team']:<15} {p['price']:<6.1f} {p['expected_points']:<5.1f}  {_role(p):<4}")
+
+    output += [f"\n{'=' * 70}", "BENCH (in priority order)", "-" * 70,
+               f"{'#':<3} {'Name':<20} {'Position':<12} {'Team':<15} {'£m':<6} {'xP':<5}", "-" * 70]
+    for p in report['bench']:
+        output.append(f"{p.get('bench_order', ''):<3} {p['name']:<20} {p['position']:<12} {p['team']:<15} {p['price']:<6.1f} {p['expected_points']:<5.1f}")
+
+    output += [f"\n{'=' * 70}", "SUMMARY", "-" * 70,
+               f"Formation: {report['formation']}",
+               f"Total Cost: £{report['total_cost']:.1f}m / £{report['total_cost'] + report['money_remaining']:.1f}m",
+               f"Money Remaining: £{report['money_remaining']:.1f}m"]
+    return "\n".join(output)
+
+
+def render_json(report):
+    return json.dumps(report, indent=2, ensure_ascii=False)
+
+
+def render_html(report):
+    """Static, self-contained HTML report"""
+    gw_text = f" - Gameweek {report['gameweek']}" if report['gameweek'] else ""
+
+    def table(rows, columns):
+        head = "".join(f"<th>{html.escape(heading)}</th>" for heading, _ in columns)
+        body = "".join("<tr>" + "".join(f"<td>{html.escape(str(get(row)))}</td>" for _, get in columns) + "</tr>"
+                       for row in rows)
+        return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+    columns = [('Name', lambda p: p['name']), ('Position', lambda p: p['position']), ('Team', lambda p: p['team']),
+               ('Price', lambda p: f"£{p['price']:.1f}m"), ('xP', lambda p: f"{p['expected_points']:.1f}")]
+    parts = [f"<h1>FPL Team Selection{html.escape(gw_text)}</h1>",
+             f"<p><b>Status:</b> {html.escape(report['status'])}</p>"]
+    if report['objective'] is not None:
+        parts.append(f"<p><b>Total expected points:</b> {report['objective']:.2f}</p>")
+    parts.append(f"<p><b>Captain:</b> {html.escape(str(report['captain']['name']))}, "
+                 f"<b>Vice-captain:</b> {html.escape(str(report['vice_captain']['name']))}</p>")
+    parts += ["<h2>Starting XI</h2>", table(report['starting'], columns + [('Role', _role)]),
+              "<h2>Bench</h2>", table(report['bench'], [('#', lambda p: p.get('bench_order', ''))] + columns),
+              "<h2>Summary</h2>",
+              f"<p>Formation {html.escape(report['formation'])}, total cost £{report['total_cost']:.1f}m, "
+              f"£{report['money_remaining']:.1f}m remaining</p>"]
+
+    style = ("body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:1em}"
+             "th,td{border:1px solid #ccc;padding:4px 8px;text-align:left}th{background:#eee}")
+    return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>FPL Team Selection{html.escape(gw_text)}"
+            f"</title><style>{style}</style></head><body>{''.join(parts)}</body></html>\n")
+
+
+RENDERERS = {'json': render_json, 'txt': render_text, 'html': render_html}
+
+
+def write_report(report, path_stem, formats=('json',)):
+    """
+    Write a report in one or more formats ('json', 'txt', 'html').
+
+    Returns:
+        list: Paths written
+    """
+    directory = os.path.dirname(path_stem)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    paths = []
+    for fmt in formats:
+        path = f"{path_stem}.{fmt}"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(RENDERERS[fmt](report))
+        paths.append(path)
+    return paths
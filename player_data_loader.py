@@ -1,10 +1,18 @@
 # data_loader.py
 # Load and process FPL data from the API
 
+import os
+import sys
+
 import requests
 import pandas as pd
 from datetime import datetime
 
+# The transfer model's modules import each other by name
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'squad_selection_model'))
+
+from fixture_index import get_fixture_index
+
 def load_fpl_data(gameweek=None):
     """
     Load FPL data from the API for current or specific gameweek
@@ -47,26 +55,26 @@ def load_fpl_data(gameweek=None):
     team_dict = {team['id']: team['name'] for team in teams}
     position_dict = {pos['id']: pos['singular_name'] for pos in positions}
     
-    # Process fixtures for target gameweek
-    opponent_dict = {}  # team_id -> opponent_team_id
+    # Process fixtures for target gameweek. A team can play twice (double gameweek)
+    # or not at all (blank): opponent_id is the first fixture, n_fixtures counts them
+    fixture_index = get_fixture_index(fixtures, team_ids=list(team_dict))
+    gw_fixtures = fixture_index.gameweek(target_gw['id'] if target_gw else 0)
     if target_gw:
         target_gw_fixtures = [f for f in fixtures if f['event'] == target_gw['id']]
         print(f"Processing {len(target_gw_fixtures)} fixtures for GW {target_gw['id']}:")
         
         for fixture in target_gw_fixtures:
-            home_team = fixture['team_h']
-            away_team = fixture['team_a']
-            home_name = team_dict.get(home_team, f"Team {home_team}")
-            away_name = team_dict.get(away_team, f"Team {away_team}")
-            
-            # Map each team to their opponent
-            opponent_dict[home_team] = away_team
-            opponent_dict[away_team] = home_team
-            
+            home_name = team_dict.get(fixture['team_h'], f"Team {fixture['team_h']}")
+            away_name = team_dict.get(fixture['team_a'], f"Team {fixture['team_a']}")
             print(f"  {home_name} vs {away_name}")
         
         print()  # Add blank line after fixtures
     
+    opponent_names = {
+        team_id: ' & '.join(team_dict.get(opponent, f"Team {opponent}") for opponent in opponents) or 'No fixture'
+        for team_id, opponents in gw_fixtures['opponent_ids'].items()
+    }
+    
     # If fetching historical data, get player stats for that gameweek
     if gameweek and gameweek < (current_gw['id'] if current_gw else 100):
         print(f"Fetching historical data for Gameweek {gameweek}...")
@@ -93,8 +101,9 @@ def load_fpl_data(gameweek=None):
         'position': position_dict[player['element_type']],
         'team': team_dict[player['team']],
         'team_id': player['team'],
-        'opponent_id': opponent_dict.get(player['team']),
-        'opponent': team_dict.get(opponent_dict.get(player['team']), 'No fixture') if opponent_dict.get(player['team']) else 'No fixture',
+        'opponent_id': gw_fixtures['opponent_id'].get(player['team']),
+        'opponent': opponent_names.get(player['team'], 'No fixture'),
+        'n_fixtures': int(gw_fixtures['n_fixtures'].get(player['team'], 0)),
         'price': player['now_cost'] / 10,
         'expected_points': player['ep_next'],
         'selected_by_percent': player['selected_by_percent'],
@@ -0,0 +1,249 @@
+# alternatives.py
+# Top-K distinct transfer plans from one in-memory model using no-good cuts
+
+import time
+
+import pandas as pd
+from pulp import PULP_CBC_CMD, LpStatus, lpSum, value
+
+from model_builder import build_transfer_model, squad_membership
+from solution_analysis import opposing_pairs_in_squad
+from squad_creator import process_optimization_results
+from transfer_search import TransferSearch
+
+# Fast-search plans tried, best first, for a MIP start that satisfies every cut so far
+START_CANDIDATES = 50
+
+
+def add_no_good_cut(prob, vars, squad_indices, min_different_players=1, name=None):
+    """
+    Exclude a squad and every squad sharing more than 15 - min_different_players of its players.
+
+    Args:
+        prob: PuLP problem instance
+        vars: Dictionary of decision variables
+        squad_indices: df_players index labels of the 15 players to cut off
+        min_different_players: Players that must differ from this squad
+        name: Constraint name
+    """
+    prob += (
+        lpSum(squad_membership(vars, idx) for idx in squad_indices) <= len(squad_indices) - min_different_players,
+        name
+    )
+    return prob
+
+
+def plan_start_values(vars, df_players, my_team, plan):
+    """
+    Decision variable values of a TransferSearch plan.
+
+    Kept players stay in, or swap between, the XI and bench as the plan's
+    lineup says; transfers are free up to the team's free transfers (starters
+    first on both sides, so the in/out flows stay balanced) and paid after that.
+
+    Returns:
+        dict: var_type -> {idx: 0 or 1} for every variable in vars
+    """
+    values = {var_type: dict.fromkeys(player_vars, 0) for var_type, player_vars in vars.items()}
+    starting = set(plan['starting'])
+    was_starting = {idx: my_team.is_in_starting(df_players.loc[idx, 'id']) for idx in df_players.index
+                    if my_team.is_in_team(df_players.loc[idx, 'id'])}
+    outs = sorted(plan['transfers_out'], key=lambda idx: not was_starting[idx])
+    ins = sorted(plan['transfers_in'], key=lambda idx: idx not in starting)
+    n_free = min(my_team.free_transfers, 5)
+
+    for idx, starter in was_starting.items():
+        if idx in outs:
+            kind = 'free' if outs.index(idx) < n_free else 'paid'
+            values[f"out_{'starting' if starter else 'bench'}_{kind}"][idx] = 1
+        elif starter:
+            values['stay_starting' if idx in starting else 'starting_to_bench'][idx] = 1
+        else:
+            values['bench_to_starting' if idx in starting else 'stay_bench'][idx] = 1
+    for position, idx in enumerate(ins):
+        kind = 'free' if position < n_free else 'paid'
+        values[f"in_to_{'starting' if idx in starting else 'bench'}_{kind}"][idx] = 1
+    values['captain'][plan['captain_idx']] = 1
+    return values
+
+
+def set_mip_start(prob, vars, values, aux_constraints):
+    """
+    Load a complete MIP start into the variables and check it against every constraint.
+
+    Variables outside vars (opposing-pair indicators and the like) are set to
+    the smallest of 0 and 1 that satisfies their own constraints.
+
+    Args:
+        values: plan_start_values output
+        aux_constraints: {variable: constraints} for every variable outside vars
+
+    Returns:
+        bool: True if the start is feasible (no-good cuts included)
+    """
+    for var_type, player_values in values.items():
+        for idx, val in player_values.items():
+            vars[var_type][idx].varValue = val
+    for var, constraints in aux_constraints.items():
+        var.varValue = 0
+        if not all(constraint.valid(1e-6) for constraint in constraints):
+            var.varValue = 1
+    return all(constraint.valid(1e-6) for constraint in prob.constraints.values())
+
+
+def find_alternative_plans(prob, vars, df_players, k=5, min_different_players=1, time_limit=None,
+                           bench_simulator=None, my_team=None):
+    """
+    Solve the same model k times, cutting off each optimum before the next solve.
+
+    The model is built once; every further plan only adds one no-good cut to
+    the in-memory problem and re-solves it, so the marginal cost of an extra
+    plan is one solve with no model rebuild. With my_team, each re-solve is
+    warm-started: the best TransferSearch plan (up to two transfers) that
+    satisfies every cut so far is passed to CBC as a MIP start. The previous
+    optimum itself cannot be used, since the new cut makes it infeasible.
+
+    Args:
+        prob: PuLP problem built by build_transfer_model (solved or not)
+        vars: Dictionary of decision variables
+        df_players: DataFrame with player data
+        k (int): Number of plans to return
+        min_different_players (int): Minimum players each plan must differ by from every earlier plan
+        time_limit (float): Optional CBC time limit per solve in seconds
+        bench_simulator: Optional PointsSimulator for the bench order of each plan
+        my_team: Team the model was built for; enables the MIP starts
+
+    Returns:
+        tuple: (plans, report) where plans is a list of squad dictionaries (best first,
+               with 'rank' and 'objective_value') and report is a DataFrame of solve latencies
+    """
+    plans = []
+    report = []
+
+    starts, aux_constraints = [], {}
+    if my_team is not None:
+        starts = TransferSearch(df_players, my_team).search(top_k=START_CANDIDATES).to_dict('records')
+        model_vars = {var for player_vars in vars.values() for var in player_vars.values()}
+        for constraint in prob.constraints.values():
+            for var in constraint:
+                if var not in model_vars:
+                    aux_constraints.setdefault(var, []).append(constraint)
+
+    for rank in range(1, k + 1):
+        start = time.perf_counter()
+        warm_start = rank > 1 and any(
+            set_mip_start(prob, vars, plan_start_values(vars, df_players, my_team, plan), aux_constraints)
+            for plan in starts
+        )
+        start_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        status = prob.solve(PULP_CBC_CMD(msg=False, warmStart=warm_start, timeLimit=time_limit))
+        solve_seconds = time.perf_counter() - start
+
+        if LpStatus[status] != 'Optimal':
+            print(f"⚠️  Stopped after {len(plans)} plans: solver status {LpStatus[status]}")
+            break
+
+        start = time.perf_counter()
+        squad = process_optimization_results(vars, df_players, prob, bench_simulator=bench_simulator)
+        squad['rank'] = rank
+        squad['objective_value'] = value(prob.objective)
+        squad_indices = list(squad['starting_df'].index) + list(squad['bench_df'].index)
+        extract_seconds = time.perf_counter() - start
+
+        n_different = 0
+        if plans:
+            best_indices = set(plans[0]['starting_df'].index) | set(plans[0]['bench_df'].index)
+            n_different = len(set(squad_indices) - best_indices)
+
+        plans.append(squad)
+        report.append({
+            'rank': rank,
+            'objective_value': round(squad['objective_value'], 3),
+            'n_transfers': len(squad['out_df']),
+            'opposing_pairs': len(opposing_pairs_in_squad(squad['starting_df'])),
+            'different_from_best': n_different,
+            'warm_start': warm_start,
+            'start_seconds': round(start_seconds, 4),
+            'solve_seconds': round(solve_seconds, 4),
+            'extract_seconds': round(extract_seconds, 4),
+        })
+
+        prob = add_no_good_cut(prob, vars, squad_indices, min_different_players, name=f"No_Good_Cut_{rank}")
+
+    return plans, pd.DataFrame(report)
+
+
+def top_k_plans(df_players, my_team, k=5, min_different_players=1, time_limit=None, bench_simulator=None,
+                **model_kwargs):
+    """
+    Build the transfer model once and return its k best distinct plans.
+
+    Args:
+        df_players: DataFrame with player data
+        my_team: Team instance
+        k (int): Number of plans
+        min_different_players (int): Minimum players each plan must differ by
+        time_limit (float): Optional CBC time limit per solve in seconds
+        bench_simulator: Optional PointsSimulator for the bench order of each plan
+        **model_kwargs: Passed to build_transfer_model (penalty_points, fdr_calculator, ...)
+
+    Returns:
+        tuple: (plans, report) as in find_alternative_plans; report.attrs['build_seconds']
+               holds the one-off model build time
+    """
+    start = time.perf_counter()
+    prob, vars = build_transfer_model(df_players, my_team, **model_kwargs)
+    build_seconds = time.perf_counter() - start
+
+    plans, report = find_alternative_plans(
+        prob, vars, df_players, k=k, min_different_players=min_different_players,
+        time_limit=time_limit, bench_simulator=bench_simulator, my_team=my_team
+    )
+    report.attrs['build_seconds'] = round(build_seconds, 4)
+    return plans, report
+
+
+def print_latency_report(report):
+    """Print per-plan latencies and the marginal cost of each extra plan"""
+    print("\n⏱️  ALTERNATIVE PLANS LATENCY")
+    print("=" * 60)
+    if 'build_seconds' in report.attrs:
+        print(f"Model build: {report.attrs['build_seconds']:.3f}s (once)")
+    for _, row in report.iterrows():
+        warm = " (warm start)" if row['warm_start'] else ""
+        print(f"#{int(row['rank'])}: {row['objective_value']:.2f} pts | {int(row['n_transfers'])} transfers | "
+              f"{int(row['different_from_best'])} new vs best | solve {row['solve_seconds']:.3f}s{warm}")
+    if len(report) > 1:
+        first = report['solve_seconds'].iloc[0]
+        marginal = report['solve_seconds'].iloc[1:].mean()
+        print(f"First solve: {first:.3f}s | Marginal per extra plan: {marginal:.3f}s")
+    print("=" * 60)
+
+
+def print_plans(plans):
+    """Print the transfers and captain of each plan"""
+    print("\n🔀 ALTERNATIVE TRANSFER PLANS")
+    print("=" * 60)
+    for squad in plans:
+        out_names = ", ".join(squad['out_df']['name']) or "-"
+        in_names = ", ".join(
+            pd.concat([squad['starting_df'], squad['bench_df']])
+            .query("transfer_type.str.startswith('Transfer In')", engine='python')['name']
+        ) or "-"
+        captain = squad['starting_df'].loc[squad['captain_idx'], 'name'] if squad['captain_idx'] is not None else "-"
+        print(f"#{squad['rank']}: {squad['objective_value']:.2f} pts | Out: {out_names} | In: {in_names} | C: {captain}")
+    print("=" * 60)
+
+
+# Example usage
+if __name__ == "__main__":
+    from team_class import Team
+
+    my_team = Team(team_id=2562804, budget=0, free_transfers=1)
+    df_players = pd.read_csv('data/fpl_players_gw_5.csv')
+
+    plans, report = top_k_plans(df_players, my_team, k=5, min_different_players=1, base_opposing_penalty=0.5)
+    print_plans(plans)
+    print_latency_report(report)
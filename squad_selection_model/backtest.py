@@ -0,0 +1,353 @@
+# backtest.py
+# Replay the transfer optimiser over past gameweeks from point-in-time snapshots and score it on realised points
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import requests
+from pulp import PULP_CBC_CMD, LpStatus, value
+
+from chip_planner import solve_best_squad
+from constraints import add_bench_selection_constraints
+from fdr import CSVFDRCalculator
+from league_batch import FPL_API
+from lineup_solver import lineup_squad, solve_lineup
+from model_builder import TRANSFER_IN_VARIABLE_TYPES, build_transfer_model
+from simulation import position_codes, score_lineups, squad_slots
+from squad_creator import process_optimization_results
+from team_class import Team
+
+# Realised points deducted per paid transfer, whatever penalty_points the model uses
+HIT_COST = 4
+
+# Most free transfers that can be banked
+MAX_FREE_TRANSFERS = 5
+
+INITIAL_BUDGET = 100.0
+
+# Model parameters a backtest may set: build_transfer_model's, plus 'bench_selection', a dict of
+# add_bench_selection_constraints thresholds (None leaves the bench unconstrained)
+MODEL_PARAMS = ['penalty_points', 'base_opposing_penalty', 'fdr_penalty_weight', 'position_penalty_matrix',
+                'bench_selection']
+
+
+def snapshot_path(data_dir, gameweek):
+    """Point-in-time player snapshot for a gameweek, as saved by player_data_loader before its deadline"""
+    return os.path.join(data_dir, f'fpl_players_gw_{gameweek}.csv')
+
+
+def available_gameweeks(data_dir):
+    """Gameweeks with a snapshot in data_dir, in order"""
+    pattern = re.compile(r'^fpl_players_gw_(\d+)\.csv$')
+    return sorted(int(match.group(1)) for match in map(pattern.match, os.listdir(data_dir)) if match)
+
+
+def load_live_points(gameweek, data_dir='data', session=None):
+    """
+    Realised points and minutes of every player in a finished gameweek.
+
+    Read from {data_dir}/live/event_{gw}_live.json; on first use the file is
+    fetched from event/{gw}/live and saved there, so replays run offline.
+
+    Returns:
+        pd.DataFrame: total_points and minutes indexed by player id
+    """
+    path = os.path.join(data_dir, 'live', f'event_{gameweek}_live.json')
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            live = json.load(f)
+    else:
+        session = session or requests.Session()
+        response = session.get(f'{FPL_API}/event/{gameweek}/live/')
+        response.raise_for_status()
+        live = response.json()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(live, f)
+
+    return pd.DataFrame(
+        [(player['id'], player['stats'].get('total_points', 0), player['stats'].get('minutes', 0))
+         for player in live['elements']],
+        columns=['id', 'total_points', 'minutes'],
+    ).set_index('id')
+
+
+def realised_points(squad, df_players, live):
+    """
+    Points a squad actually scored, with FPL auto-subs and captaincy (before hits).
+
+    Args:
+        squad: Squad dictionary (process_optimization_results or lineup_squad)
+        df_players: The gameweek's snapshot
+        live: Realised points from load_live_points
+
+    Returns:
+        float: Points
+    """
+    slots, captain_slot, vice_captain_slot = squad_slots(squad)
+    ids = df_players.loc[slots, 'id'].to_numpy()
+    points = live['total_points'].reindex(ids).fillna(0).to_numpy(dtype=float)[None, :]
+    played = (live['minutes'].reindex(ids).fillna(0).to_numpy() > 0)[None, :]
+    slot_positions = position_codes(df_players.loc[slots])
+    return float(score_lineups(points, played, slot_positions, captain_slot, vice_captain_slot)[0])
+
+
+def initial_state(df_players, budget=INITIAL_BUDGET, time_limit=None):
+    """
+    Starting squad for a replay: the initial-squad model's best 15 in the first
+    snapshot, split into XI and bench by lineup_solver.
+
+    Returns:
+        dict: starting_ids, bench_ids, bank and free_transfers
+    """
+    labels, _ = solve_best_squad(df_players, budget=budget, time_limit=time_limit)
+    if labels is None:
+        raise ValueError("No valid initial squad in the first snapshot")
+    lineup = solve_lineup(df_players, labels)
+    cost = df_players.loc[labels, 'price'].sum()
+    return {
+        'starting_ids': df_players.loc[lineup['starting'], 'id'].tolist(),
+        'bench_ids': df_players.loc[lineup['bench'], 'id'].tolist(),
+        'bank': round(budget - cost, 1),
+        'free_transfers': 1,
+    }
+
+
+def _state_from_team(team):
+    return {'starting_ids': sorted(team.starting_ids), 'bench_ids': sorted(team.bench_ids),
+            'bank': float(team.budget), 'free_transfers': int(team.free_transfers)}
+
+
+def replay_gameweek(df_players, state, live, params=None, time_limit=None, fdr_calculator=None):
+    """
+    Run the optimiser for one gameweek from a carried-forward team state and score it.
+
+    Transfers are valued at the snapshot's prices. A gameweek that does not
+    solve to optimality keeps the squad and only re-picks the XI.
+
+    Args:
+        df_players: The gameweek's snapshot
+        state: Team state (starting_ids, bench_ids, bank, free_transfers)
+        live: Realised points from load_live_points
+        params: build_transfer_model parameters (MODEL_PARAMS)
+        time_limit: Optional CBC time limit in seconds
+        fdr_calculator: Optional FDR calculator for this snapshot
+
+    Returns:
+        tuple: (record, next_state)
+    """
+    params = dict(params or {})
+    bench_selection = params.pop('bench_selection', None)
+    gameweek = int(df_players['gameweek'].iloc[0])
+    team = Team.from_squad(0, df_players, state['starting_ids'], state['bench_ids'],
+                           budget=state['bank'], free_transfers=state['free_transfers'], current_gw=gameweek)
+    budget = round(float(team.team_value) + state['bank'], 1)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        prob, vars = build_transfer_model(df_players, team, fdr_calculator=fdr_calculator, budget=budget, **params)
+        if bench_selection is not None:
+            prob = add_bench_selection_constraints(prob, vars, df_players, **bench_selection)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    status = LpStatus[prob.solve(PULP_CBC_CMD(msg=False, timeLimit=time_limit))]
+    solve_seconds = time.perf_counter() - start
+
+    if status == 'Optimal':
+        squad = process_optimization_results(vars, df_players, prob)
+        objective = value(prob.objective)
+    else:
+        squad = lineup_squad(df_players, team, params.get('base_opposing_penalty', 0.5),
+                             params.get('position_penalty_matrix'))
+        objective = None
+
+    decisions = squad.get('decision_results', {})
+    n_transfers = len(squad['out_df'])
+    n_paid = len(decisions.get('in_to_starting_paid', [])) + len(decisions.get('in_to_bench_paid', []))
+    points = realised_points(squad, df_players, live)
+    bench_df = squad['bench_df'].sort_values('bench_order') if 'bench_order' in squad['bench_df'].columns else squad['bench_df']
+
+    next_state = {
+        'starting_ids': df_players.loc[squad['starting_df'].index, 'id'].tolist(),
+        'bench_ids': df_players.loc[bench_df.index, 'id'].tolist(),
+        'bank': round(budget - float(squad['total_cost']), 1) or 0.0,
+        'free_transfers': min(MAX_FREE_TRANSFERS, max(state['free_transfers'] - n_transfers, 0) + 1),
+    }
+    record = {
+        'gameweek': gameweek,
+        'status': status,
+        'objective': round(objective, 3) if objective is not None else None,
+        'expected_points': round(float(squad['starting_df']['expected_points'].sum()
+                                       + df_players.loc[squad['captain_idx'], 'expected_points']), 2),
+        'points': points,
+        'transfers': n_transfers,
+        'hits': n_paid,
+        'net_points': points - HIT_COST * n_paid,
+        'free_transfers': state['free_transfers'],
+        'bank': next_state['bank'],
+        'team_value': round(float(squad['total_cost']), 1),
+        'captain': df_players.loc[squad['captain_idx'], 'name'],
+        'transfers_in': [df_players.loc[idx, 'name'] for var_type in TRANSFER_IN_VARIABLE_TYPES
+                         for idx in decisions.get(var_type, [])],
+        'transfers_out': squad['out_df']['name'].tolist(),
+        'build_seconds': round(build_seconds, 3),
+        'solve_seconds': round(solve_seconds, 3),
+    }
+    return record, next_state
+
+
+def _check_params(params):
+    unknown = set(params or {}) - set(MODEL_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown model parameters: {sorted(unknown)}")
+
+
+def replay(data_dir, gameweeks, params=None, state=None, time_limit=None, session=None):
+    """
+    Replay consecutive gameweeks from a team state; the building block of run_backtest.
+
+    Args:
+        data_dir: Directory with the season's snapshots (and live/ points cache)
+        gameweeks: Gameweeks to replay, in order
+        params: Model parameters (MODEL_PARAMS)
+        state: Team state to start from (default: initial_state on the first snapshot)
+        time_limit: Optional CBC time limit per gameweek in seconds
+        session: Optional requests session for fetching live points
+
+    Returns:
+        tuple: (records, state) - one record per gameweek and the state after the last,
+               so a replay can be resumed where it stopped
+    """
+    _check_params(params)
+    params = params or {}
+    session = session or requests.Session()
+
+    records = []
+    for gameweek in gameweeks:
+        path = snapshot_path(data_dir, gameweek)
+        df_players = pd.read_csv(path)
+        df_players['gameweek'] = gameweek
+        if state is None:
+            state = initial_state(df_players, time_limit=time_limit)
+
+        fdr_calculator = None
+        if params.get('fdr_penalty_weight', 1.0) > 0 and 'team_fdr_5gw' in df_players.columns:
+            with contextlib.redirect_stdout(io.StringIO()):
+                fdr_calculator = CSVFDRCalculator(path)
+
+        live = load_live_points(gameweek, data_dir, session=session)
+        record, state = replay_gameweek(df_players, state, live, params, time_limit, fdr_calculator)
+        records.append(record)
+    return records, state
+
+
+def history_frame(records, name=None):
+    """Replay records as a DataFrame with the run label and running total_points"""
+    history = pd.DataFrame(records)
+    history.insert(0, 'run', name)
+    if not history.empty:
+        history['total_points'] = history['net_points'].cumsum()
+    return history
+
+
+def run_backtest(data_dir='data', gameweeks=None, params=None, initial=None, time_limit=None, name=None):
+    """
+    Replay the optimiser over consecutive past gameweeks with the team carried forward.
+
+    Each gameweek is solved on its own point-in-time snapshot
+    (fpl_players_gw_{gw}.csv) and scored against event/{gw}/live; the chosen
+    squad, bank and free transfers carry into the next gameweek.
+
+    Args:
+        data_dir: Directory with the season's snapshots (and live/ points cache)
+        gameweeks: Gameweeks to replay (default: every snapshot in data_dir)
+        params: Model parameters (MODEL_PARAMS)
+        initial: Starting team as a Team or state dict (default: initial_state on the first snapshot)
+        time_limit: Optional CBC time limit per gameweek in seconds
+        name: Label stored in the 'run' column
+
+    Returns:
+        pd.DataFrame: One row per gameweek (see replay_gameweek), with running total_points
+    """
+    gameweeks = available_gameweeks(data_dir) if gameweeks is None else list(gameweeks)
+    state = _state_from_team(initial) if isinstance(initial, Team) else initial
+    records, _ = replay(data_dir, gameweeks, params, state, time_limit)
+    return history_frame(records, name)
+
+
+def summarise_backtest(history):
+    """Season totals of one replay"""
+    return {
+        'run': history['run'].iloc[0] if len(history) else None,
+        'gameweeks': len(history),
+        'points': float(history['points'].sum()),
+        'hits': int(history['hits'].sum()),
+        'net_points': float(history['net_points'].sum()),
+        'mean_points': round(float(history['net_points'].mean()), 2) if len(history) else None,
+        'expected_points': round(float(history['expected_points'].sum()), 1),
+        'transfers': int(history['transfers'].sum()),
+        'not_optimal': int((history['status'] != 'Optimal').sum()),
+        'seconds': round(float((history['build_seconds'] + history['solve_seconds']).sum()), 1),
+    }
+
+
+def _run_config(config):
+    return run_backtest(**config)
+
+
+def run_backtests(configs, n_workers=None):
+    """
+    Run independent replays (seasons or parameter sets) in parallel processes.
+
+    Args:
+        configs: List of run_backtest keyword dicts (data_dir, gameweeks, params, initial, time_limit, name)
+        n_workers: Worker processes (default: CPU count)
+
+    Returns:
+        tuple: (histories, summary) where histories lists each run's DataFrame in
+               config order and summary has one row per run
+    """
+    configs = [dict(config, name=config.get('name') or f"run_{i}") for i, config in enumerate(configs)]
+    if n_workers == 1:
+        histories = [_run_config(config) for config in configs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            histories = list(pool.map(_run_config, configs))
+
+    summary = pd.DataFrame([summarise_backtest(history) for history in histories])
+    return histories, summary
+
+
+def print_backtest_summary(summary):
+    """Season totals per run, best first"""
+    print("\n📈 BACKTEST RESULTS")
+    print("=" * 90)
+    columns = ['run', 'gameweeks', 'net_points', 'points', 'hits', 'transfers', 'expected_points', 'not_optimal', 'seconds']
+    print(summary.sort_values('net_points', ascending=False)[columns].to_string(index=False))
+    print("=" * 90)
+
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay the transfer optimiser over past gameweeks")
+    parser.add_argument('--data-dir', default='data', help="Season directory with fpl_players_gw_{gw}.csv snapshots")
+    parser.add_argument('--gameweeks', type=int, nargs=2, metavar=('FIRST', 'LAST'))
+    parser.add_argument('--params', nargs='+', default=['{}'],
+                        help="One JSON object of model parameters per run, e.g. '{\"base_opposing_penalty\": 0}'")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--time-limit', type=float, default=None)
+    args = parser.parse_args()
+
+    gameweeks = range(args.gameweeks[0], args.gameweeks[1] + 1) if args.gameweeks else None
+    configs = [{'data_dir': args.data_dir, 'gameweeks': gameweeks, 'params': json.loads(params),
+                'time_limit': args.time_limit, 'name': params} for params in args.params]
+    histories, summary = run_backtests(configs, n_workers=args.workers)
+    print_backtest_summary(summary)
@@ -0,0 +1,82 @@
+# bench_order.py
+# Pick the outfield bench order that scores best after FPL auto-subs
+
+import itertools
+
+import numpy as np
+
+from simulation import PointsSimulator, score_lineups, squad_slots
+
+# All 3! orderings of the outfield bench slots (12-14); slot 11 stays the bench GK
+OUTFIELD_BENCH_ORDERS = np.array(list(itertools.permutations([12, 13, 14])))
+SLOT_ORDERS = np.hstack([np.tile(np.arange(12), (len(OUTFIELD_BENCH_ORDERS), 1)), OUTFIELD_BENCH_ORDERS])
+
+
+def evaluate_bench_orders(points, played, slot_positions, captain_slot, vice_captain_slot):
+    """
+    Score every outfield bench order for a batch of squads in one call.
+
+    Args:
+        points: Float array (n_squads, n_scenarios, 15) in slot order
+        played: Bool array (n_squads, n_scenarios, 15) in slot order
+        slot_positions: Position codes (n_squads, 15)
+        captain_slot: Captain slot per squad (n_squads,)
+        vice_captain_slot: Vice-captain slot per squad (n_squads,)
+
+    Returns:
+        np.ndarray: Mean points (n_squads, 6), one column per row of OUTFIELD_BENCH_ORDERS
+    """
+    points = np.asarray(points)
+    played = np.asarray(played)
+    n_squads, n_scenarios, _ = points.shape
+    n_orders = len(SLOT_ORDERS)
+
+    # Re-order the slot axis for every permutation: (n_squads, n_orders, n_scenarios, 15)
+    order_points = points[:, :, SLOT_ORDERS].transpose(0, 2, 1, 3).reshape(-1, 15)
+    order_played = played[:, :, SLOT_ORDERS].transpose(0, 2, 1, 3).reshape(-1, 15)
+    order_positions = np.asarray(slot_positions)[:, SLOT_ORDERS]
+    order_positions = np.repeat(order_positions.reshape(-1, 15), n_scenarios, axis=0)
+
+    # Captain and vice-captain are starters, so their slots are unchanged by the permutation
+    captain = np.repeat(np.asarray(captain_slot), n_orders * n_scenarios)
+    vice_captain = np.repeat(np.asarray(vice_captain_slot), n_orders * n_scenarios)
+
+    scores = score_lineups(order_points, order_played, order_positions, captain, vice_captain)
+    return scores.reshape(n_squads, n_orders, n_scenarios).mean(axis=2)
+
+
+def optimise_bench_order(squad, df_players, simulator=None, n_scenarios=20000, seed=None):
+    """
+    Re-order a squad's bench using simulated minutes and points.
+
+    The bench goalkeeper keeps bench_order 1; the outfield bench gets the
+    order (2-4) with the highest expected points after auto-subs.
+
+    Args:
+        squad: Squad dict from process_optimization_results
+        df_players: DataFrame with player data
+        simulator: PointsSimulator instance (created from df_players if None)
+        n_scenarios (int): Scenarios used for the evaluation
+        seed (int): Random seed when a simulator is created
+
+    Returns:
+        pd.DataFrame: bench_df sorted by the new bench_order, with 'bench_expected_gain'
+                      giving the gain over the previous order
+    """
+    if simulator is None:
+        simulator = PointsSimulator(df_players, seed=seed)
+
+    slots, captain_slot, vice_captain_slot = squad_slots(squad)
+    points, played = simulator.sample(n_scenarios, players=slots)
+    slot_positions = simulator.positions[simulator.positions_of(slots)]
+
+    scores = evaluate_bench_orders(
+        points[None], played[None], slot_positions[None], [captain_slot], [vice_captain_slot]
+    )[0]
+    best = int(scores.argmax())
+
+    bench_df = squad['bench_df'].copy()
+    ordered = [slots[11]] + [slots[slot] for slot in OUTFIELD_BENCH_ORDERS[best]]
+    bench_df['bench_order'] = bench_df.index.map({idx: order for order, idx in enumerate(ordered, start=1)})
+    bench_df['bench_expected_gain'] = round(float(scores[best] - scores[0]), 3)
+    return bench_df.sort_values('bench_order')
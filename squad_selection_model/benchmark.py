@@ -0,0 +1,257 @@
+# benchmark.py
+# Stage-by-stage timings of both models on synthetic pools, appended to a JSON-lines file
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import pandas as pd
+import pulp
+from pulp import LpProblem, LpMaximize, LpStatus, PULP_CBC_CMD, lpSum, value
+
+from decision_variables import create_decision_variables
+from objective_function import add_objective_function
+from opposing_teams import add_opposing_teams_penalty_to_objective, find_opposing_pairs
+from constraints import (
+    add_squad_size_constraints, add_captain_constraints, add_equal_flow_constraints,
+    add_status_constraints, add_positional_constraints, add_free_transfer_limit_constraint,
+    add_availability_constraints, add_budget_constraint, add_team_constraints
+)
+from squad_creator import process_optimization_results
+from synthetic import make_player_pool, make_team
+
+# The initial-squad model is imported as a package, as in chip_planner.py
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+from initial_squad_selection_model.decision_variables import create_decision_variables as create_initial_variables
+from initial_squad_selection_model.objective_function import add_objective_function as add_initial_objective
+from initial_squad_selection_model.squad_creation import create_squad
+from initial_squad_selection_model import constraints as initial_constraints
+
+DEFAULT_SIZES = [700, 2000, 10000, 50000]
+
+# Stages skipped above these pool sizes: find_opposing_pairs' merge (also used for the
+# opposing-pair terms) grows with players per club squared (50k players in a 20-club
+# league is ~10^8 pairs), and CBC on the largest pools takes far longer than every
+# other stage together
+DEFAULT_MAX_PLAYERS = {'opposing_pairs': 10000, 'find_opposing_pairs': 10000, 'solve': 10000, 'extract': 10000}
+
+
+class StageTimer:
+    """Times named stages, skipping those whose size limit is exceeded"""
+
+    def __init__(self, n_players, max_players):
+        self.n_players = n_players
+        self.max_players = max_players
+        self.stages = {}
+        self.skipped = {}
+
+    def run(self, stage, func, *args, **kwargs):
+        """Run func and record its wall time under stage; returns its result (None if skipped)"""
+        limit = self.max_players.get(stage)
+        if limit is not None and self.n_players > limit:
+            self.skipped[stage] = f"n_players > {limit}"
+            return None
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(*args, **kwargs)
+        self.stages[stage] = round(time.perf_counter() - start, 4)
+        return result
+
+
+def _model_size(prob):
+    return {'n_variables': len(prob.variables()), 'n_constraints': len(prob.constraints)}
+
+
+def benchmark_transfer_model(df_players, my_team, timer, base_opposing_penalty=0.5, time_limit=None):
+    """
+    Build, solve and extract the transfer model (as build_transfer_model) one stage at a time.
+
+    Returns:
+        dict: Model size, status and objective
+    """
+    prob = LpProblem("FPL_Transfer_Benchmark", LpMaximize)
+    vars = timer.run('create_decision_variables', create_decision_variables, df_players)
+
+    # The objective without the opposing-pair penalty, which is timed on its own
+    prob = timer.run('add_objective_function', add_objective_function, prob, df_players, vars,
+                     penalty_points=4, base_opposing_penalty=0)
+    timer.run('find_opposing_pairs', find_opposing_pairs, df_players)
+
+    def add_opposing_pairs():
+        terms = add_opposing_teams_penalty_to_objective(prob, df_players, vars, base_opposing_penalty)
+        prob.setObjective(prob.objective - lpSum(terms))
+        return len(terms)
+    n_pairs = timer.run('opposing_pairs', add_opposing_pairs)
+
+    timer.run('add_squad_size_constraints', add_squad_size_constraints, prob, vars, df_players)
+    timer.run('add_captain_constraints', add_captain_constraints, prob, vars, df_players)
+    timer.run('add_equal_flow_constraints', add_equal_flow_constraints, prob, vars, df_players)
+    timer.run('add_status_constraints', add_status_constraints, prob, vars, df_players, my_team)
+    timer.run('add_positional_constraints', add_positional_constraints, prob, vars, df_players)
+    timer.run('add_free_transfer_limit_constraint', add_free_transfer_limit_constraint, prob, vars, df_players, my_team)
+    timer.run('add_availability_constraints', add_availability_constraints, prob, vars, df_players, my_team)
+    timer.run('add_budget_constraint', add_budget_constraint, prob, vars, df_players, my_team.current_team)
+    timer.run('add_team_constraints', add_team_constraints, prob, vars, df_players)
+
+    result = dict(_model_size(prob), opposing_pairs=n_pairs)
+    status = timer.run('solve', prob.solve, PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+    if status is not None:
+        result.update(status=LpStatus[status], objective=value(prob.objective))
+        if LpStatus[status] == 'Optimal':
+            timer.run('extract', process_optimization_results, vars, df_players, prob)
+        else:
+            timer.skipped['extract'] = f"status {LpStatus[status]}"
+    return result
+
+
+def benchmark_initial_model(df_players, timer, time_limit=None):
+    """
+    Build, solve and extract the initial-squad model one stage at a time.
+
+    Returns:
+        dict: Model size, status and objective
+    """
+    prob = LpProblem("FPL_Initial_Benchmark", LpMaximize)
+    starting_vars, bench_vars, captain_vars = timer.run('create_decision_variables', create_initial_variables, df_players)
+
+    prob = timer.run('add_objective_function', add_initial_objective, prob, df_players, starting_vars, captain_vars)
+    timer.run('add_squad_size_constraints', initial_constraints.add_squad_size_constraints, prob, starting_vars, bench_vars, df_players)
+    timer.run('add_positional_constraints', initial_constraints.add_positional_constraints, prob, starting_vars, bench_vars, df_players)
+    timer.run('add_team_constraints', initial_constraints.add_team_constraints, prob, starting_vars, bench_vars, df_players)
+    timer.run('add_budget_constraint', initial_constraints.add_budget_constraint, prob, starting_vars, bench_vars, df_players)
+    timer.run('add_captain_constraints', initial_constraints.add_captain_constraints, prob, starting_vars, captain_vars, df_players)
+    timer.run('add_availability_constraints', initial_constraints.add_availability_constraints, prob, starting_vars, bench_vars, df_players)
+
+    result = _model_size(prob)
+    status = timer.run('solve', prob.solve, PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+    if status is not None:
+        result.update(status=LpStatus[status], objective=value(prob.objective))
+        if LpStatus[status] == 'Optimal':
+            timer.run('extract', create_squad, prob, df_players, starting_vars, bench_vars, captain_vars)
+        else:
+            timer.skipped['extract'] = f"status {LpStatus[status]}"
+    return result
+
+
+def git_commit():
+    """Current commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=REPO_ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_cases(sizes=DEFAULT_SIZES, n_teams=(20,)):
+    """(n_players, n_teams) pairs; n_teams=None in the list means a realistic 35 players per club"""
+    cases = []
+    for n_players in sizes:
+        for teams in n_teams:
+            case = (n_players, teams or max(20, n_players // 35))
+            if case not in cases:
+                cases.append(case)
+    return cases
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, n_teams=(20, None), models=('transfer', 'initial'), seed=0,
+                   time_limit=300, max_players=None, output_path='benchmark_results.jsonl'):
+    """
+    Benchmark both models on synthetic pools and append one JSON line per model and case.
+
+    Args:
+        sizes: Pool sizes (players)
+        n_teams: League sizes; None means 35 players per club
+        models: Any of 'transfer', 'initial'
+        seed (int): Seed for the synthetic pools and squads
+        time_limit (float): CBC time limit per solve in seconds
+        max_players: Stage -> largest pool it runs on (default: DEFAULT_MAX_PLAYERS)
+        output_path: JSON-lines file results are appended to
+
+    Returns:
+        list: The result records
+    """
+    max_players = DEFAULT_MAX_PLAYERS if max_players is None else max_players
+    meta = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pulp': pulp.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+    records = []
+    for n_players, teams in benchmark_cases(sizes, n_teams):
+        start = time.perf_counter()
+        df_players = make_player_pool(n_players, teams, seed=seed)
+        my_team = make_team(df_players, seed=seed)
+        generate_seconds = round(time.perf_counter() - start, 4)
+
+        for model in models:
+            timer = StageTimer(n_players, max_players)
+            if model == 'transfer':
+                result = benchmark_transfer_model(df_players, my_team, timer, time_limit=time_limit)
+            else:
+                result = benchmark_initial_model(df_players, timer, time_limit=time_limit)
+
+            record = dict(meta, model=model, n_players=n_players, n_teams=teams, seed=seed,
+                          generate_seconds=generate_seconds, **result,
+                          stages=timer.stages, skipped=timer.skipped,
+                          total_seconds=round(sum(timer.stages.values()), 4))
+            records.append(record)
+            with open(output_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+            print(f"{model:<9} {n_players:>6} players {teams:>4} teams: {record['total_seconds']:.2f}s "
+                  f"({len(timer.skipped)} stages skipped)")
+    return records
+
+
+def load_results(path='benchmark_results.jsonl'):
+    """Benchmark records as a DataFrame with one column per stage"""
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    frame = pd.DataFrame(records)
+    stages = pd.DataFrame(list(frame['stages'])).add_prefix('stage_')
+    return pd.concat([frame.drop(columns=['stages']), stages], axis=1)
+
+
+def print_benchmark_table(results, model='transfer'):
+    """Stage timings (rows) by pool size (columns) for the latest run of each case"""
+    latest = results[results['model'] == model].drop_duplicates(['n_players', 'n_teams'], keep='last')
+    stage_columns = [column for column in latest.columns if column.startswith('stage_')]
+    table = latest.set_index(['n_players', 'n_teams'])[stage_columns].dropna(axis=1, how='all').T
+    table.index = [column[len('stage_'):] for column in table.index]
+    print(f"\n⏱️ {model.upper()} MODEL STAGE TIMINGS (seconds)")
+    print("=" * 60)
+    print(table.round(3).to_string())
+
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the squad selection models on synthetic player pools")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--teams', type=int, nargs='+', default=[20, 0], help="League sizes (0: 35 players per club)")
+    parser.add_argument('--models', nargs='+', default=['transfer', 'initial'], choices=['transfer', 'initial'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--time-limit', type=float, default=300)
+    parser.add_argument('--max-opposing', type=int, default=DEFAULT_MAX_PLAYERS['opposing_pairs'])
+    parser.add_argument('--max-solve', type=int, default=DEFAULT_MAX_PLAYERS['solve'])
+    parser.add_argument('--output', default='benchmark_results.jsonl')
+    args = parser.parse_args()
+
+    max_players = dict(DEFAULT_MAX_PLAYERS, opposing_pairs=args.max_opposing, solve=args.max_solve, extract=args.max_solve)
+    run_benchmarks(args.sizes, [teams or None for teams in args.teams], args.models, args.seed,
+                   args.time_limit, max_players, args.output)
+    results = load_results(args.output)
+    for model in args.models:
+        print_benchmark_table(results, model)
@@ -0,0 +1,276 @@
+# chip_planner.py
+# Rank wildcard, free hit, bench boost and triple captain timings over the remaining gameweeks
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pulp import LpProblem, LpMaximize, LpStatus, PULP_CBC_CMD, value
+
+from lineup_solver import solve_lineups, squad_layout
+from simulation import STATUS_PLAY_PROBABILITY
+
+# The initial-squad model sits next to this package; import it as a package so its
+# module names do not clash with this model's decision_variables/objective_function
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+from initial_squad_selection_model.decision_variables import create_decision_variables as create_initial_variables
+from initial_squad_selection_model.objective_function import add_objective_function as add_initial_objective
+from initial_squad_selection_model import constraints as initial_constraints
+
+CHIPS = ['wildcard', 'free_hit', 'bench_boost', 'triple_captain']
+
+# Columns that describe a player rather than a gameweek
+PLAYER_COLUMNS = ['id', 'name', 'position', 'team', 'team_id', 'price']
+
+
+class GameweekArrays:
+    """
+    Player data for several gameweeks on one shared player index.
+
+    Static columns come from the earliest gameweek a player appears in; xP and
+    status are held in (n_players, n_gameweeks) arrays that every chip
+    evaluation slices instead of re-reading the per-gameweek frames. A player
+    who cannot play in a gameweek (injured, suspended, unavailable or missing
+    from that frame) has 0 xP there, so no lineup counts them that week.
+    """
+
+    def __init__(self, gw_frames):
+        """
+        Args:
+            gw_frames: Dictionary gameweek -> df_players for that gameweek
+        """
+        self.gameweeks = sorted(gw_frames)
+        frames = [gw_frames[gw].drop_duplicates('id').set_index('id') for gw in self.gameweeks]
+
+        columns = [column for column in PLAYER_COLUMNS if column != 'id' and column in frames[0].columns]
+        players = frames[0][columns]
+        for frame in frames[1:]:
+            players = players.combine_first(frame[columns])
+        self.players = players[columns].rename_axis('id').reset_index()
+
+        self.status = np.column_stack([
+            (frame['status'] if 'status' in frame.columns else pd.Series('a', index=frame.index))
+            .reindex(self.players['id']).fillna('u').to_numpy(dtype=object)
+            for frame in frames
+        ])
+        can_play = np.vectorize(lambda status: STATUS_PLAY_PROBABILITY.get(status, 0.0) > 0, otypes=[bool])(self.status)
+        self.xp = np.column_stack([
+            pd.to_numeric(frame['expected_points'], errors='coerce')
+            .reindex(self.players['id']).fillna(0).to_numpy(dtype=float)
+            for frame in frames
+        ]) * can_play
+
+    def columns_of(self, gameweeks):
+        """Positions of gameweeks in the xP array"""
+        return [self.gameweeks.index(gw) for gw in gameweeks]
+
+    def frame(self, gameweeks):
+        """df_players with expected_points summed over the given gameweeks and the first one's status"""
+        columns = self.columns_of(gameweeks)
+        df_players = self.players.copy()
+        df_players['status'] = self.status[:, columns[0]]
+        df_players['expected_points'] = self.xp[:, columns].sum(axis=1)
+        df_players['gameweek'] = gameweeks[0]
+        return df_players
+
+
+def solve_best_squad(df_players, budget=100.0, time_limit=None):
+    """
+    Best unconstrained 15-man squad with the initial-squad model.
+
+    Args:
+        df_players: DataFrame with player data
+        budget: Squad budget in £m
+        time_limit: Optional CBC time limit in seconds
+
+    Returns:
+        tuple: (list of 15 index labels, objective) or (None, -inf) when infeasible
+    """
+    prob = LpProblem("FPL_Chip_Squad", LpMaximize)
+    starting_vars, bench_vars, captain_vars = create_initial_variables(df_players)
+    prob = add_initial_objective(prob, df_players, starting_vars, captain_vars)
+    prob = initial_constraints.add_squad_size_constraints(prob, starting_vars, bench_vars, df_players)
+    prob = initial_constraints.add_positional_constraints(prob, starting_vars, bench_vars, df_players)
+    prob = initial_constraints.add_team_constraints(prob, starting_vars, bench_vars, df_players)
+    prob = initial_constraints.add_budget_constraint(prob, starting_vars, bench_vars, df_players, budget=budget)
+    prob = initial_constraints.add_captain_constraints(prob, starting_vars, captain_vars, df_players)
+    prob = initial_constraints.add_availability_constraints(prob, starting_vars, bench_vars, df_players)
+
+    status = prob.solve(PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+    if LpStatus[status] != 'Optimal':
+        return None, -np.inf
+
+    labels = [idx for idx in df_players.index
+              if starting_vars[idx].value() > 0.5 or bench_vars[idx].value() > 0.5]
+    return labels, value(prob.objective)
+
+
+class ChipPlanner:
+    """
+    Evaluate every chip in every remaining gameweek against playing the current squad.
+
+    - Bench boost: the bench xP of the current squad's best lineup that week.
+    - Triple captain: best lineup with a 3x captain minus the normal best lineup.
+    - Free hit: best one-week squad from the initial-squad model within the
+      current squad value, minus the current squad's best lineup that week.
+    - Wildcard: squad from the initial-squad model on xP summed over the
+      wildcard horizon, then scored week by week with its best lineup,
+      minus the current squad over the same weeks (the horizon is cut short
+      near the last supplied gameweek).
+
+    expected_gain is per gameweek scored, so a wildcard's gain over several
+    weeks ranks against the one-week chips (and against wildcards with a
+    shortened horizon) on the same scale; total_gain keeps the sum.
+
+    Lineups of fixed squads use the exact enumeration in lineup_solver, so all
+    gameweeks are scored in one batch; the free hit and wildcard MILPs are
+    independent and solved concurrently (CBC runs as a separate process).
+    """
+
+    def __init__(self, gw_frames, my_team, wildcard_horizon=4, n_workers=4, time_limit=None):
+        """
+        Args:
+            gw_frames: Dictionary gameweek -> df_players for each remaining gameweek
+            my_team: Team instance (current squad and bank)
+            wildcard_horizon (int): Gameweeks a wildcard squad is assumed to be kept
+            n_workers (int): Concurrent MILP solves
+            time_limit (float): Optional CBC time limit per solve in seconds
+        """
+        self.arrays = GameweekArrays(gw_frames)
+        self.gameweeks = self.arrays.gameweeks
+        self.wildcard_horizon = wildcard_horizon
+        self.n_workers = n_workers
+        self.time_limit = time_limit
+
+        players = self.arrays.players
+        labels = players.index[players['id'].isin(my_team.all_ids)]
+        self.layout = players.index.get_indexer(squad_layout(players, labels))
+        self.budget = round(float(my_team.team_value) + float(my_team.budget), 1)
+
+        # Current squad's best lineup in every gameweek, as one batch
+        self.baseline_starting, self.baseline_captain, _, self.baseline_points = self._score_squad(self.layout)
+
+    def _score_squad(self, layout, gameweeks=None, captain_multiplier=2):
+        """Best lineup of one squad in each gameweek: (starting, captain, vice, points) per gameweek"""
+        columns = self.arrays.columns_of(gameweeks) if gameweeks is not None else slice(None)
+        xp = self.arrays.xp[layout][:, columns].T
+        team_codes = np.tile(self.arrays.players['team_id'].to_numpy()[layout], (len(xp), 1))
+        return solve_lineups(xp, team_codes=team_codes, captain_multiplier=captain_multiplier)
+
+    def _name(self, label):
+        return self.arrays.players.loc[label, 'name']
+
+    def bench_boost(self):
+        """Bench boost gain per gameweek"""
+        xp = self.arrays.xp[self.layout].T
+        bench_points = np.where(self.baseline_starting, 0.0, xp).sum(axis=1)
+        return [
+            {'chip': 'bench_boost', 'gameweek': gw, 'weeks': 1, 'expected_gain': bench_points[k],
+             'detail': "Bench: " + ", ".join(self._name(self.layout[slot]) for slot in np.flatnonzero(~self.baseline_starting[k]))}
+            for k, gw in enumerate(self.gameweeks)
+        ]
+
+    def triple_captain(self):
+        """Triple captain gain per gameweek"""
+        _, captain, _, points = self._score_squad(self.layout, captain_multiplier=3)
+        return [
+            {'chip': 'triple_captain', 'gameweek': gw, 'weeks': 1, 'expected_gain': points[k] - self.baseline_points[k],
+             'detail': f"Captain: {self._name(self.layout[captain[k]])}"}
+            for k, gw in enumerate(self.gameweeks)
+        ]
+
+    def _wildcard_weeks(self, gw):
+        start = self.gameweeks.index(gw)
+        return self.gameweeks[start:start + self.wildcard_horizon]
+
+    def _squad_chip_jobs(self, chips):
+        """(chip, gameweek, weeks the squad is scored over) for every free hit / wildcard solve"""
+        jobs = []
+        for gw in self.gameweeks:
+            if 'free_hit' in chips:
+                jobs.append(('free_hit', gw, [gw]))
+            if 'wildcard' in chips:
+                jobs.append(('wildcard', gw, self._wildcard_weeks(gw)))
+        return jobs
+
+    def _evaluate_squad_chip(self, chip, gw, weeks):
+        labels, _ = solve_best_squad(self.arrays.frame(weeks), budget=self.budget, time_limit=self.time_limit)
+        if labels is None:
+            return {'chip': chip, 'gameweek': gw, 'weeks': len(weeks), 'expected_gain': -np.inf, 'detail': "No feasible squad"}
+
+        layout = self.arrays.players.index.get_indexer(squad_layout(self.arrays.players, labels))
+        _, _, _, points = self._score_squad(layout, gameweeks=weeks)
+        baseline = self.baseline_points[self.arrays.columns_of(weeks)]
+
+        changed = sorted(set(self.arrays.players.loc[labels, 'id']) - set(self.arrays.players.loc[self.layout, 'id']))
+        detail = f"{len(changed)} changes"
+        if chip == 'wildcard':
+            detail += f", GW{weeks[0]}-{weeks[-1]}"
+        return {'chip': chip, 'gameweek': gw, 'weeks': len(weeks),
+                'expected_gain': (points.sum() - baseline.sum()) / len(weeks), 'detail': detail}
+
+    def plan(self, chips=CHIPS):
+        """
+        Evaluate the chips in every gameweek.
+
+        Args:
+            chips: Chips still available (subset of CHIPS)
+
+        Returns:
+            pd.DataFrame: chip, gameweek, weeks, expected_gain (per gameweek scored),
+                          total_gain, detail; best timings first
+        """
+        rows = []
+        if 'bench_boost' in chips:
+            rows += self.bench_boost()
+        if 'triple_captain' in chips:
+            rows += self.triple_captain()
+
+        jobs = self._squad_chip_jobs(chips)
+        with ThreadPoolExecutor(max_workers=self.n_workers) as pool:
+            rows += list(pool.map(lambda job: self._evaluate_squad_chip(*job), jobs))
+
+        plan = pd.DataFrame(rows, columns=['chip', 'gameweek', 'weeks', 'expected_gain', 'detail'])
+        plan['total_gain'] = (plan['expected_gain'].astype(float) * plan['weeks']).round(2)
+        plan['expected_gain'] = plan['expected_gain'].astype(float).round(2)
+        plan = plan[['chip', 'gameweek', 'weeks', 'expected_gain', 'total_gain', 'detail']]
+        return plan.sort_values('expected_gain', ascending=False).reset_index(drop=True)
+
+
+def best_chip_timings(plan):
+    """Best gameweek for each chip"""
+    best = plan.loc[plan.groupby('chip')['expected_gain'].idxmax()]
+    return best.sort_values('expected_gain', ascending=False).reset_index(drop=True)
+
+
+def print_chip_plan(plan, top_n=10):
+    """Print the best week per chip and the overall best chip timings"""
+    print("\n🃏 CHIP PLANNER")
+    print("=" * 60)
+    print("Best week per chip (gain per gameweek scored):")
+    for _, row in best_chip_timings(plan).iterrows():
+        total = f", {row['total_gain']:+.2f} over {row['weeks']} GWs" if row['weeks'] > 1 else ""
+        print(f"  {row['chip']:<15} GW{row['gameweek']:<3} {row['expected_gain']:+.2f} pts/GW{total}  ({row['detail']})")
+    print(f"\nTop {top_n} chip timings:")
+    for _, row in plan.head(top_n).iterrows():
+        print(f"  {row['chip']:<15} GW{row['gameweek']:<3} {row['expected_gain']:+.2f} pts/GW")
+    print("=" * 60)
+
+
+# Example usage
+if __name__ == "__main__":
+    from team_class import Team
+
+    my_team = Team(team_id=2562804, budget=0, free_transfers=1)
+    gw_frames = {
+        gw: pd.read_csv(f'data/fpl_players_gw_{gw}.csv')
+        for gw in range(5, 39) if os.path.exists(f'data/fpl_players_gw_{gw}.csv')
+    }
+
+    planner = ChipPlanner(gw_frames, my_team, wildcard_horizon=4)
+    print_chip_plan(planner.plan())
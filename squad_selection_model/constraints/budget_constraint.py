@@ -3,11 +3,13 @@
 from pulp import lpSum
 
 def add_budget_constraint(prob, vars, df_players_gw2, 
-                         current_team, initial_bank=0):
+                         current_team, initial_bank=0, budget=105):
     """
     Budget constraint for transfers considering price changes
     
     Money = initial_bank + money_from_sales - money_for_purchases
+
+    budget: Most the final squad may cost (£m)
     """
     
     # Calculate money from SALES (players transferred out)
@@ -43,7 +45,7 @@ def add_budget_constraint(prob, vars, df_players_gw2,
     )
 
     prob += (
-        total_team_cost <= 105, "Budget_Constraint"
+        total_team_cost <= budget, "Budget_Constraint"
     )
 
     
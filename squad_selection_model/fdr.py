@@ -8,6 +8,8 @@ import requests
 import pandas as pd
 from pulp import lpSum
 
+from fixture_index import get_fixture_index
+
 class FDRCalculator:
     """Calculate FDR ratings and penalties for optimization"""
     
@@ -23,6 +25,7 @@ class FDRCalculator:
         self.weeks = weeks
         self.team_fdr_ratings = {}
         self.current_gw = None
+        self.fixture_index = None
         
     def fetch_fdr_data(self):
         """Fetch FDR data from FPL API"""
@@ -58,38 +61,25 @@ class FDRCalculator:
         """Calculate average FDR for each team over the specified period"""
         if self.start_gw is None:
             return {}
-            
-        end_gw = self.start_gw + self.weeks - 1
-        team_fdrs = {}
-        
-        # Collect FDR ratings for each team
-        for fixture in fixtures:
-            gw = fixture['event']
-            if not gw or gw < self.start_gw or gw > end_gw:
-                continue
-                
-            home_team = fixture['team_h']
-            away_team = fixture['team_a']
-            home_difficulty = fixture['team_h_difficulty']
-            away_difficulty = fixture['team_a_difficulty']
-            
-            # Initialize if needed
-            if home_team not in team_fdrs:
-                team_fdrs[home_team] = []
-            if away_team not in team_fdrs:
-                team_fdrs[away_team] = []
-                
-            team_fdrs[home_team].append(home_difficulty)
-            team_fdrs[away_team].append(away_difficulty)
-        
-        # Calculate averages
-        team_fdr_averages = {}
-        for team_id, difficulties in team_fdrs.items():
-            if difficulties:
-                avg_fdr = sum(difficulties) / len(difficulties)
-                team_fdr_averages[team_id] = round(avg_fdr, 2)
-        
-        return team_fdr_averages
+        
+        # Average over every fixture in the window (both fixtures of a double count)
+        self.fixture_index = get_fixture_index(fixtures)
+        return self.fixture_index.fdr_ratings(self.start_gw, self.weeks)
+    
+    def set_window(self, start_gw=None, weeks=None):
+        """
+        Move the FDR window without refetching: a prefix-sum lookup on the
+        fixture index loaded by fetch_fdr_data
+        
+        Args:
+            start_gw (int): New starting gameweek (default: unchanged)
+            weeks (int): New number of weeks (default: unchanged)
+        """
+        self.start_gw = start_gw if start_gw is not None else self.start_gw
+        self.weeks = weeks if weeks is not None else self.weeks
+        if self.fixture_index is not None and self.start_gw is not None:
+            self.team_fdr_ratings = self.fixture_index.fdr_ratings(self.start_gw, self.weeks)
+        return self.team_fdr_ratings
     
     def get_fdr_multiplier(self, team_id):
         """
@@ -133,7 +123,7 @@ def add_fdr_penalty_to_objective(prob, df_players, vars, fdr_calculator, base_pe
         prob: PuLP problem instance
         df_players: DataFrame with player data
         vars: Dictionary of decision variables
-        fdr_calculator: FDRCalculator instance
+        fdr_calculator: FDRCalculator, CSVFDRCalculator or StrengthFDRCalculator instance
         base_penalty: Base penalty points for FDR scaling
         
     Returns:
@@ -143,18 +133,23 @@ def add_fdr_penalty_to_objective(prob, df_players, vars, fdr_calculator, base_pe
         print("Warning: No FDR data available")
         return []
     
+    # One bonus per player: position-specific when the calculator supports it,
+    # otherwise one lookup per club rather than one per variable
+    if hasattr(fdr_calculator, 'player_fdr_bonus'):
+        bonus = fdr_calculator.player_fdr_bonus(df_players, base_penalty)
+    else:
+        team_ids = df_players['team_id']
+        club_bonus = {team_id: fdr_calculator.get_fdr_penalty_points(team_id, base_penalty) for team_id in team_ids.unique()}
+        bonus = team_ids.map(club_bonus).to_numpy(dtype=float)
+    bonus = pd.Series(bonus, index=df_players.index)
+    
     fdr_terms = []
     
-    # Apply FDR penalty/bonus to all starting players
+    # Apply FDR penalty/bonus to all starting players (positive for good fixtures, negative for bad)
     for var_type in ['stay_starting', 'bench_to_starting', 'in_to_starting_free', 'in_to_starting_paid']:
         if var_type in vars:
-            for idx, var in vars[var_type].items():
-                if idx in df_players.index:
-                    team_id = df_players.loc[idx, 'team_id']
-                    fdr_penalty = fdr_calculator.get_fdr_penalty_points(team_id, base_penalty)
-                    
-                    # Add FDR term (positive for good fixtures, negative for bad)
-                    fdr_terms.append(fdr_penalty * var)
+            player_bonus = bonus.reindex(list(vars[var_type].keys())).fillna(0.0).to_numpy()
+            fdr_terms.extend(b * var for b, var in zip(player_bonus, vars[var_type].values()) if b != 0)
     
     return fdr_terms
 
@@ -195,19 +190,21 @@ def create_fdr_calculator(start_gw=None, weeks=5):
         return None
 
 
-def get_team_fdr_from_csv(csv_path='data/fpl_players_gw_3_with_fdr.csv'):
+def get_team_fdr_from_csv(csv_path='data/fpl_players_gw_3_with_fdr.csv', weeks=5):
     """
     Get team FDR ratings from the CSV file we created earlier
     
     Args:
         csv_path (str): Path to CSV with FDR data
+        weeks (int): Horizon of the team_fdr_{weeks}gw column to read
         
     Returns:
         dict: Mapping of team_id to FDR rating
     """
     try:
-        df = pd.read_csv(csv_path)
-        team_fdr_map = df[['team_id', 'team_fdr_5gw']].drop_duplicates().set_index('team_id')['team_fdr_5gw'].to_dict()
+        column = f'team_fdr_{weeks}gw'
+        df = pd.read_csv(csv_path, usecols=['team_id', column])
+        team_fdr_map = df.drop_duplicates('team_id').set_index('team_id')[column].to_dict()
         
         print(f"✅ Loaded FDR data from CSV for {len(team_fdr_map)} teams")
         return team_fdr_map
@@ -220,8 +217,8 @@ def get_team_fdr_from_csv(csv_path='data/fpl_players_gw_3_with_fdr.csv'):
 class CSVFDRCalculator:
     """FDR Calculator that uses pre-calculated CSV data"""
     
-    def __init__(self, csv_path='data/fpl_players_gw_4.csv'):
-        self.team_fdr_ratings = get_team_fdr_from_csv(csv_path)
+    def __init__(self, csv_path='data/fpl_players_gw_4.csv', weeks=5):
+        self.team_fdr_ratings = get_team_fdr_from_csv(csv_path, weeks)
         
     def get_fdr_multiplier(self, team_id):
         """Get FDR multiplier for a team"""
@@ -0,0 +1,244 @@
+# fixture_difficulty.py
+# Position-specific fixture difficulty multipliers from team attack/defence strengths
+
+import argparse
+
+import numpy as np
+import pandas as pd
+import requests
+
+from fixture_index import get_fixture_index
+from league_batch import FPL_API
+from simulation import POSITION_FACTOR_LOADINGS, position_codes
+
+STRENGTH_COLUMNS = ['strength_attack_home', 'strength_attack_away', 'strength_defence_home', 'strength_defence_away']
+
+# Weight of the (attack, defence) matchup for each position, from the simulation's factor loadings
+POSITION_WEIGHTS = POSITION_FACTOR_LOADINGS / POSITION_FACTOR_LOADINGS.sum(axis=1, keepdims=True)
+
+# Goals added to each side of the results-based strengths so early-season samples are shrunk to average
+RESULTS_PRIOR_MATCHES = 3
+
+
+def team_strengths(bootstrap):
+    """
+    FPL's home/away attack and defence strengths per team from bootstrap-static.
+
+    Returns:
+        pd.DataFrame: STRENGTH_COLUMNS indexed by team_id
+    """
+    teams = pd.DataFrame(bootstrap['teams']).set_index('id')
+    teams.index.name = 'team_id'
+    return teams[STRENGTH_COLUMNS].astype(float)
+
+
+def strengths_from_results(fixtures, last_n=10):
+    """
+    Attack and defence strengths from each team's last_n finished matches.
+
+    Attack is goals scored per match and defence the inverse of goals conceded,
+    both relative to the league average and split by venue, with
+    RESULTS_PRIOR_MATCHES average matches mixed in. Scaled to FPL's ~1000-1400
+    range so they can replace team_strengths().
+
+    Returns:
+        pd.DataFrame: STRENGTH_COLUMNS indexed by team_id
+    """
+    fixtures = pd.DataFrame(fixtures)
+    played = fixtures[fixtures['finished'].fillna(False).astype(bool)].dropna(subset=['team_h_score', 'team_a_score'])
+    if 'kickoff_time' in played.columns:
+        played = played.sort_values('kickoff_time', kind='stable')
+
+    rows = pd.concat([
+        pd.DataFrame({'team_id': played['team_h'], 'venue': 'home',
+                      'scored': played['team_h_score'], 'conceded': played['team_a_score']}),
+        pd.DataFrame({'team_id': played['team_a'], 'venue': 'away',
+                      'scored': played['team_a_score'], 'conceded': played['team_h_score']}),
+    ]).sort_index(kind='stable')
+    rows = rows.groupby(['team_id', 'venue']).tail(last_n)
+
+    league = rows['scored'].mean() if len(rows) else 1.0
+    totals = rows.groupby(['team_id', 'venue']).agg(scored=('scored', 'sum'), conceded=('conceded', 'sum'),
+                                                    matches=('scored', 'size'))
+    prior = RESULTS_PRIOR_MATCHES * league
+    attack = (totals['scored'] + prior) / (totals['matches'] + RESULTS_PRIOR_MATCHES) / league
+    defence = league / ((totals['conceded'] + prior) / (totals['matches'] + RESULTS_PRIOR_MATCHES))
+
+    teams = np.union1d(fixtures['team_h'].unique(), fixtures['team_a'].unique())
+    strengths = pd.DataFrame({
+        'strength_attack_home': attack.xs('home', level='venue').reindex(teams),
+        'strength_attack_away': attack.xs('away', level='venue').reindex(teams),
+        'strength_defence_home': defence.xs('home', level='venue').reindex(teams),
+        'strength_defence_away': defence.xs('away', level='venue').reindex(teams),
+    }, index=pd.Index(teams, name='team_id')) if len(totals) else pd.DataFrame(index=pd.Index(teams, name='team_id'),
+                                                                                columns=STRENGTH_COLUMNS)
+    return (1200 * strengths.astype(float).fillna(1.0)).round(1)
+
+
+def fixture_multipliers(index, strengths, sensitivity=1.0):
+    """
+    Expected-points multiplier of every fixture for each position.
+
+    A team's attack (at its venue) is set against the opponent's defence (at
+    the opponent's venue), and its defence against the opponent's attack. Each
+    position weighs the two log-ratios by POSITION_WEIGHTS (goalkeepers only
+    care about defence, forwards only about attack), and the multiplier is
+    exp(sensitivity * weighted log-ratio), so an even matchup gives 1.
+
+    Args:
+        index: FixtureIndex
+        strengths: STRENGTH_COLUMNS indexed by team_id (team_strengths or strengths_from_results)
+        sensitivity (float): Scales how far multipliers move from 1
+
+    Returns:
+        np.ndarray: (n_teams, n_gameweeks, n_slots, 4) in POSITION_ORDER; NaN for empty slots
+    """
+    table = strengths.reindex(index.team_ids)[STRENGTH_COLUMNS].to_numpy(dtype=float)
+    attack_home, attack_away, defence_home, defence_away = table.T
+
+    has_fixture = index.opponent >= 0
+    opponent = np.where(has_fixture, index.team_rows(np.where(has_fixture, index.opponent, index.team_ids[0])), 0)
+    home = index.is_home.astype(bool)
+    team = np.broadcast_to(np.arange(len(index.team_ids))[:, None, None], opponent.shape)
+
+    own_attack = np.where(home, attack_home[team], attack_away[team])
+    own_defence = np.where(home, defence_home[team], defence_away[team])
+    opponent_attack = np.where(home, attack_away[opponent], attack_home[opponent])
+    opponent_defence = np.where(home, defence_away[opponent], defence_home[opponent])
+
+    log_attack = np.log(own_attack / opponent_defence)
+    log_defence = np.log(own_defence / opponent_attack)
+    log_multiplier = log_attack[..., None] * POSITION_WEIGHTS[:, 0] + log_defence[..., None] * POSITION_WEIGHTS[:, 1]
+    multipliers = np.exp(sensitivity * log_multiplier)
+    return np.where(has_fixture[..., None], multipliers, np.nan)
+
+
+class StrengthFDRCalculator:
+    """
+    FDR calculator from team strengths, with position-specific bonuses.
+
+    Drop-in for FDRCalculator/CSVFDRCalculator: team_fdr_ratings,
+    get_fdr_multiplier and get_fdr_penalty_points work per club (averaged over
+    positions), while player_fdr_bonus gives add_fdr_penalty_to_objective one
+    bonus per player by position. Multipliers for every fixture are computed
+    once; the window average per team and position is a mean over a slice.
+    """
+
+    def __init__(self, index, strengths, start_gw, weeks=5, sensitivity=1.0, scale=5.0):
+        """
+        Args:
+            index: FixtureIndex
+            strengths: STRENGTH_COLUMNS indexed by team_id
+            start_gw (int): First gameweek of the window
+            weeks (int): Gameweeks in the window
+            sensitivity (float): See fixture_multipliers
+            scale (float): Bonus multiplier per unit of average multiplier above 1 (capped at +/-2,
+                           the range of FDRCalculator's 3.0 - fdr)
+        """
+        self.index = index
+        self.start_gw = start_gw
+        self.weeks = weeks
+        self.scale = scale
+        self.multipliers = fixture_multipliers(index, strengths, sensitivity)
+        self.set_window(start_gw, weeks)
+
+    @classmethod
+    def from_api(cls, start_gw=None, weeks=5, source='bootstrap', last_n=10, session=None, **kwargs):
+        """
+        Build from the FPL API with strengths from bootstrap-static ('bootstrap') or recent results ('results').
+        """
+        session = session or requests.Session()
+        bootstrap = session.get(f'{FPL_API}/bootstrap-static/').json()
+        fixtures = session.get(f'{FPL_API}/fixtures/').json()
+        if start_gw is None:
+            start_gw = next((event['id'] for event in bootstrap['events'] if event['is_next']), 1)
+        strengths = team_strengths(bootstrap) if source == 'bootstrap' else strengths_from_results(fixtures, last_n)
+        index = get_fixture_index(fixtures, team_ids=[team['id'] for team in bootstrap['teams']])
+        return cls(index, strengths, start_gw, weeks, **kwargs)
+
+    def set_window(self, start_gw=None, weeks=None):
+        """Average multipliers over a new window (no refetch); returns team_fdr_ratings"""
+        self.start_gw = start_gw if start_gw is not None else self.start_gw
+        self.weeks = weeks if weeks is not None else self.weeks
+        window = self.multipliers[:, max(self.start_gw, 1) - 1:self.start_gw + self.weeks - 1]
+        window = window.reshape(len(self.index.team_ids), -1, 4)
+        played = ~np.isnan(window)
+        count = played.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, np.where(played, window, 0.0).sum(axis=1) / count, 1.0)
+
+        # Bonus multiplier per team and position, on FDRCalculator's -2..+2 scale
+        self.position_bonus = np.clip(self.scale * (mean - 1.0), -2.0, 2.0)
+        has_fixture = count[:, 0] > 0
+        self.team_fdr_ratings = {
+            int(team_id): round(3.0 - float(bonus), 2)
+            for team_id, bonus, ok in zip(self.index.team_ids, self.position_bonus.mean(axis=1), has_fixture) if ok
+        }
+        return self.team_fdr_ratings
+
+    def get_fdr_multiplier(self, team_id):
+        """Club-level multiplier (positions averaged); 0.0 without fixtures in the window"""
+        if team_id not in self.team_fdr_ratings:
+            return 0.0
+        return 3.0 - self.team_fdr_ratings[team_id]
+
+    def get_fdr_penalty_points(self, team_id, base_points=1.0):
+        """Club-level penalty/bonus points"""
+        return self.get_fdr_multiplier(team_id) * base_points
+
+    def player_fdr_bonus(self, df_players, base_points=1.0):
+        """
+        Bonus points per player from their club's window and their position.
+
+        Returns:
+            np.ndarray: Aligned with df_players (0 for clubs without fixtures in the window)
+        """
+        rows = self.index.team_rows(df_players['team_id'].to_numpy())
+        positions = position_codes(df_players)
+        known = rows >= 0
+        bonus = np.zeros(len(df_players))
+        bonus[known] = self.position_bonus[rows[known], positions[known]]
+        has_fixture = np.isin(df_players['team_id'].to_numpy(), list(self.team_fdr_ratings))
+        return np.where(has_fixture, bonus * base_points, 0.0)
+
+    def player_multipliers(self, df_players, gameweeks):
+        """
+        Per-player, per-gameweek multiplier: summed over a double, 0 in a blank.
+
+        Returns:
+            pd.DataFrame: One column per gameweek, indexed like df_players
+        """
+        gameweeks = list(gameweeks)
+        rows = self.index.team_rows(df_players['team_id'].to_numpy())
+        positions = position_codes(df_players)
+        columns = np.array(gameweeks) - 1
+        per_gameweek = np.nansum(self.multipliers[:, columns], axis=2)     # (n_teams, n_gws, 4)
+        values = np.where((rows >= 0)[:, None], per_gameweek[rows.clip(0), :, positions], 0.0)
+        return pd.DataFrame(values, index=df_players.index, columns=gameweeks)
+
+
+def print_difficulty_table(calculator, team_names=None):
+    """Window bonus per club and position, easiest first"""
+    names = [team_names.get(team_id, team_id) if team_names else team_id for team_id in calculator.index.team_ids]
+    table = pd.DataFrame(calculator.position_bonus, index=names, columns=['GK', 'DEF', 'MID', 'FWD'])
+    table['ALL'] = table.mean(axis=1)
+    end_gw = calculator.start_gw + calculator.weeks - 1
+    print(f"\n🎯 STRENGTH-BASED FIXTURE BONUS GW {calculator.start_gw}-{end_gw} (+ = easier)")
+    print("=" * 60)
+    print(table.sort_values('ALL', ascending=False).round(2).to_string())
+
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Position-specific fixture difficulty from team strengths")
+    parser.add_argument('--start-gw', type=int, default=None)
+    parser.add_argument('--weeks', type=int, default=5)
+    parser.add_argument('--source', choices=['bootstrap', 'results'], default='bootstrap')
+    parser.add_argument('--sensitivity', type=float, default=1.0)
+    args = parser.parse_args()
+
+    session = requests.Session()
+    calculator = StrengthFDRCalculator.from_api(args.start_gw, args.weeks, args.source, session=session,
+                                                sensitivity=args.sensitivity)
+    teams = {team['id']: team['name'] for team in session.get(f'{FPL_API}/bootstrap-static/').json()['teams']}
+    print_difficulty_table(calculator, teams)
@@ -0,0 +1,239 @@
+# fixture_index.py
+# Dense team x gameweek x slot fixture arrays, built once per fixtures snapshot
+
+import hashlib
+import json
+from collections import OrderedDict
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+import requests
+
+FIXTURES_URL = 'https://fantasy.premierleague.com/api/fixtures/'
+
+# Fixture indexes kept by get_fixture_index, most recent last
+_INDEX_CACHE = OrderedDict()
+_INDEX_CACHE_SIZE = 8
+
+
+def team_fixtures(fixtures):
+    """
+    One row per team and fixture from the FPL fixtures list.
+
+    Args:
+        fixtures: fixtures/ API records (list of dicts or DataFrame with event,
+                  team_h, team_a, team_h_difficulty, team_a_difficulty)
+
+    Returns:
+        pd.DataFrame: gameweek, team_id, opponent_id, is_home and difficulty in
+                      kickoff order (fixture order without kickoff_time); double
+                      gameweeks give a team two rows, blanks none
+    """
+    fixtures = pd.DataFrame(fixtures).dropna(subset=['event'])
+    if 'kickoff_time' in fixtures.columns:
+        fixtures = fixtures.sort_values('kickoff_time', kind='stable', na_position='last')
+    fixtures = fixtures.reset_index(drop=True)
+    home = pd.DataFrame({'gameweek': fixtures['event'], 'team_id': fixtures['team_h'],
+                         'opponent_id': fixtures['team_a'], 'is_home': 1,
+                         'difficulty': fixtures['team_h_difficulty']})
+    away = pd.DataFrame({'gameweek': fixtures['event'], 'team_id': fixtures['team_a'],
+                         'opponent_id': fixtures['team_h'], 'is_home': 0,
+                         'difficulty': fixtures['team_a_difficulty']})
+    rows = pd.concat([home, away]).sort_index(kind='stable').reset_index(drop=True)
+    return rows.astype({'gameweek': int, 'team_id': int, 'opponent_id': int, 'is_home': int, 'difficulty': float})
+
+
+class RollingFDR:
+    """
+    Average fixture difficulty for every team, start gameweek and horizon.
+
+    Difficulty sums and fixture counts per team and gameweek are turned into
+    prefix sums along the gameweek axis once, so the average over any window
+    is two subtractions and a division. Every fixture counts, so a double
+    gameweek weighs twice and a blank not at all; windows are clipped at the
+    end of the season.
+    """
+
+    def __init__(self, difficulty):
+        """
+        Args:
+            difficulty: Array (n_teams, n_gameweeks, n_slots) with NaN for empty slots
+        """
+        played = ~np.isnan(difficulty)
+        n_teams, self.n_gameweeks = difficulty.shape[:2]
+        self.sum_prefix = np.zeros((n_teams, self.n_gameweeks + 1))
+        self.count_prefix = np.zeros((n_teams, self.n_gameweeks + 1))
+        np.cumsum(np.where(played, difficulty, 0.0).sum(axis=2), axis=1, out=self.sum_prefix[:, 1:])
+        np.cumsum(played.sum(axis=2), axis=1, out=self.count_prefix[:, 1:])
+
+    def _average(self, start, end):
+        total = self.sum_prefix[:, end] - self.sum_prefix[:, start]
+        count = self.count_prefix[:, end] - self.count_prefix[:, start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, total / count, np.nan)
+
+    def window(self, start_gw, horizon):
+        """
+        Average difficulty from start_gw over horizon gameweeks.
+
+        Returns:
+            np.ndarray: (n_teams,) with NaN for teams without a fixture in the window
+        """
+        start = min(max(start_gw, 1), self.n_gameweeks + 1) - 1
+        end = min(start + max(horizon, 0), self.n_gameweeks)
+        return self._average(start, max(start, end))
+
+    def table(self, horizons):
+        """
+        Averages for every start gameweek and each horizon at once.
+
+        Args:
+            horizons: Horizons in gameweeks
+
+        Returns:
+            np.ndarray: (n_teams, n_gameweeks, len(horizons)); [:, g - 1, k] starts at gameweek g
+        """
+        starts = np.arange(self.n_gameweeks)[:, None]
+        ends = np.minimum(starts + np.asarray(list(horizons))[None, :], self.n_gameweeks)
+        return self._average(starts, ends)
+
+
+class FixtureIndex:
+    """
+    Every scheduled fixture as dense arrays of shape (n_teams, n_gameweeks, n_slots).
+
+    Slot 0 is a team's first fixture of the gameweek (by kickoff), slot 1 the
+    second of a double, and so on. Empty slots hold opponent -1, is_home 0 and
+    difficulty NaN. Gameweek g is column g - 1 and team rows follow team_ids.
+    counts holds fixtures per team and gameweek, so doubles (counts >= 2) and
+    blanks (counts == 0) are array comparisons.
+    """
+
+    def __init__(self, fixtures, team_ids=None, n_gameweeks=None):
+        """
+        Args:
+            fixtures: fixtures/ API records (list of dicts or DataFrame)
+            team_ids: Teams to index (default: every team in fixtures)
+            n_gameweeks: Gameweeks to index (default: the last scheduled one)
+        """
+        rows = team_fixtures(fixtures)
+
+        self.team_ids = np.sort(pd.unique(rows['team_id'])) if team_ids is None else np.sort(np.asarray(team_ids))
+        rows = rows[np.isin(rows['team_id'], self.team_ids)]
+        self.n_gameweeks = int(rows['gameweek'].max()) if n_gameweeks is None else int(n_gameweeks)
+        rows = rows[rows['gameweek'] <= self.n_gameweeks]
+
+        team = np.searchsorted(self.team_ids, rows['team_id'].to_numpy())
+        gameweek = rows['gameweek'].to_numpy() - 1
+        slot = rows.groupby(['team_id', 'gameweek']).cumcount().to_numpy()
+        self.n_slots = int(slot.max()) + 1 if len(slot) else 1
+
+        shape = (len(self.team_ids), self.n_gameweeks, self.n_slots)
+        self.opponent = np.full(shape, -1, dtype=np.int32)
+        self.is_home = np.zeros(shape, dtype=np.int8)
+        self.difficulty = np.full(shape, np.nan)
+        self.opponent[team, gameweek, slot] = rows['opponent_id'].to_numpy()
+        self.is_home[team, gameweek, slot] = rows['is_home'].to_numpy()
+        self.difficulty[team, gameweek, slot] = rows['difficulty'].to_numpy()
+        self.counts = (self.opponent >= 0).sum(axis=2).astype(np.int8)
+
+    @classmethod
+    def from_api(cls, session=None, **kwargs):
+        """Index of the current fixtures/ endpoint"""
+        session = session or requests.Session()
+        return get_fixture_index(session.get(FIXTURES_URL).json(), **kwargs)
+
+    def team_rows(self, team_ids):
+        """Row of each team id (-1 for teams not indexed)"""
+        team_ids = np.asarray(team_ids)
+        rows = np.searchsorted(self.team_ids, team_ids).clip(0, len(self.team_ids) - 1)
+        return np.where(self.team_ids[rows] == team_ids, rows, -1)
+
+    def gameweek(self, gameweek):
+        """
+        Fixtures of one gameweek per team.
+
+        Returns:
+            pd.DataFrame: Indexed by team_id with n_fixtures and opponent_id (first
+                          fixture, NaN in a blank) plus per-slot opponent_ids, is_home
+                          and difficulty lists
+        """
+        if 1 <= gameweek <= self.n_gameweeks:
+            opponent, is_home, difficulty = (array[:, gameweek - 1] for array in (self.opponent, self.is_home, self.difficulty))
+        else:
+            opponent = np.full((len(self.team_ids), self.n_slots), -1)
+            is_home, difficulty = np.zeros(opponent.shape, dtype=np.int8), np.full(opponent.shape, np.nan)
+        counts = (opponent >= 0).sum(axis=1)
+        return pd.DataFrame({
+            'n_fixtures': counts,
+            'opponent_id': np.where(counts > 0, opponent[:, 0], np.nan),
+            'opponent_ids': [row[:n].tolist() for row, n in zip(opponent, counts)],
+            'is_home': [row[:n].tolist() for row, n in zip(is_home, counts)],
+            'difficulty': [row[:n].tolist() for row, n in zip(difficulty, counts)],
+        }, index=pd.Index(self.team_ids, name='team_id'))
+
+    def doubles(self):
+        """Bool (n_teams, n_gameweeks): team plays more than once"""
+        return self.counts >= 2
+
+    def blanks(self):
+        """Bool (n_teams, n_gameweeks): team does not play"""
+        return self.counts == 0
+
+    def gameweek_summary(self, gameweeks=None):
+        """
+        Fixture, single, double and blank counts per gameweek.
+
+        Returns:
+            pd.DataFrame: Indexed by gameweek
+        """
+        gameweeks = np.arange(1, self.n_gameweeks + 1) if gameweeks is None else np.asarray(list(gameweeks))
+        counts = self.counts[:, gameweeks - 1]
+        return pd.DataFrame({
+            'fixtures': counts.sum(axis=0) // 2,
+            'single': (counts == 1).sum(axis=0),
+            'double': (counts >= 2).sum(axis=0),
+            'blank': (counts == 0).sum(axis=0),
+        }, index=pd.Index(gameweeks, name='gameweek'))
+
+    @cached_property
+    def rolling_fdr(self):
+        """RollingFDR over this index's difficulties, built on first use"""
+        return RollingFDR(self.difficulty)
+
+    def mean_difficulty(self, start_gw, end_gw):
+        """
+        Average difficulty of each team's fixtures from start_gw to end_gw
+        (every fixture of a double counts; teams without a fixture are NaN).
+
+        Returns:
+            np.ndarray: (n_teams,)
+        """
+        return self.rolling_fdr.window(start_gw, end_gw - start_gw + 1)
+
+    def fdr_ratings(self, start_gw, weeks):
+        """{team_id: average difficulty rounded to 2 dp} over weeks gameweeks from start_gw, teams with a fixture only"""
+        averages = self.rolling_fdr.window(start_gw, weeks)
+        return {int(team_id): round(float(avg), 2) for team_id, avg in zip(self.team_ids, averages) if not np.isnan(avg)}
+
+
+def fixtures_hash(fixtures):
+    """Hash of the fields the index reads, so unrelated changes (scores, stats) reuse it"""
+    fields = ['id', 'event', 'team_h', 'team_a', 'team_h_difficulty', 'team_a_difficulty', 'kickoff_time']
+    records = pd.DataFrame(fixtures).reindex(columns=fields)
+    return hashlib.sha256(json.dumps(records.astype(object).where(records.notna(), None).values.tolist(),
+                                     default=str).encode('utf-8')).hexdigest()
+
+
+def get_fixture_index(fixtures, **kwargs):
+    """FixtureIndex for a fixtures snapshot, reused while the schedule is unchanged"""
+    key = (fixtures_hash(fixtures), json.dumps(kwargs, sort_keys=True, default=str))
+    if key in _INDEX_CACHE:
+        _INDEX_CACHE.move_to_end(key)
+        return _INDEX_CACHE[key]
+    index = FixtureIndex(fixtures, **kwargs)
+    _INDEX_CACHE[key] = index
+    if len(_INDEX_CACHE) > _INDEX_CACHE_SIZE:
+        _INDEX_CACHE.popitem(last=False)
+    return index
@@ -0,0 +1,178 @@
+# instrumentation.py
+# Per-stage wall time, peak memory and model-size metrics, exported as JSON or a trace-viewer file
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Span:
+    """One timed stage; extra attributes can be attached with set()"""
+
+    def __init__(self, name, parent=None, depth=0):
+        self.name = name
+        self.parent = parent
+        self.depth = depth
+        self.attrs = {}
+        self.start = None
+        self.seconds = None
+        self.peak_bytes = 0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        record = {'name': self.name, 'parent': self.parent, 'start': round(self.start, 6),
+                  'seconds': round(self.seconds, 6)}
+        if self.peak_bytes:
+            record['peak_memory_mb'] = round(self.peak_bytes / 2**20, 3)
+        record.update(self.attrs)
+        return record
+
+
+def model_size(prob):
+    """(variables, constraints) currently in a PuLP problem"""
+    return len(prob.variables()), len(prob.constraints)
+
+
+class MetricsRegistry:
+    """
+    Collects spans for a run.
+
+    Use as:
+        metrics = MetricsRegistry()
+        with metrics.span('add_team_constraints', prob):
+            prob = add_team_constraints(prob, vars, df_players)
+        metrics.to_json('metrics.json')
+
+    Each span records its wall time and, with track_memory, the peak of
+    Python-allocated memory while it ran, counted from when the registry was
+    created (tracemalloc, which slows model building down somewhat). Given a PuLP problem, a span also records how many
+    variables and constraints the stage added. Spans nest; a parent's peak
+    covers its children.
+    """
+
+    def __init__(self, track_memory=True):
+        """
+        Args:
+            track_memory (bool): Record peak memory per span with tracemalloc
+        """
+        self.track_memory = track_memory
+        self.spans = []
+        self.counters = {}
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name, prob=None, **attrs):
+        """
+        Time a stage.
+
+        Args:
+            name: Stage name
+            prob: Optional PuLP problem; the variables and constraints added are recorded
+            **attrs: Extra attributes stored with the span
+        """
+        stack = self._stack()
+        span = Span(name, parent=stack[-1].name if stack else None, depth=len(stack))
+        span.set(**attrs)
+
+        if self.track_memory:
+            # Carry the peak so far into the enclosing span before restarting the count
+            if stack:
+                stack[-1].peak_bytes = max(stack[-1].peak_bytes, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        size_before = model_size(prob) if prob is not None else None
+
+        stack.append(span)
+        span.start = time.perf_counter() - self._origin
+        try:
+            yield span
+        finally:
+            span.seconds = time.perf_counter() - self._origin - span.start
+            stack.pop()
+            if self.track_memory:
+                span.peak_bytes = max(span.peak_bytes, tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1].peak_bytes = max(stack[-1].peak_bytes, span.peak_bytes)
+            if size_before is not None:
+                variables, constraints = model_size(prob)
+                span.set(variables_added=variables - size_before[0], constraints_added=constraints - size_before[1],
+                         variables=variables, constraints=constraints)
+            self.spans.append(span)
+
+    def count(self, name, amount=1):
+        """Increment a named counter"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self):
+        """Spans in start order plus the counters"""
+        return {
+            'spans': [span.to_dict() for span in sorted(self.spans, key=lambda span: span.start)],
+            'counters': dict(self.counters),
+        }
+
+    def to_json(self, path):
+        """Write the summary as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+    def to_chrome_trace(self, path):
+        """
+        Write spans in the Trace Event format (open in chrome://tracing or ui.perfetto.dev).
+        """
+        events = [
+            {
+                'name': span.name, 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                'ts': round(span.start * 1e6, 1), 'dur': round(span.seconds * 1e6, 1),
+                'args': {key: val for key, val in span.to_dict().items() if key not in ('name', 'start', 'seconds')},
+            }
+            for span in self.spans
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+    def print_summary(self):
+        """Table of stages with time, memory and model growth"""
+        print("\n⏱️ STAGE METRICS")
+        print("=" * 90)
+        print(f"{'Stage':<45} {'Seconds':>9} {'Peak MB':>9} {'+Vars':>9} {'+Cons':>9}")
+        print("-" * 90)
+        for span in sorted(self.spans, key=lambda span: span.start):
+            record = span.to_dict()
+            name = ("  " * span.depth + span.name)[:45]
+            peak = f"{record['peak_memory_mb']:.1f}" if 'peak_memory_mb' in record else ""
+            print(f"{name:<45} {record['seconds']:>9.3f} {peak:>9} "
+                  f"{record.get('variables_added', ''):>9} {record.get('constraints_added', ''):>9}")
+        print("=" * 90)
+
+
+class _NullSpan:
+    def set(self, **attrs):
+        pass
+
+
+class NullMetrics:
+    """Drop-in registry that records nothing, used when no metrics are requested"""
+
+    @contextmanager
+    def span(self, name, prob=None, **attrs):
+        yield _NullSpan()
+
+    def count(self, name, amount=1):
+        pass
+
+
+NULL_METRICS = NullMetrics()
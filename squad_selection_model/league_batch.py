@@ -0,0 +1,238 @@
+# league_batch.py
+# Transfer recommendations for many FPL entries at once (mini-leagues, whole leagues)
+
+import contextlib
+import io
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+from pulp import PULP_CBC_CMD, LpStatus, value
+
+from model_builder import apply_team_to_template, build_transfer_template
+from solution_analysis import opposing_pairs_in_squad
+from solution_cache import snapshot_hash
+from squad_creator import extract_decision_variable_results
+from team_class import Team
+
+FPL_API = 'https://fantasy.premierleague.com/api'
+
+# Per-process model template, built once by _init_worker
+_worker = {}
+
+
+def fetch_bootstrap(session=None):
+    """Fetch bootstrap-static once for the whole batch"""
+    session = session or requests.Session()
+    return session.get(f'{FPL_API}/bootstrap-static/').json()
+
+
+def current_gameweek(bootstrap):
+    """Current gameweek (or the next one before the season starts), as in Team"""
+    return next((e['id'] for e in bootstrap['events'] if e['is_current']),
+                next((e['id'] for e in bootstrap['events'] if e['is_next']), 1))
+
+
+def fetch_teams(entry_ids, bootstrap=None, free_transfers=1, n_threads=16):
+    """
+    Fetch picks for many entries concurrently, sharing one bootstrap download.
+
+    Args:
+        entry_ids: FPL entry (team) IDs
+        bootstrap: bootstrap-static JSON (fetched if None)
+        free_transfers: Free transfers assumed for every entry
+        n_threads: Concurrent HTTP requests
+
+    Returns:
+        tuple: (list of Team in entry_ids order, dict entry_id -> error message)
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=n_threads, pool_maxsize=n_threads)
+    session.mount('https://', adapter)
+
+    bootstrap = bootstrap or fetch_bootstrap(session)
+    gameweek = current_gameweek(bootstrap)
+
+    def load(entry_id):
+        resp = session.get(f'{FPL_API}/entry/{entry_id}/event/{gameweek}/picks/')
+        if resp.status_code != 200:
+            raise ValueError(f"Could not fetch team {entry_id}")
+        return Team.from_picks(entry_id, bootstrap, resp.json(), free_transfers=free_transfers)
+
+    teams, failures = {}, {}
+    with ThreadPoolExecutor(max_workers=n_threads) as pool:
+        futures = {pool.submit(load, entry_id): entry_id for entry_id in entry_ids}
+        for future in as_completed(futures):
+            entry_id = futures[future]
+            try:
+                teams[entry_id] = future.result()
+            except (requests.RequestException, ValueError, KeyError) as error:
+                failures[entry_id] = str(error)
+
+    return [teams[entry_id] for entry_id in entry_ids if entry_id in teams], failures
+
+
+def _player(df_players, idx):
+    return {'id': int(df_players.loc[idx, 'id']), 'name': str(df_players.loc[idx, 'name'])}
+
+
+def summarise_solution(team, prob, vars, df_players, status):
+    """
+    Compact, JSON-serialisable summary of one team's solved model.
+
+    Returns:
+        dict: entry_id, status, objective, transfers, hits, captaincy and squad IDs
+    """
+    result = {'entry_id': team.team_id, 'gameweek': team.current_gw, 'status': LpStatus[status]}
+    if LpStatus[status] != 'Optimal':
+        return result
+
+    decision_results = extract_decision_variable_results(vars)
+    picks = lambda *var_types: [idx for var_type in var_types for idx in decision_results.get(var_type, [])]
+
+    starting = picks('stay_starting', 'bench_to_starting', 'in_to_starting_free', 'in_to_starting_paid')
+    bench = picks('stay_bench', 'starting_to_bench', 'in_to_bench_free', 'in_to_bench_paid')
+    xp = df_players['expected_points']
+
+    # Bench order: GK first, then outfield by xP; vice-captain as in select_vice_captain
+    bench = sorted(bench, key=lambda idx: (df_players.loc[idx, 'position'] != 'Goalkeeper', -xp[idx]))
+    captain_idx = decision_results['captain'][0]
+    others = [idx for idx in starting if idx != captain_idx]
+    other_teams = [idx for idx in others if df_players.loc[idx, 'team'] != df_players.loc[captain_idx, 'team']]
+    vice_captain_idx = max(other_teams or others, key=lambda idx: xp[idx])
+
+    result.update({
+        'objective': round(value(prob.objective), 3),
+        'transfers_out': [_player(df_players, idx) for idx in
+                          picks('out_starting_free', 'out_starting_paid', 'out_bench_free', 'out_bench_paid')],
+        'transfers_in': [_player(df_players, idx) for idx in
+                         picks('in_to_starting_free', 'in_to_starting_paid', 'in_to_bench_free', 'in_to_bench_paid')],
+        'hits': len(picks('in_to_starting_paid', 'in_to_bench_paid')),
+        'opposing_pairs': len(opposing_pairs_in_squad(df_players.loc[starting])),
+        'captain': _player(df_players, captain_idx),
+        'vice_captain': _player(df_players, vice_captain_idx),
+        'starting': [int(df_players.loc[idx, 'id']) for idx in starting],
+        'bench': [int(df_players.loc[idx, 'id']) for idx in bench],
+    })
+    return result
+
+
+def _init_worker(df_players, model_kwargs, time_limit):
+    """Build this process's model template once; its objective summary prints are silenced"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        prob, vars = build_transfer_template(df_players, **model_kwargs)
+    _worker.update(prob=prob, vars=vars, df_players=df_players, time_limit=time_limit)
+
+
+def _solve_team(team):
+    """Solve one team on this process's template"""
+    prob, vars, df_players = _worker['prob'], _worker['vars'], _worker['df_players']
+
+    start = time.perf_counter()
+    apply_team_to_template(prob, vars, df_players, team, budget=round(float(team.team_value) + team.budget, 1))
+    status = prob.solve(PULP_CBC_CMD(msg=False, timeLimit=_worker['time_limit']))
+    result = summarise_solution(team, prob, vars, df_players, status)
+    result['solve_seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def solve_teams(teams, df_players, output_path, n_workers=None, time_limit=None, cache=None, **model_kwargs):
+    """
+    Solve many teams on a worker pool, streaming one JSON line per team as it finishes.
+
+    Each worker process builds the gameweek's model template once and then
+    only swaps in the team-specific bounds per team. With a SolutionCache,
+    teams already solved on the same snapshot and parameters are written
+    straight away (with "cached": true) and only the rest are solved.
+
+    Args:
+        teams: Team instances
+        df_players: DataFrame with player data for the gameweek
+        output_path: JSON-lines output file
+        n_workers: Worker processes (default: CPU count)
+        time_limit: Optional CBC time limit per team in seconds
+        cache: Optional SolutionCache
+        **model_kwargs: Passed to build_transfer_template (penalty_points, fdr_calculator, ...)
+
+    Returns:
+        int: Number of teams solved to optimality
+    """
+    n_optimal = 0
+    with open(output_path, 'a', encoding='utf-8') as out:
+        keys = [None] * len(teams)
+        if cache is not None:
+            snapshot = snapshot_hash(df_players)
+            params = dict(model_kwargs, time_limit=time_limit)
+            keys = [cache.key_for(df_players, team, params, snapshot=snapshot) for team in teams]
+
+        to_solve = []
+        for team, key in zip(teams, keys):
+            result = cache.get(key) if key is not None else None
+            if result is None:
+                to_solve.append((team, key))
+                continue
+            result['cached'] = True
+            n_optimal += result['status'] == 'Optimal'
+            out.write(json.dumps(result) + "\n")
+        out.flush()
+
+        if not to_solve:
+            return n_optimal
+
+        with ProcessPoolExecutor(
+            max_workers=n_workers, initializer=_init_worker, initargs=(df_players, model_kwargs, time_limit)
+        ) as pool:
+            futures = {pool.submit(_solve_team, team): key for team, key in to_solve}
+            for future in as_completed(futures):
+                result = future.result()
+                n_optimal += result['status'] == 'Optimal'
+                if futures[future] is not None and result['status'] == 'Optimal':
+                    cache.put(futures[future], result)
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+    return n_optimal
+
+
+def run_league_batch(entry_ids, df_players, output_path, n_workers=None, n_threads=16, free_transfers=1,
+                     time_limit=None, bootstrap=None, cache=None, **model_kwargs):
+    """
+    Fetch and optimise a list of entries, writing results to a JSON-lines file.
+
+    Entries whose picks cannot be fetched get a line with status 'Fetch failed'.
+
+    Returns:
+        dict: Batch summary (entries, solved, failed, seconds, teams_per_minute)
+    """
+    start = time.perf_counter()
+    teams, failures = fetch_teams(entry_ids, bootstrap=bootstrap, free_transfers=free_transfers, n_threads=n_threads)
+    fetch_seconds = time.perf_counter() - start
+
+    with open(output_path, 'w', encoding='utf-8') as out:
+        for entry_id, error in failures.items():
+            out.write(json.dumps({'entry_id': entry_id, 'status': 'Fetch failed', 'error': error}) + "\n")
+
+    n_optimal = solve_teams(teams, df_players, output_path, n_workers=n_workers, time_limit=time_limit,
+                            cache=cache, **model_kwargs)
+    seconds = time.perf_counter() - start
+
+    summary = {
+        'entries': len(entry_ids),
+        'solved': n_optimal,
+        'failed': len(entry_ids) - n_optimal,
+        'fetch_seconds': round(fetch_seconds, 2),
+        'seconds': round(seconds, 2),
+        'teams_per_minute': round(60 * len(teams) / seconds, 1) if seconds > 0 else None,
+    }
+    print(f"✅ {summary['solved']}/{summary['entries']} entries solved in {summary['seconds']}s "
+          f"({summary['teams_per_minute']} teams/min) -> {output_path}")
+    return summary
+
+
+# Example usage
+if __name__ == "__main__":
+    df_players = pd.read_csv('data/fpl_players_gw_5.csv')
+    entry_ids = [2562804]
+
+    run_league_batch(entry_ids, df_players, 'league_recommendations.jsonl', base_opposing_penalty=0.5)
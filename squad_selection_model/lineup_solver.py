@@ -0,0 +1,308 @@
+# lineup_solver.py
+# Exact starting XI and captain selection for fixed 15-man squads, batched over many squads
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from simulation import position_codes
+from opposing_teams import get_position_penalty_array
+from squad_creator import create_output_dataframes
+
+# Canonical squad layout: 2 GK, 5 DEF, 5 MID, 3 FWD (slot -> position code)
+SQUAD_POSITIONS = np.array([0] * 2 + [1] * 5 + [2] * 5 + [3] * 3)
+POSITION_SLOTS = {code: np.flatnonzero(SQUAD_POSITIONS == code) for code in range(4)}
+
+# Valid formations (DEF, MID, FWD), matching add_positional_constraints
+FORMATIONS = [(d, m, f) for d in range(3, 6) for m in range(2, 6) for f in range(1, 4) if d + m + f == 10]
+
+# Slot pairs (i < j) used for pairwise opposing penalties
+PAIR_I, PAIR_J = np.triu_indices(15, 1)
+
+
+def _enumerate_lineups():
+    """Every valid starting XI of the canonical squad as a (n_lineups, 15) bool array"""
+    masks = []
+    for gk in POSITION_SLOTS[0]:
+        for d, m, f in FORMATIONS:
+            for defenders in itertools.combinations(POSITION_SLOTS[1], d):
+                for midfielders in itertools.combinations(POSITION_SLOTS[2], m):
+                    for forwards in itertools.combinations(POSITION_SLOTS[3], f):
+                        mask = np.zeros(15, dtype=bool)
+                        mask[[gk, *defenders, *midfielders, *forwards]] = True
+                        masks.append(mask)
+    return np.array(masks)
+
+
+LINEUP_MASKS = _enumerate_lineups()
+LINEUP_PAIR_MASKS = (LINEUP_MASKS[:, PAIR_I] & LINEUP_MASKS[:, PAIR_J]).astype(float)
+
+
+def squad_layout(df_players, labels):
+    """
+    Order 15 df_players index labels into the canonical squad layout.
+
+    Args:
+        df_players: DataFrame with player data
+        labels: Index labels of the 15 squad players
+
+    Returns:
+        list: Labels sorted GK, DEF, MID, FWD (stable within each position)
+    """
+    labels = list(labels)
+    codes = position_codes(df_players.loc[labels])
+    if not np.array_equal(np.sort(codes), SQUAD_POSITIONS):
+        raise ValueError("Squad must contain 2 GK, 5 DEF, 5 MID and 3 FWD")
+    return [labels[i] for i in np.argsort(codes, kind='stable')]
+
+
+def lineup_scores(xp):
+    """
+    Best starting XI plus captain points for many squads (no opposing penalty).
+
+    With 1 GK and at least 3 DEF, 2 MID and 1 FWD required, the best XI always
+    contains the top GK, top 3 DEF, top 2 MID and top FWD; the remaining four
+    places go to the best of the other seven outfielders, and the upper limits
+    (5 DEF, 5 MID, 3 FWD) can never bind. The captain is the highest-xP starter,
+    which is always one of the position leaders.
+
+    Args:
+        xp: Array (n_squads, 15) of expected points in canonical layout
+
+    Returns:
+        np.ndarray: Lineup points including the captain bonus (n_squads,)
+    """
+    xp = np.asarray(xp)
+    gk = xp[:, 0:2].max(axis=1)
+    defenders = -np.sort(-xp[:, 2:7], axis=1)
+    midfielders = -np.sort(-xp[:, 7:12], axis=1)
+    forwards = -np.sort(-xp[:, 12:15], axis=1)
+
+    mandatory = gk + defenders[:, :3].sum(axis=1) + midfielders[:, :2].sum(axis=1) + forwards[:, 0]
+    flex = np.concatenate([defenders[:, 3:], midfielders[:, 2:], forwards[:, 1:]], axis=1)
+    best_flex = -np.partition(-flex, 3, axis=1)[:, :4]
+
+    captain_bonus = np.maximum.reduce([gk, defenders[:, 0], midfielders[:, 0], forwards[:, 0]])
+    return mandatory + best_flex.sum(axis=1) + captain_bonus
+
+
+def select_lineups(xp):
+    """
+    Starting XI mask and captain slot for many squads (no opposing penalty).
+
+    Args:
+        xp: Array (n_squads, 15) of expected points in canonical layout
+
+    Returns:
+        tuple: (starting mask (n_squads, 15) bool, captain slot (n_squads,))
+    """
+    xp = np.asarray(xp)
+    n_squads = len(xp)
+    rows = np.arange(n_squads)[:, None]
+
+    # Slots of each position sorted by xP (descending)
+    ranked = {
+        code: slots[np.argsort(-xp[:, slots], axis=1, kind='stable')]
+        for code, slots in POSITION_SLOTS.items()
+    }
+    mandatory = np.hstack([ranked[0][:, :1], ranked[1][:, :3], ranked[2][:, :2], ranked[3][:, :1]])
+    flex = np.hstack([ranked[1][:, 3:], ranked[2][:, 2:], ranked[3][:, 1:]])
+    best_flex = np.take_along_axis(flex, np.argsort(-xp[rows, flex], axis=1, kind='stable')[:, :4], axis=1)
+
+    starting = np.zeros(xp.shape, dtype=bool)
+    starting[rows, mandatory] = True
+    starting[rows, best_flex] = True
+
+    captain = np.argmax(np.where(starting, xp, -np.inf), axis=1)
+    return starting, captain
+
+
+def squad_pair_penalties(df_players, squads, base_opposing_penalty=1.0, penalty_matrix=None):
+    """
+    Opposing-teams penalty for every slot pair of many squads.
+
+    Same rules as add_opposing_teams_penalty_to_objective: both players must
+    face each other's team, the fixture must exist, GK vs GK is skipped, and
+    the position-weighted multiplier scales base_opposing_penalty.
+
+    Args:
+        df_players: DataFrame with player data
+        squads: Integer player positions (n_squads, 15) in canonical layout
+        base_opposing_penalty: Base penalty value
+        penalty_matrix: Optional position penalty matrix
+
+    Returns:
+        np.ndarray: Penalty per slot pair (n_squads, 105), ordered as PAIR_I/PAIR_J
+    """
+    squads = np.asarray(squads)
+    team = df_players['team_id'].to_numpy()[squads]
+    opponent = pd.to_numeric(df_players['opponent_id'], errors='coerce').to_numpy(dtype=float)[squads]
+    has_fixture = ~np.isnan(opponent)
+    if 'opponent' in df_players.columns:
+        has_fixture &= (df_players['opponent'].to_numpy() != 'No fixture')[squads]
+    positions = position_codes(df_players)[squads]
+
+    opposing = (
+        (opponent[:, PAIR_I] == team[:, PAIR_J])
+        & (opponent[:, PAIR_J] == team[:, PAIR_I])
+        & has_fixture[:, PAIR_I]
+    )
+    multipliers = get_position_penalty_array(penalty_matrix)[positions[:, PAIR_I], positions[:, PAIR_J]]
+    return base_opposing_penalty * multipliers * opposing
+
+
+def solve_lineups(xp, pair_penalty=None, team_codes=None, captain_multiplier=2):
+    """
+    Exact starting XI, captain and vice-captain for many fixed squads.
+
+    Every valid XI (550 per squad) is scored at once: XI points are a matrix
+    product with LINEUP_MASKS and the opposing penalty a matrix product with
+    LINEUP_PAIR_MASKS. The captain of each XI is its highest-xP player, found
+    by walking the squad's xP ranking until every XI has one.
+
+    The vice-captain follows select_vice_captain: the highest-xP other starter
+    from a different team than the captain, else the highest-xP other starter.
+
+    Args:
+        xp: Array (n_squads, 15) of expected points in canonical layout
+        pair_penalty: Optional array (n_squads, 105) from squad_pair_penalties
+        team_codes: Optional array (n_squads, 15) of team ids for the vice-captain rule
+        captain_multiplier: Captain points multiplier (3 for triple captain)
+
+    Returns:
+        tuple: (starting (n_squads, 15) bool, captain slot, vice-captain slot, points)
+               where points include the captain bonus and the opposing penalty
+    """
+    xp = np.asarray(xp, dtype=float)
+    n_squads = len(xp)
+    rows = np.arange(n_squads)
+
+    scores = xp @ LINEUP_MASKS.T
+    if pair_penalty is not None:
+        scores -= np.asarray(pair_penalty) @ LINEUP_PAIR_MASKS.T
+
+    # Captain of each XI: first slot in the squad's xP ranking that the XI contains
+    ranking = np.argsort(-xp, axis=1, kind='stable')
+    captain_slots = np.full(scores.shape, -1)
+    for rank in range(15):
+        slot = ranking[:, rank]
+        take = LINEUP_MASKS.T[slot] & (captain_slots < 0)
+        captain_slots = np.where(take, slot[:, None], captain_slots)
+        if (captain_slots >= 0).all():
+            break
+    scores += (captain_multiplier - 1) * np.take_along_axis(xp, captain_slots, axis=1)
+
+    best = scores.argmax(axis=1)
+    starting = LINEUP_MASKS[best]
+    captain = captain_slots[rows, best]
+
+    # Vice-captain: prefer a different team from the captain
+    other_team = np.ones(xp.shape, dtype=bool) if team_codes is None else \
+        np.asarray(team_codes) != np.asarray(team_codes)[rows, captain][:, None]
+    eligible = starting.copy()
+    eligible[rows, captain] = False
+    preference = np.where(eligible, xp + np.where(other_team, 1e6, 0.0), -np.inf)
+    vice_captain = preference.argmax(axis=1)
+
+    return starting, captain, vice_captain, scores[rows, best]
+
+
+def solve_lineup(df_players, labels, base_opposing_penalty=0.5, penalty_matrix=None):
+    """
+    Best XI, captain and vice-captain for one fixed 15-man squad.
+
+    Args:
+        df_players: DataFrame with player data
+        labels: df_players index labels of the 15 squad players
+        base_opposing_penalty: Base penalty for opposing teams (0 disables)
+        penalty_matrix: Optional position penalty matrix
+
+    Returns:
+        dict: starting and bench labels (bench GK first, then outfield by xP),
+              captain_idx, vice_captain_idx and points
+    """
+    layout = squad_layout(df_players, labels)
+    squad = df_players.index.get_indexer(layout)[None, :]
+    xp = pd.to_numeric(df_players['expected_points'], errors='coerce').fillna(0).to_numpy(dtype=float)[squad]
+    pair_penalty = None
+    if base_opposing_penalty > 0:
+        pair_penalty = squad_pair_penalties(df_players, squad, base_opposing_penalty, penalty_matrix)
+    team_codes = df_players['team_id'].to_numpy()[squad]
+
+    starting, captain, vice_captain, points = solve_lineups(xp, pair_penalty, team_codes)
+
+    bench_slots = np.flatnonzero(~starting[0])
+    bench_slots = sorted(bench_slots, key=lambda slot: (SQUAD_POSITIONS[slot] != 0, -xp[0, slot]))
+    return {
+        'starting': [layout[slot] for slot in np.flatnonzero(starting[0])],
+        'bench': [layout[slot] for slot in bench_slots],
+        'captain_idx': layout[captain[0]],
+        'vice_captain_idx': layout[vice_captain[0]],
+        'points': float(points[0]),
+    }
+
+
+def lineup_squad(df_players, my_team, base_opposing_penalty=0.5, penalty_matrix=None):
+    """
+    Re-pick the XI of the current team without running the transfer MILP.
+
+    Returns the same squad dictionary as process_optimization_results, with
+    stay/swap decisions derived from the team's previous XI.
+
+    Args:
+        df_players: DataFrame with player data
+        my_team: Team instance
+        base_opposing_penalty: Base penalty for opposing teams
+        penalty_matrix: Optional position penalty matrix
+
+    Returns:
+        dict: Squad dictionary (starting_df, bench_df, out_df, captain_idx, ...)
+    """
+    labels = df_players.index[df_players['id'].isin(my_team.all_ids)]
+    lineup = solve_lineup(df_players, labels, base_opposing_penalty, penalty_matrix)
+
+    was_starting = df_players['id'].isin(my_team.starting_ids)
+    decision_results = {
+        'stay_starting': [idx for idx in lineup['starting'] if was_starting[idx]],
+        'bench_to_starting': [idx for idx in lineup['starting'] if not was_starting[idx]],
+        'stay_bench': [idx for idx in lineup['bench'] if not was_starting[idx]],
+        'starting_to_bench': [idx for idx in lineup['bench'] if was_starting[idx]],
+        'captain': [lineup['captain_idx']],
+    }
+
+    (starting_df, bench_df, out_df, captain_idx, vice_captain_idx,
+     formation, gameweek, _, total_cost) = create_output_dataframes(decision_results, df_players, None)
+
+    # Bench in the solver's order (GK first, then outfield by xP)
+    bench_df = bench_df.loc[lineup['bench']]
+    bench_df['bench_order'] = range(1, len(bench_df) + 1)
+    starting_df['is_vice_captain'] = starting_df.index == lineup['vice_captain_idx']
+
+    return {
+        'starting_df': starting_df,
+        'bench_df': bench_df,
+        'out_df': out_df,
+        'captain_idx': captain_idx,
+        'vice_captain_idx': lineup['vice_captain_idx'],
+        'formation': formation,
+        'gameweek': gameweek,
+        'optimization_status': 'Optimal',
+        'total_cost': total_cost,
+        'objective_value': lineup['points'],
+        'decision_results': decision_results,
+    }
+
+
+# Example usage
+if __name__ == "__main__":
+    from team_class import Team
+
+    my_team = Team(team_id=2562804, budget=0, free_transfers=1)
+    df_players = pd.read_csv('data/fpl_players_gw_5.csv')
+
+    squad = lineup_squad(df_players, my_team, base_opposing_penalty=0.5)
+    print(f"Formation: {squad['formation']['string']} | Expected points: {squad['objective_value']:.2f}")
+    for _, player in squad['starting_df'].iterrows():
+        role = " (C)" if player['is_captain'] else " (VC)" if player['is_vice_captain'] else ""
+        print(f"  {player['name']}{role} - {player['expected_points']:.1f}")
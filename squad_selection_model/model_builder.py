@@ -0,0 +1,158 @@
+# model_builder.py
+# Build the transfer MILP (variables, objective and constraints), per team or as a re-usable template
+
+import pandas as pd
+from pulp import LpProblem, LpMaximize, lpSum
+from decision_variables import create_decision_variables
+from objective_function import add_objective_function
+from instrumentation import NULL_METRICS
+from constraints import (
+    add_squad_size_constraints, add_captain_constraints, add_equal_flow_constraints,
+    add_status_constraints, add_positional_constraints, add_free_transfer_limit_constraint,
+    add_availability_constraints, add_budget_constraint, add_team_constraints
+)
+
+# Decision variables that put a player in the final 15
+SQUAD_VARIABLE_TYPES = [
+    'stay_starting', 'stay_bench', 'starting_to_bench', 'bench_to_starting',
+    'in_to_starting_free', 'in_to_starting_paid', 'in_to_bench_free', 'in_to_bench_paid'
+]
+
+
+def build_transfer_model(df_players, my_team, penalty_points=4, base_opposing_penalty=0.5,
+                         fdr_calculator=None, fdr_penalty_weight=1.0, position_penalty_matrix=None,
+                         risk_model=None, budget=105, name="FPL_Transfer_Optimisation", metrics=None):
+    """
+    Create the transfer optimisation problem used by optimiser.py.
+
+    Args:
+        df_players: DataFrame with player data
+        my_team: Team instance
+        penalty_points: Points penalty for paid transfers
+        base_opposing_penalty: Base penalty for opposing teams
+        fdr_calculator: FDR calculator instance (optional)
+        fdr_penalty_weight: Weight for FDR penalties
+        position_penalty_matrix: Optional opposing-position penalty matrix
+        risk_model: ScenarioRiskModel instance for the risk-aware mode (optional)
+        budget: Most the final squad may cost (£m)
+        name: Problem name
+        metrics: Optional MetricsRegistry; every step is recorded as a span
+
+    Returns:
+        tuple: (prob, vars) ready to solve
+    """
+    metrics = metrics or NULL_METRICS
+    prob = LpProblem(name, LpMaximize)
+    with metrics.span('create_decision_variables') as span:
+        vars = create_decision_variables(df_players)
+        span.set(variables_created=sum(len(player_vars) for player_vars in vars.values()))
+
+    with metrics.span('add_objective_function', prob):
+        prob = add_objective_function(
+            prob, df_players, vars,
+            penalty_points=penalty_points,
+            base_opposing_penalty=base_opposing_penalty,
+            fdr_calculator=fdr_calculator,
+            fdr_penalty_weight=fdr_penalty_weight,
+            position_penalty_matrix=position_penalty_matrix,
+            risk_model=risk_model,
+            metrics=metrics
+        )
+
+    constraint_steps = [
+        (add_squad_size_constraints, (prob, vars, df_players)),
+        (add_captain_constraints, (prob, vars, df_players)),
+        (add_equal_flow_constraints, (prob, vars, df_players)),
+        (add_status_constraints, (prob, vars, df_players, my_team)),
+        (add_positional_constraints, (prob, vars, df_players)),
+        (add_free_transfer_limit_constraint, (prob, vars, df_players, my_team)),
+        (add_availability_constraints, (prob, vars, df_players, my_team)),
+        (add_budget_constraint, (prob, vars, df_players, my_team.current_team, 0, budget)),
+        (add_team_constraints, (prob, vars, df_players)),
+    ]
+    for add_constraints, args in constraint_steps:
+        with metrics.span(add_constraints.__name__, prob):
+            prob = add_constraints(*args)
+
+    return prob, vars
+
+
+# Variables a player may only use if they were in that part of the squad last gameweek
+BENCH_ONLY_VARIABLE_TYPES = ['stay_bench', 'bench_to_starting', 'out_bench_free', 'out_bench_paid']
+STARTING_ONLY_VARIABLE_TYPES = ['stay_starting', 'starting_to_bench', 'out_starting_free', 'out_starting_paid']
+TRANSFER_IN_VARIABLE_TYPES = ['in_to_starting_free', 'in_to_starting_paid', 'in_to_bench_free', 'in_to_bench_paid']
+
+
+def build_transfer_template(df_players, penalty_points=4, base_opposing_penalty=0.5, fdr_calculator=None,
+                            fdr_penalty_weight=1.0, position_penalty_matrix=None,
+                            name="FPL_Transfer_Optimisation"):
+    """
+    Build the team-independent part of the transfer model for one gameweek.
+
+    The objective and every constraint that only depends on df_players are
+    added once. Team-specific rules are applied per team by apply_team_to_template.
+
+    Returns:
+        tuple: (prob, vars)
+    """
+    prob = LpProblem(name, LpMaximize)
+    vars = create_decision_variables(df_players)
+
+    prob = add_objective_function(
+        prob, df_players, vars,
+        penalty_points=penalty_points,
+        base_opposing_penalty=base_opposing_penalty,
+        fdr_calculator=fdr_calculator,
+        fdr_penalty_weight=fdr_penalty_weight,
+        position_penalty_matrix=position_penalty_matrix
+    )
+
+    prob = add_squad_size_constraints(prob, vars, df_players)
+    prob = add_captain_constraints(prob, vars, df_players)
+    prob = add_equal_flow_constraints(prob, vars, df_players)
+    prob = add_positional_constraints(prob, vars, df_players)
+    prob = add_budget_constraint(prob, vars, df_players, pd.DataFrame({'player_id': []}))
+    prob = add_team_constraints(prob, vars, df_players)
+
+    # Free transfer limit with a placeholder right-hand side, set per team
+    prob += lpSum(
+        vars['in_to_starting_free'][idx] + vars['in_to_bench_free'][idx] for idx in df_players.index
+    ) <= 1, "Max_Free_Transfers"
+
+    return prob, vars
+
+
+def apply_team_to_template(prob, vars, df_players, my_team, budget=105):
+    """
+    Apply one team's status, availability, free-transfer and budget rules to a template.
+
+    Instead of adding equality constraints, variables a team may not use get
+    an upper bound of 0, which is equivalent to add_status_constraints and
+    add_availability_constraints and is undone by resetting the bounds.
+    Every bound is reset first, so a template can be re-used for many teams.
+
+    budget: Most the final squad may cost (£m), as in build_transfer_model
+    """
+    for player_vars in vars.values():
+        for var in player_vars.values():
+            var.upBound = 1
+
+    for idx, player_id, status in zip(df_players.index, df_players['id'], df_players['status']):
+        if not my_team.is_on_bench(player_id):
+            for var_type in BENCH_ONLY_VARIABLE_TYPES:
+                vars[var_type][idx].upBound = 0
+        if not my_team.is_in_starting(player_id):
+            for var_type in STARTING_ONLY_VARIABLE_TYPES:
+                vars[var_type][idx].upBound = 0
+        if status != 'a' and not my_team.is_in_team(player_id):
+            for var_type in TRANSFER_IN_VARIABLE_TYPES:
+                vars[var_type][idx].upBound = 0
+
+    prob.constraints['Max_Free_Transfers'].constant = -min(my_team.free_transfers, 5)
+    prob.constraints['Budget_Constraint'].constant = -budget
+    return prob
+
+
+def squad_membership(vars, idx):
+    """Linear expression equal to 1 when player idx is in the final squad"""
+    return lpSum(vars[var_type][idx] for var_type in SQUAD_VARIABLE_TYPES)
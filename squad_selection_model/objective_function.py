@@ -4,10 +4,14 @@
 from pulp import lpSum, LpVariable
 from opposing_teams import add_opposing_teams_penalty_to_objective
 from fdr import add_fdr_penalty_to_objective
+from risk_objective import add_risk_terms_to_objective
+from instrumentation import NULL_METRICS
 
-def add_objective_function(prob, df_players, vars, penalty_points, base_opposing_penalty=1.0, fdr_calculator=None, fdr_penalty_weight=0.5):
+def add_objective_function(prob, df_players, vars, penalty_points, base_opposing_penalty=1.0, fdr_calculator=None, fdr_penalty_weight=0.5,
+                           position_penalty_matrix=None, risk_model=None, metrics=None):
     """
     Objective: maximize expected points with transfer penalties, captain bonus, position-weighted opposing teams penalty, and FDR-based penalties.
+    With a risk_model, a scenario-based risk term (CVaR or probability of beating a target) is added as well.
 
     Args:
         prob: PuLP problem instance
@@ -17,50 +21,68 @@ def add_objective_function(prob, df_players, vars, penalty_points, base_opposing
         base_opposing_penalty: Base penalty for opposing teams
         fdr_calculator: FDR calculator instance (optional)
         fdr_penalty_weight: Weight for FDR penalties (default: 0.5)
+        position_penalty_matrix: Optional opposing-position penalty matrix (default: hand-tuned matrix)
+        risk_model: ScenarioRiskModel instance for the risk-aware mode (optional)
+        metrics: Optional MetricsRegistry; each objective term is recorded as a span
     """
-    # Regular points from players who are starting (stay, swap from bench, free transfer in)
-    regular_points = lpSum([
-        df_players.loc[idx, 'expected_points'] * (
-            vars['stay_starting'].get(idx, 0) +
-            vars['bench_to_starting'].get(idx, 0) +
-            vars['in_to_starting_free'].get(idx, 0)
-        )
-        for idx in df_players.index
-    ])
+    metrics = metrics or NULL_METRICS
+
+    with metrics.span('objective_points_terms'):
+        # Regular points from players who are starting (stay, swap from bench, free transfer in)
+        regular_points = lpSum([
+            df_players.loc[idx, 'expected_points'] * (
+                vars['stay_starting'].get(idx, 0) +
+                vars['bench_to_starting'].get(idx, 0) +
+                vars['in_to_starting_free'].get(idx, 0)
+            )
+            for idx in df_players.index
+        ])
 
-    # Paid transfers into starting XI (expected points minus 4 hit)
-    paid_transfer_points = lpSum([
-        (df_players.loc[idx, 'expected_points'] - penalty_points) * vars['in_to_starting_paid'].get(idx, 0)
-        for idx in df_players.index
-    ])
+        # Paid transfers into starting XI (expected points minus 4 hit)
+        paid_transfer_points = lpSum([
+            (df_players.loc[idx, 'expected_points'] - penalty_points) * vars['in_to_starting_paid'].get(idx, 0)
+            for idx in df_players.index
+        ])
 
-    # Captain bonus (adds expected points again for the captain, i.e. double)
-    captain_bonus = lpSum([
-        df_players.loc[idx, 'expected_points'] * vars['captain'].get(idx, 0)
-        for idx in df_players.index
-    ])
+        # Captain bonus (adds expected points again for the captain, i.e. double)
+        captain_bonus = lpSum([
+            df_players.loc[idx, 'expected_points'] * vars['captain'].get(idx, 0)
+            for idx in df_players.index
+        ])
 
-    # Penalty for paid transfers into the bench (-penalty_points)
-    bench_transfer_penalty = lpSum([
-        penalty_points * vars['in_to_bench_paid'].get(idx, 0)
-        for idx in df_players.index
-    ])
+        # Penalty for paid transfers into the bench (-penalty_points)
+        bench_transfer_penalty = lpSum([
+            penalty_points * vars['in_to_bench_paid'].get(idx, 0)
+            for idx in df_players.index
+        ])
 
     # Position-weighted opposing teams penalty (using consolidated module)
-    opposing_penalty_terms = add_opposing_teams_penalty_to_objective(
-        prob, df_players, vars, base_opposing_penalty
-    )
+    with metrics.span('objective_opposing_pairs', prob) as span:
+        opposing_penalty_terms = add_opposing_teams_penalty_to_objective(
+            prob, df_players, vars, base_opposing_penalty, position_penalty_matrix
+        )
+        span.set(pairs=len(opposing_penalty_terms))
 
     # FDR-based penalties/bonuses
     fdr_penalty_terms = []
     if fdr_calculator is not None:
-        fdr_penalty_terms = add_fdr_penalty_to_objective(
-            prob, df_players, vars, fdr_calculator, fdr_penalty_weight
-        )
+        with metrics.span('objective_fdr_terms', prob):
+            fdr_penalty_terms = add_fdr_penalty_to_objective(
+                prob, df_players, vars, fdr_calculator, fdr_penalty_weight
+            )
+
+    # Scenario-based risk terms (CVaR or target probability)
+    risk_terms = []
+    if risk_model is not None:
+        with metrics.span('objective_risk_terms', prob):
+            risk_terms = add_risk_terms_to_objective(
+                prob, df_players, vars, risk_model, penalty_points
+            )
 
     # Combine all components
     opposing_penalty = lpSum(opposing_penalty_terms) if opposing_penalty_terms else 0
     fdr_bonus = lpSum(fdr_penalty_terms) if fdr_penalty_terms else 0
+    risk_bonus = lpSum(risk_terms) if risk_terms else 0
     
     prob += (
         regular_points
@@ -69,6 +91,7 @@ def add_objective_function(prob, df_players, vars, penalty_points, base_opposing
         - bench_transfer_penalty
         - opposing_penalty
         + fdr_bonus
+        + risk_bonus
     ), "Total_Expected_Points_With_All_Penalties"
 
     return prob
@@ -1,6 +1,8 @@
 # opposing_teams.py
 # Consolidated opposing teams penalty system for FPL optimization
 
+import numpy as np
+import pandas as pd
 from pulp import lpSum, LpVariable
 
 # ============================================================================
@@ -27,13 +29,15 @@ def get_position_penalty_matrix():
         ('Forward', 'Forward'): 0.5,          # Low penalty - both attacking, minimal conflict
     }
 
-def get_penalty_for_positions(pos_i, pos_j):
+def get_penalty_for_positions(pos_i, pos_j, matrix=None):
     """
     Get penalty multiplier for a specific position combination.
     
     Args:
         pos_i: Position of first player
         pos_j: Position of second player
+        matrix: Optional penalty matrix overriding get_position_penalty_matrix()
+                (e.g. from simulation.estimate_position_penalty_matrix)
         
     Returns:
         float: Penalty multiplier, or None if combination should be skipped
@@ -46,14 +50,73 @@ def get_penalty_for_positions(pos_i, pos_j):
         return None
     
     # Get penalty from matrix
-    matrix = get_position_penalty_matrix()
+    if matrix is None:
+        matrix = get_position_penalty_matrix()
     return matrix.get(pos_pair, 1.0)  # Default to 1.0 if not found
 
+def get_position_penalty_array(matrix=None, positions=('Goalkeeper', 'Defender', 'Midfielder', 'Forward')):
+    """
+    Position penalty multipliers as a dense symmetric array for vectorised lookups.
+    
+    Args:
+        matrix: Optional penalty matrix overriding get_position_penalty_matrix()
+        positions: Position names in array order
+        
+    Returns:
+        np.ndarray: (len(positions), len(positions)) multipliers, 0 for skipped combinations (GK vs GK)
+    """
+    array = np.zeros((len(positions), len(positions)))
+    for i, pos_i in enumerate(positions):
+        for j, pos_j in enumerate(positions):
+            multiplier = get_penalty_for_positions(pos_i, pos_j, matrix)
+            array[i, j] = 0.0 if multiplier is None else multiplier
+    return array
+
+def find_opposing_pairs(df_players):
+    """
+    Find every pair of players whose teams face each other, without looping.
+    
+    Uses the same rules as the optimisation: both players must list the other's
+    team as opponent, the fixture must exist, and GK vs GK pairs are skipped.
+    
+    Args:
+        df_players: DataFrame with player data including opponent information
+        
+    Returns:
+        pd.DataFrame: One row per pair with index labels (idx_i, idx_j), integer
+                      positions (pos_i, pos_j) and the sorted position combination
+                      (position_a, position_b)
+    """
+    players = pd.DataFrame({
+        'idx': df_players.index,
+        'pos': range(len(df_players)),
+        'team_id': df_players['team_id'].to_numpy(),
+        'opponent_id': pd.to_numeric(df_players['opponent_id'], errors='coerce').to_numpy(),
+        'position': df_players['position'].to_numpy(),
+    })
+    if 'opponent' in df_players.columns:
+        players = players[df_players['opponent'].to_numpy() != 'No fixture']
+    players = players.dropna(subset=['opponent_id'])
+
+    pairs = players.merge(
+        players, left_on=['opponent_id', 'team_id'], right_on=['team_id', 'opponent_id'], suffixes=('_i', '_j')
+    )
+    pairs = pairs[pairs['pos_i'] < pairs['pos_j']]
+
+    swap = pairs['position_i'] > pairs['position_j']
+    pairs = pairs.assign(
+        position_a=pairs['position_i'].where(~swap, pairs['position_j']),
+        position_b=pairs['position_j'].where(~swap, pairs['position_i']),
+    )
+    pairs = pairs[~((pairs['position_a'] == 'Goalkeeper') & (pairs['position_b'] == 'Goalkeeper'))]
+
+    return pairs[['idx_i', 'idx_j', 'pos_i', 'pos_j', 'position_a', 'position_b']].reset_index(drop=True)
+
 # ============================================================================
 # OBJECTIVE FUNCTION INTEGRATION
 # ============================================================================
 
-def add_opposing_teams_penalty_to_objective(prob, df_players, vars, base_opposing_penalty=1.0):
+def add_opposing_teams_penalty_to_objective(prob, df_players, vars, base_opposing_penalty=1.0, penalty_matrix=None):
     """
     Add position-weighted opposing teams penalty to the objective function.
     
@@ -64,6 +127,7 @@ def add_opposing_teams_penalty_to_objective(prob, df_players, vars, base_opposin
         df_players: DataFrame with player data including opponent information
         vars: Decision variables dictionary
         base_opposing_penalty: Base penalty value (multiplied by position weights)
+        penalty_matrix: Optional position penalty matrix (default: get_position_penalty_matrix())
         
     Returns:
         list: Penalty terms to subtract from objective function
@@ -75,71 +139,53 @@ def add_opposing_teams_penalty_to_objective(prob, df_players, vars, base_opposin
     
     print(f"Adding position-weighted opposing teams penalty (base: {base_opposing_penalty} pts)")
     
-    player_indices = df_players.index.tolist()
-    pair_count = 0
+    # Every opposing pair at once (same rules as the pairwise check: both teams face
+    # each other, the fixture exists, GK vs GK skipped), named by label order i < j
+    pairs = find_opposing_pairs(df_players)
+    multipliers = {}
     penalty_breakdown = {}  # Track penalties by position combination
     
-    for i in player_indices:
-        for j in player_indices:
-            if i >= j:  # Avoid duplicate pairs
-                continue
-                
-            player_i = df_players.loc[i]
-            player_j = df_players.loc[j]
-            
-            # Check if these players are from opposing teams
-            if (player_i.get('opponent_id') == player_j.get('team_id') and 
-                player_j.get('opponent_id') == player_i.get('team_id') and
-                player_i.get('opponent') != 'No fixture'):
-                
-                # Get positions
-                pos_i = player_i['position']
-                pos_j = player_j['position']
-                
-                # Get penalty multiplier using centralized function
-                penalty_multiplier = get_penalty_for_positions(pos_i, pos_j)
-                
-                # Skip if this combination should be ignored (e.g., GK vs GK)
-                if penalty_multiplier is None:
-                    continue
-                
-                actual_penalty = base_opposing_penalty * penalty_multiplier
-                
-                # Track penalty breakdown
-                pos_pair = tuple(sorted([pos_i, pos_j]))
-                if pos_pair not in penalty_breakdown:
-                    penalty_breakdown[pos_pair] = {'count': 0, 'total_penalty': 0}
-                penalty_breakdown[pos_pair]['count'] += 1
-                penalty_breakdown[pos_pair]['total_penalty'] += actual_penalty
-                
-                # Create binary indicator variable for this opposing pair
-                pair_indicator = LpVariable(f"opposing_pair_{i}_{j}", cat='Binary')
-                
-                # Calculate when each player is in starting XI
-                player_i_starting = (
-                    vars['stay_starting'].get(i, 0) +
-                    vars['bench_to_starting'].get(i, 0) +
-                    vars['in_to_starting_free'].get(i, 0) +
-                    vars['in_to_starting_paid'].get(i, 0)
-                )
-                
-                player_j_starting = (
-                    vars['stay_starting'].get(j, 0) +
-                    vars['bench_to_starting'].get(j, 0) +
-                    vars['in_to_starting_free'].get(j, 0) +
-                    vars['in_to_starting_paid'].get(j, 0)
-                )
-                
-                # Add constraints to link indicator to player selections
-                prob += pair_indicator <= player_i_starting, f"pair_constraint_i_{i}_{j}"
-                prob += pair_indicator <= player_j_starting, f"pair_constraint_j_{i}_{j}"
-                prob += pair_indicator >= player_i_starting + player_j_starting - 1, f"pair_constraint_both_{i}_{j}"
-                
-                # Add position-weighted penalty term
-                opposing_penalty_terms.append(actual_penalty * pair_indicator)
-                pair_count += 1
-    
-    print(f"  Found {pair_count} potential opposing pairs")
+    for idx_i, idx_j, pos_a, pos_b in zip(pairs['idx_i'], pairs['idx_j'], pairs['position_a'], pairs['position_b']):
+        i, j = (idx_i, idx_j) if idx_i < idx_j else (idx_j, idx_i)
+        
+        pos_pair = (pos_a, pos_b)
+        if pos_pair not in multipliers:
+            multipliers[pos_pair] = get_penalty_for_positions(pos_a, pos_b, penalty_matrix)
+        actual_penalty = base_opposing_penalty * multipliers[pos_pair]
+        
+        # Track penalty breakdown
+        if pos_pair not in penalty_breakdown:
+            penalty_breakdown[pos_pair] = {'count': 0, 'total_penalty': 0}
+        penalty_breakdown[pos_pair]['count'] += 1
+        penalty_breakdown[pos_pair]['total_penalty'] += actual_penalty
+        
+        # Create binary indicator variable for this opposing pair
+        pair_indicator = LpVariable(f"opposing_pair_{i}_{j}", cat='Binary')
+        
+        # Calculate when each player is in starting XI
+        player_i_starting = (
+            vars['stay_starting'].get(i, 0) +
+            vars['bench_to_starting'].get(i, 0) +
+            vars['in_to_starting_free'].get(i, 0) +
+            vars['in_to_starting_paid'].get(i, 0)
+        )
+        
+        player_j_starting = (
+            vars['stay_starting'].get(j, 0) +
+            vars['bench_to_starting'].get(j, 0) +
+            vars['in_to_starting_free'].get(j, 0) +
+            vars['in_to_starting_paid'].get(j, 0)
+        )
+        
+        # Add constraints to link indicator to player selections
+        prob += pair_indicator <= player_i_starting, f"pair_constraint_i_{i}_{j}"
+        prob += pair_indicator <= player_j_starting, f"pair_constraint_j_{i}_{j}"
+        prob += pair_indicator >= player_i_starting + player_j_starting - 1, f"pair_constraint_both_{i}_{j}"
+        
+        # Add position-weighted penalty term
+        opposing_penalty_terms.append(actual_penalty * pair_indicator)
+    
+    print(f"  Found {len(opposing_penalty_terms)} potential opposing pairs")
     
     # Print penalty breakdown by position combination
     if penalty_breakdown:
@@ -154,74 +200,21 @@ def add_opposing_teams_penalty_to_objective(prob, df_players, vars, base_opposin
 # ANALYSIS AND REPORTING
 # ============================================================================
 
-def analyze_opposing_pairs_in_squad(df_players, squad, base_penalty=1.0):
+def analyze_opposing_pairs_in_squad(df_players, squad, base_penalty=1.0, penalty_matrix=None):
     """
     Analyze opposing pairs in the final squad selection with position-weighted penalties
+
+    Returns:
+        pd.DataFrame: The pairs found (see solution_analysis.opposing_pairs_in_squad)
     """
+    from solution_analysis import opposing_pairs_in_squad, print_opposing_pairs
+
     if squad['starting_df'].empty:
-        return
-    
-    starting_players = squad['starting_df']
-    opposing_pairs = []
-    
-    for i, player_i in starting_players.iterrows():
-        for j, player_j in starting_players.iterrows():
-            if i >= j:
-                continue
-                
-            if (player_i.get('opponent_id') == player_j.get('team_id') and 
-                player_j.get('opponent_id') == player_i.get('team_id') and
-                player_i.get('opponent') != 'No fixture'):
-                
-                # Get positions and calculate position-weighted penalty using centralized function
-                pos_i = player_i['position']
-                pos_j = player_j['position']
-                
-                penalty_multiplier = get_penalty_for_positions(pos_i, pos_j)
-                
-                # Skip if this combination should be ignored (e.g., GK vs GK)
-                if penalty_multiplier is None:
-                    continue
-                    
-                actual_penalty = base_penalty * penalty_multiplier
-                pos_pair = tuple(sorted([pos_i, pos_j]))
-                
-                opposing_pairs.append((player_i, player_j, pos_pair, actual_penalty))
-    
-    print("\n" + "="*60)
-    print("POSITION-WEIGHTED OPPOSING TEAMS ANALYSIS")
-    print("="*60)
-    
-    if opposing_pairs:
-        print(f"⚠️  {len(opposing_pairs)} opposing player pairs in your starting XI:")
-        total_penalty = 0
-        
-        # Group by position combination for better display
-        position_groups = {}
-        for player_i, player_j, pos_pair, penalty in opposing_pairs:
-            if pos_pair not in position_groups:
-                position_groups[pos_pair] = []
-            position_groups[pos_pair].append((player_i, player_j, penalty))
-            total_penalty += penalty
-        
-        # Display by position combination
-        for pos_pair, pairs in position_groups.items():
-            penalty_multiplier = get_penalty_for_positions(pos_pair[0], pos_pair[1])
-            if penalty_multiplier is None:
-                penalty_multiplier = 0  # Shouldn't happen but safe fallback
-            print(f"\n📍 {pos_pair[0]} vs {pos_pair[1]} (penalty: {penalty_multiplier}x base = {base_penalty * penalty_multiplier:.1f} pts each):")
-            
-            for player_i, player_j, penalty in pairs:
-                print(f"  • {player_i['name']} ({player_i['team']}) vs {player_j['name']} ({player_j['team']})")
-                print(f"    Match: {player_i['team']} vs {player_i['opponent']} | Penalty: -{penalty:.1f} pts")
-        
-        print(f"\n💰 Total position-weighted penalty: -{total_penalty:.1f} points")
-        print(f"📊 Average penalty per pair: {total_penalty/len(opposing_pairs):.1f} points")
-    else:
-        print("✅ No opposing player pairs found in starting XI")
-        print("💰 No penalty applied")
-    
-    print("="*60)
+        return None
+
+    pairs = opposing_pairs_in_squad(squad['starting_df'], base_penalty, penalty_matrix)
+    print_opposing_pairs(pairs, base_penalty)
+    return pairs
 
 # ============================================================================
 # UTILITY FUNCTIONS
@@ -2,49 +2,59 @@ import sys
 import io
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 import pandas as pd
-from pulp import LpProblem, LpMaximize, PULP_CBC_CMD
-from decision_variables import create_decision_variables
-from objective_function import add_objective_function
+from pulp import PULP_CBC_CMD
+from model_builder import build_transfer_model
 from constraints import *
 from squad_creator import *
 from team_class import Team
-from output_window import display_in_window
+from report import build_report, render_text, write_report
 from fdr import CSVFDRCalculator
+from simulation import PointsSimulator
+from instrumentation import MetricsRegistry
+from solution_analysis import analyse_solution, print_fdr_analysis, print_opposing_pairs, print_transfers
+from solution_cache import SolutionCache
+
+# Wall time, peak memory and model size of every stage
+metrics = MetricsRegistry()
 
 # Initialize team
-my_team = Team(team_id=2562804, budget=0, free_transfers=1)
+with metrics.span('load_team'):
+    my_team = Team(team_id=2562804, budget=0, free_transfers=1)
 
-df_players = pd.read_csv('data/fpl_players_gw_5.csv')
+players_path = 'data/fpl_players_gw_5.csv'
+with metrics.span('load_players') as span:
+    df_players = pd.read_csv(players_path)
+    span.set(players=len(df_players))
 
 # Initialize FDR calculator
-fdr_calculator = CSVFDRCalculator()
+with metrics.span('load_fdr'):
+    fdr_calculator = CSVFDRCalculator()
 print(f"📊 FDR Calculator initialized with {len(fdr_calculator.team_fdr_ratings)} teams")   
 
-# Create optimization problem
-prob = LpProblem("FPL_Transfer_Optimisation", LpMaximize)
-
-# Create decision variables
-vars = create_decision_variables(df_players)
-
-# Add objective function with FDR penalties
-prob = add_objective_function(
-    prob, df_players, vars, 
-    penalty_points=4, 
+model_params = dict(
+    penalty_points=4,
     base_opposing_penalty=0.5,
     fdr_calculator=fdr_calculator,
-    fdr_penalty_weight=1.0  # Adjust this to control FDR impact
+    fdr_penalty_weight=1.0,  # Adjust this to control FDR impact
 )
 
-# Add constraints
-prob = add_squad_size_constraints(prob, vars, df_players)
-prob = add_captain_constraints(prob, vars, df_players)
-prob = add_equal_flow_constraints(prob, vars, df_players)
-prob = add_status_constraints(prob, vars, df_players, my_team)
-prob = add_positional_constraints(prob, vars, df_players)
-prob = add_free_transfer_limit_constraint(prob, vars, df_players, my_team)
-prob = add_availability_constraints(prob, vars, df_players, my_team)
-prob = add_budget_constraint(prob, vars, df_players, my_team.current_team)
-prob = add_team_constraints(prob, vars, df_players)
+# The squad of a solve with the same squad, bank, snapshot and parameters is re-used
+# without building or solving the model (python optimiser.py --no-cache to skip)
+cache = None if '--no-cache' in sys.argv else SolutionCache(cache_dir='output/solution_cache')
+squad = None
+if cache is not None:
+    with metrics.span('solution_cache_lookup') as span:
+        cache_key = cache.key_for(df_players, my_team, model_params, source=players_path)
+        squad = cache.get(cache_key)
+        span.set(hit=squad is not None)
+
+if squad is not None:
+    prob, vars = None, None
+    print("♻️ Re-using cached solution for this squad, snapshot and parameters")
+else:
+    # Create optimization problem with FDR penalties and all constraints
+    with metrics.span('build_transfer_model'):
+        prob, vars = build_transfer_model(df_players, my_team, metrics=metrics, **model_params)
 
 # Example usage with custom parameters:
 '''
@@ -62,56 +72,40 @@ prob = add_bench_selection_constraints(
 )
 '''
 # Solve the problem
-prob.solve(PULP_CBC_CMD(msg=False))
-
-# Print transfer summary
-transfer_types = [
-    ('out_starting_paid', 'Sold', ''),
-    ('out_bench_paid', 'Sold', ' from bench'),
-    ('in_to_starting_paid', 'Bought', ''),
-    ('in_to_bench_paid', 'Bought', ''),
-    ('in_to_starting_free', 'Bought', ''),
-    ('in_to_bench_free', 'Bought', ''),
-    ('out_starting_free', 'Sold', ''),
-    ('out_bench_free', 'Sold', ' from bench')
-]
-
-for idx in df_players.index:
-    for var_name, action, location in transfer_types:
-        if vars[var_name][idx].value() > 0:
-            player = df_players.loc[idx]
-            print(f"{action}: {player['name']}{location} for £{player['price']}m ({var_name})")
+if squad is None:
+    with metrics.span('solve') as span:
+        status = prob.solve(PULP_CBC_CMD(msg=False))
+        span.set(solver='CBC', variables=len(prob.variables()), constraints=len(prob.constraints))
+
+    # Bench order chosen by simulated auto-subs (minutes risk + formation rules)
+    with metrics.span('process_optimization_results'):
+        squad = process_optimization_results(vars, df_players, prob, bench_simulator=PointsSimulator(df_players, seed=0))
 
+    if cache is not None and status == 1:
+        with metrics.span('solution_cache_store'):
+            cache.put(cache_key, squad)
+
+# Transfers, opposing pairs in the starting XI and FDR contribution, as DataFrames
+with metrics.span('analyse_solution'):
+    analysis = analyse_solution(squad, df_players, fdr_calculator=fdr_calculator, base_penalty=1.0)
+
+print_transfers(analysis['transfers'])
 print(f"Initial bank: £{0}m")
 
-squad = process_optimization_results(vars, df_players, prob)
-
-# Analyze opposing teams in final squad (using consolidated module)
-from opposing_teams import analyze_opposing_pairs_in_squad
-analyze_opposing_pairs_in_squad(df_players, squad, base_penalty=1.0)
-
-# Analyze FDR impact in final squad
-print("\n🎯 FDR ANALYSIS OF SELECTED SQUAD")
-print("=" * 50)
-starting_df = squad['starting_df']
-total_fdr_bonus = 0
-
-for idx, player in starting_df.iterrows():
-    team_id = player['team_id']
-    fdr_rating = fdr_calculator.team_fdr_ratings.get(team_id, 0)
-    fdr_bonus = fdr_calculator.get_fdr_penalty_points(team_id, 1.0)
-    total_fdr_bonus += fdr_bonus
-    
-    bonus_indicator = "💚" if fdr_bonus > 0 else "❤️" if fdr_bonus < 0 else "💛"
-    print(f"{bonus_indicator} {player['name']} ({player['team']}): {fdr_rating:.1f} FDR ({fdr_bonus:+.1f})")
-
-print(f"\n📊 Total FDR Bonus/Penalty: {total_fdr_bonus:+.1f} points")
-
-if total_fdr_bonus > 0:
-    print("✅ Squad benefits from easier fixtures!")
-elif total_fdr_bonus < 0:
-    print("⚠️  Squad faces difficult fixtures")
-else:
-    print("➡️  Squad has neutral fixture difficulty")
+print_opposing_pairs(analysis['opposing_pairs'], base_penalty=1.0)
+print_fdr_analysis(analysis['fdr'])
+
+# Write JSON/HTML/text reports; the tkinter window is opt-in (python optimiser.py --gui)
+report = build_report(prob, squad, my_team=my_team)
+print(render_text(report))
+paths = write_report(report, f"output/gw_{report['gameweek']}", formats=('json', 'html', 'txt'))
+print(f"\n📝 Reports written: {', '.join(paths)}")
+
+metrics.print_summary()
+metrics.to_json(f"output/metrics_gw_{report['gameweek']}.json")
+metrics.to_chrome_trace(f"output/trace_gw_{report['gameweek']}.json")
+print("⏱️ Metrics written to output/ (open the trace in chrome://tracing or ui.perfetto.dev)")
 
-display_in_window(prob, squad, vars, df_players, my_team)
\ No newline at end of file
+if '--gui' in sys.argv:
+    from output_window import display_in_window
+    display_in_window(prob, squad, vars, df_players, my_team)
@@ -0,0 +1,416 @@
+# projections.py
+# Import third-party xP projections: match players to FPL ids, blend sources and cache per snapshot
+
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import pickle
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from solution_cache import snapshot_hash
+
+# Header names recognised in projection files (compared after lower-casing)
+ID_COLUMNS = ['id', 'fpl_id', 'element', 'player_id']
+NAME_COLUMNS = ['name', 'player', 'player_name', 'web_name']
+TEAM_COLUMNS = ['team', 'club', 'team_name']
+GAMEWEEK_COLUMNS = ['gameweek', 'gw', 'event', 'round']
+XP_COLUMNS = ['xp', 'expected_points', 'projection', 'points', 'pts']
+
+# Wide files: one column per gameweek, e.g. "GW5", "gw_5", "5_xP", "5_Pts"
+WIDE_GAMEWEEK_COLUMN = re.compile(r'^(?:gw|gameweek)?[\s_]*(\d{1,2})(?:[\s_]*(?:xp|pts|points|ep))?$', re.IGNORECASE)
+
+# Common club spellings in third-party files, keyed and valued by normalise_name output
+TEAM_ALIASES = {
+    'manchester city': 'man city', 'mci': 'man city',
+    'manchester united': 'man utd', 'manchester utd': 'man utd', 'man united': 'man utd', 'mun': 'man utd',
+    'tottenham': 'spurs', 'tottenham hotspur': 'spurs', 'tot': 'spurs',
+    'newcastle united': 'newcastle', 'new': 'newcastle',
+    'nottingham forest': 'nottm forest', 'nfo': 'nottm forest',
+    'wolverhampton': 'wolves', 'wolverhampton wanderers': 'wolves', 'wol': 'wolves',
+    'brighton and hove albion': 'brighton', 'brighton hove albion': 'brighton', 'bha': 'brighton',
+    'west ham united': 'west ham', 'whu': 'west ham',
+    'leeds united': 'leeds', 'afc bournemouth': 'bournemouth', 'sheffield united': 'sheffield utd',
+    'leicester city': 'leicester', 'ipswich town': 'ipswich', 'luton town': 'luton',
+    'ars': 'arsenal', 'avl': 'aston villa', 'bou': 'bournemouth', 'bre': 'brentford', 'bur': 'burnley',
+    'che': 'chelsea', 'cry': 'crystal palace', 'eve': 'everton', 'ful': 'fulham', 'lee': 'leeds',
+    'liv': 'liverpool', 'sun': 'sunderland',
+}
+
+# Letters NFKD does not decompose into an ASCII base letter
+TRANSLITERATIONS = str.maketrans({'ø': 'o', 'Ø': 'O', 'æ': 'ae', 'Æ': 'AE', 'œ': 'oe', 'Œ': 'OE', 'ß': 'ss',
+                                  'đ': 'd', 'Đ': 'D', 'ð': 'd', 'þ': 'th', 'ł': 'l', 'Ł': 'L', 'ı': 'i'})
+
+# Smallest difflib ratio accepted by the fuzzy fallback
+FUZZY_CUTOFF = 0.85
+
+
+def normalise_name(name):
+    """Lower-case ASCII with punctuation dropped: 'Ødegaard' -> 'odegaard', 'M.Salah' -> 'm salah'"""
+    name = unicodedata.normalize('NFKD', str(name).translate(TRANSLITERATIONS)).encode('ascii', 'ignore').decode('ascii').lower()
+    name = re.sub(r"[.\-_]", ' ', name)
+    name = re.sub(r"[^a-z0-9 ]", '', name)
+    return ' '.join(name.split())
+
+
+def _normalise_unique(values):
+    """normalise_name over a column, computed once per distinct value"""
+    values = pd.Series(values, dtype=object).fillna('')
+    unique = pd.unique(values)
+    return values.map(dict(zip(unique, map(normalise_name, unique)))).to_numpy()
+
+
+class PlayerIndex:
+    """
+    Lookup from (name, team) as written in projection files to FPL ids.
+
+    Built once per snapshot: every player is keyed by normalised web name,
+    full name (when first_name/second_name are present) and surname, each with
+    and without the team. match() tries, per distinct (name, team):
+    name+team, name alone when unique, surname+team, then a difflib fuzzy match
+    among the team's players (or all players when there is no team).
+    """
+
+    def __init__(self, df_players):
+        """
+        Args:
+            df_players: Snapshot with id, name and team (first_name, second_name and
+                        team_short are used when present)
+        """
+        ids = df_players['id'].to_numpy()
+        teams = _normalise_unique(df_players['team'])
+        variants = [_normalise_unique(df_players['name'])]
+        if {'first_name', 'second_name'} <= set(df_players.columns):
+            variants.append(_normalise_unique(df_players['first_name'] + ' ' + df_players['second_name']))
+            variants.append(_normalise_unique(df_players['second_name']))
+        variants.append(np.array([key.split(' ')[-1] if key else key for key in variants[0]]))
+
+        keys = pd.DataFrame({
+            'id': np.tile(ids, len(variants)),
+            'name': np.concatenate(variants),
+            'team': np.tile(teams, len(variants)),
+        }).drop_duplicates()
+        keys = keys[keys['name'] != '']
+
+        self.by_name_team = self._unique_lookup(keys, ['name', 'team'])
+        self.by_name = self._unique_lookup(keys, ['name'])
+        self.names_by_team = {team: group['name'].unique().tolist() for team, group in keys.groupby('team')}
+        self.all_names = keys['name'].unique().tolist()
+        self.team_names = set(teams)
+        self.team_aliases = dict(TEAM_ALIASES)
+        if 'team_short' in df_players.columns:
+            self.team_aliases.update(zip(_normalise_unique(df_players['team_short']), teams))
+
+    @staticmethod
+    def _unique_lookup(keys, columns):
+        """Keys that identify exactly one player, as a dict (tuple key for several columns)"""
+        counts = keys.groupby(columns)['id'].agg(['first', 'nunique'])
+        unique = counts[counts['nunique'] == 1]['first']
+        return unique.to_dict()
+
+    def _match_one(self, name, team):
+        if team not in self.team_names:
+            team = ''
+        if team and (name, team) in self.by_name_team:
+            return self.by_name_team[(name, team)], 'exact'
+        if not team and name in self.by_name:
+            return self.by_name[name], 'name'
+        surname = name.split(' ')[-1] if name else name
+        if team and (surname, team) in self.by_name_team:
+            return self.by_name_team[(surname, team)], 'surname'
+        candidates = self.names_by_team.get(team, []) if team else self.all_names
+        close = difflib.get_close_matches(name, candidates, n=1, cutoff=FUZZY_CUTOFF)
+        if close:
+            player_id = self.by_name_team.get((close[0], team)) if team else self.by_name.get(close[0])
+            if player_id is not None:
+                return player_id, 'fuzzy'
+        return None, None
+
+    def match(self, names, teams=None):
+        """
+        FPL ids for projection rows.
+
+        Args:
+            names: Player names as written in the file
+            teams: Club names or short codes (optional)
+
+        Returns:
+            tuple: (ids as a float array with NaN where unmatched, method per row:
+                    'exact', 'name', 'surname', 'fuzzy' or None)
+        """
+        name_keys = _normalise_unique(names)
+        if teams is None:
+            team_keys = np.full(len(name_keys), '', dtype=object)
+        else:
+            team_keys = pd.Series(_normalise_unique(teams)).map(lambda key: self.team_aliases.get(key, key)).to_numpy()
+
+        rows = pd.DataFrame({'name': name_keys, 'team': team_keys})
+        distinct = rows.drop_duplicates()
+        matched = [self._match_one(name, team) for name, team in zip(distinct['name'], distinct['team'])]
+        distinct = distinct.assign(id=[player_id for player_id, _ in matched],
+                                   method=[method for _, method in matched])
+        rows = rows.merge(distinct, on=['name', 'team'], how='left')
+        return rows['id'].to_numpy(dtype=float), rows['method'].to_numpy()
+
+
+def _find_column(columns, candidates):
+    lower = {column.lower().strip(): column for column in columns}
+    return next((lower[name] for name in candidates if name in lower), None)
+
+
+def read_projections(path):
+    """
+    Parse a projection CSV in wide (one column per gameweek) or long
+    (gameweek and xP columns) layout, reading only the columns needed.
+
+    Returns:
+        pd.DataFrame: Long rows with id (NaN without an id column), name, team, gameweek and xp
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    id_column = _find_column(header, ID_COLUMNS)
+    name_column = _find_column(header, NAME_COLUMNS)
+    team_column = _find_column(header, TEAM_COLUMNS)
+    if id_column is None and name_column is None:
+        raise ValueError(f"{path}: needs an id or a player name column")
+    keys = [column for column in (id_column, name_column, team_column) if column is not None]
+
+    gameweek_column = _find_column(header, GAMEWEEK_COLUMNS)
+    xp_column = _find_column(header, XP_COLUMNS)
+    if gameweek_column is not None and xp_column is not None:
+        frame = pd.read_csv(path, usecols=keys + [gameweek_column, xp_column])
+        frame = frame.rename(columns={gameweek_column: 'gameweek', xp_column: 'xp'})
+    else:
+        wide = {column: int(match.group(1)) for column in header
+                if column not in keys and (match := WIDE_GAMEWEEK_COLUMN.match(column.strip()))}
+        if not wide:
+            raise ValueError(f"{path}: no gameweek columns found")
+        frame = pd.read_csv(path, usecols=keys + list(wide))
+        frame = frame.melt(id_vars=keys, var_name='gameweek', value_name='xp')
+        frame['gameweek'] = frame['gameweek'].map(wide)
+
+    return pd.DataFrame({
+        'id': pd.to_numeric(frame[id_column], errors='coerce') if id_column else np.nan,
+        'name': frame[name_column] if name_column else '',
+        'team': frame[team_column] if team_column else '',
+        'gameweek': pd.to_numeric(frame['gameweek'], errors='coerce'),
+        'xp': pd.to_numeric(frame['xp'], errors='coerce'),
+    }).dropna(subset=['gameweek', 'xp'])
+
+
+def match_projections(projections, index):
+    """
+    Attach FPL ids to parsed projections (rows with an id column keep it).
+
+    Returns:
+        tuple: (DataFrame of xP indexed by FPL id with one column per gameweek,
+                dict report with matched counts by method and unmatched names)
+    """
+    needs_match = projections['id'].isna().to_numpy()
+    methods = np.full(len(projections), 'id', dtype=object)
+    ids = projections['id'].to_numpy(dtype=float, copy=True)
+    if needs_match.any():
+        teams = projections['team'][needs_match] if projections['team'].ne('').any() else None
+        ids[needs_match], methods[needs_match] = index.match(projections['name'][needs_match], teams)
+
+    projections = projections.assign(id=ids, method=methods)
+    players = projections.drop_duplicates(['name', 'team', 'id'])
+    report = {
+        'rows': len(projections),
+        'players': len(players),
+        'matched': players['method'].value_counts().to_dict(),
+        'unmatched': sorted(players.loc[players['id'].isna(), 'name'].astype(str).unique().tolist()),
+    }
+
+    matched = projections.dropna(subset=['id']).astype({'id': int, 'gameweek': int})
+    xp = matched.pivot_table(index='id', columns='gameweek', values='xp', aggfunc='mean')
+    return xp, report
+
+
+def blend(sources):
+    """
+    Weighted mean of several sources' xP per player and gameweek.
+
+    Each cell averages only the sources that project it, with their weights
+    renormalised, so a player missing from one source is not dragged to zero.
+
+    Args:
+        sources: List of (xP DataFrame from match_projections, weight)
+
+    Returns:
+        pd.DataFrame: Blended xP indexed by FPL id with one column per gameweek
+    """
+    ids = sorted(set().union(*(frame.index for frame, _ in sources)))
+    gameweeks = sorted(set().union(*(frame.columns for frame, _ in sources)))
+    total = np.zeros((len(ids), len(gameweeks)))
+    weight_sum = np.zeros((len(ids), len(gameweeks)))
+    for frame, weight in sources:
+        values = frame.reindex(index=ids, columns=gameweeks).to_numpy(dtype=float)
+        present = ~np.isnan(values)
+        total += weight * np.where(present, values, 0.0)
+        weight_sum += weight * present
+    with np.errstate(invalid='ignore', divide='ignore'):
+        blended = np.where(weight_sum > 0, total / weight_sum, np.nan)
+    return pd.DataFrame(blended, index=pd.Index(ids, name='id'), columns=gameweeks)
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _normalise_sources(sources):
+    """Paths, (path, weight) pairs or {'path', 'weight'} dicts as a list of (path, weight)"""
+    normalised = []
+    for source in sources:
+        if isinstance(source, str):
+            normalised.append((source, 1.0))
+        elif isinstance(source, dict):
+            normalised.append((source['path'], float(source.get('weight', 1.0))))
+        else:
+            normalised.append((source[0], float(source[1])))
+    return normalised
+
+
+class ProjectionCache:
+    """
+    On-disk cache of matched sources and blends, per snapshot.
+
+    Each source file is parsed and matched once per snapshot and saved as
+    cache_dir/<snapshot>/source-<key>.pkl (keyed by path, size and mtime), and
+    each blend as blend-<key>.pkl (keyed by the source keys and weights), so
+    switching between projection sets re-reads nothing that was seen before.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _path(self, snapshot, kind, payload):
+        digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:24]
+        return os.path.join(self.cache_dir, snapshot[:16], f"{kind}-{digest}.pkl")
+
+    def get_or_compute(self, snapshot, kind, payload, compute):
+        """Cached value for (snapshot, kind, payload), computing and saving it on a miss"""
+        path = self._path(snapshot, kind, payload)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return pickle.load(f), True
+        value = compute()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump(value, f)
+        return value, False
+
+
+def load_projections(df_players, sources, cache_dir=None, index=None):
+    """
+    Parse, match and blend projection files for a snapshot.
+
+    Args:
+        df_players: Snapshot the ids are matched against
+        sources: Paths, (path, weight) pairs or {'path', 'weight'} dicts
+        cache_dir: Optional ProjectionCache directory
+        index: Optional prebuilt PlayerIndex for df_players
+
+    Returns:
+        tuple: (blended xP indexed by FPL id with one column per gameweek,
+                dict of per-source match reports keyed by path)
+    """
+    sources = _normalise_sources(sources)
+    cache = ProjectionCache(cache_dir) if cache_dir else None
+    snapshot = snapshot_hash(df_players) if cache else None
+
+    def parse(path):
+        nonlocal index
+        index = index or PlayerIndex(df_players)
+        return match_projections(read_projections(path), index)
+
+    matched, reports = [], {}
+    for path, weight in sources:
+        if cache:
+            (xp, report), _ = cache.get_or_compute(snapshot, 'source', _file_signature(path), lambda: parse(path))
+        else:
+            xp, report = parse(path)
+        matched.append((xp, weight))
+        reports[path] = report
+
+    if cache:
+        payload = [dict(_file_signature(path), weight=weight) for path, weight in sources]
+        blended, _ = cache.get_or_compute(snapshot, 'blend', payload, lambda: blend(matched))
+    else:
+        blended = blend(matched)
+    return blended, reports
+
+
+def apply_projections(df_players, blended, horizon=1):
+    """
+    Use blended projections as expected_points, as a drop-in for the optimiser.
+
+    Players no source covers keep their current expected_points for the
+    target gameweek (and 0 for later ones).
+
+    Args:
+        df_players: Snapshot (gameweek column is the target gameweek)
+        blended: Output of load_projections
+        horizon (int): Gameweeks written as xp_gw{gw} columns
+
+    Returns:
+        pd.DataFrame: Copy with expected_points replaced, the original kept as
+                      ep_next, xp_gw{gw} per gameweek and xp_{horizon}gw in total
+    """
+    first = int(df_players['gameweek'].iloc[0])
+    gameweeks = list(range(first, first + horizon))
+    xp = blended.reindex(index=df_players['id'], columns=gameweeks)
+
+    df_players = df_players.copy()
+    if 'ep_next' not in df_players.columns:
+        df_players['ep_next'] = df_players['expected_points']
+    xp[first] = xp[first].fillna(pd.Series(df_players['ep_next'].to_numpy(dtype=float), index=xp.index))
+    for gameweek in gameweeks:
+        df_players[f'xp_gw{gameweek}'] = xp[gameweek].fillna(0.0).round(2).to_numpy()
+    df_players[f'xp_{horizon}gw'] = xp.fillna(0.0).sum(axis=1).round(2).to_numpy()
+    df_players['expected_points'] = df_players[f'xp_gw{first}']
+    return df_players
+
+
+def print_match_report(reports):
+    """Matched players by method and the first unmatched names per source"""
+    print("\n🔗 PROJECTION MATCHING")
+    print("=" * 60)
+    for path, report in reports.items():
+        matched = sum(count for method, count in report['matched'].items() if method is not None)
+        print(f"{os.path.basename(path)}: {matched}/{report['players']} players matched {report['matched']}")
+        if report['unmatched']:
+            shown = ', '.join(report['unmatched'][:10])
+            more = f" (+{len(report['unmatched']) - 10} more)" if len(report['unmatched']) > 10 else ""
+            print(f"  ⚠️ Unmatched: {shown}{more}")
+    print("=" * 60)
+
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blend third-party xP projections into a player snapshot")
+    parser.add_argument('snapshot', help="Snapshot CSV (e.g. data/fpl_players_gw_5.csv)")
+    parser.add_argument('--source', action='append', required=True, metavar='PATH[:WEIGHT]',
+                        help="Projection CSV, optionally with a blend weight (repeatable)")
+    parser.add_argument('--horizon', type=int, default=1)
+    parser.add_argument('--cache-dir', default='data/projection_cache')
+    parser.add_argument('--output', help="Output CSV (default: <snapshot>_projected.csv)")
+    args = parser.parse_args()
+
+    sources = []
+    for source in args.source:
+        path, _, weight = source.rpartition(':')
+        sources.append((path, float(weight)) if path else (source, 1.0))
+    df_players = pd.read_csv(args.snapshot)
+    blended, reports = load_projections(df_players, sources, cache_dir=args.cache_dir)
+    print_match_report(reports)
+
+    df_players = apply_projections(df_players, blended, horizon=args.horizon)
+    output = args.output or args.snapshot.replace('.csv', '_projected.csv')
+    df_players.to_csv(output, index=False)
+    print(f"Saved to: {output}")
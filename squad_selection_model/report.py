@@ -0,0 +1,304 @@
+# report.py
+# Headless rendering of optimisation results: structured JSON plus static text/HTML reports
+
+import html
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from pulp import LpStatus, value
+from tabulate import tabulate
+
+POSITION_ORDER = ['Goalkeeper', 'Defender', 'Midfielder', 'Forward']
+
+PLAYER_FIELDS = ['id', 'name', 'position', 'team', 'opponent', 'price', 'expected_points', 'transfer_type']
+
+
+def _native(val):
+    """numpy/pandas scalars as plain Python values (NaN as None)"""
+    if isinstance(val, np.generic):
+        val = val.item()
+    if isinstance(val, float) and np.isnan(val):
+        return None
+    return val
+
+
+def _players(df, extra_fields=()):
+    """Rows of a squad DataFrame as JSON-ready dicts"""
+    fields = [field for field in PLAYER_FIELDS + list(extra_fields) if field in df.columns]
+    return [
+        {field: _native(val) for field, val in zip(fields, row)}
+        for row in df[fields].itertuples(index=False, name=None)
+    ]
+
+
+def _player_summary(df, idx):
+    if idx is None or idx not in df.index:
+        return None
+    return {'id': _native(df.loc[idx, 'id']) if 'id' in df.columns else None,
+            'name': df.loc[idx, 'name'],
+            'expected_points': _native(df.loc[idx, 'expected_points'])}
+
+
+def transfer_counts(decision_results, penalty_points=4):
+    """Free/paid transfers made, from the squad's decision results"""
+    free = len(decision_results.get('out_starting_free', [])) + len(decision_results.get('out_bench_free', []))
+    paid = len(decision_results.get('out_starting_paid', [])) + len(decision_results.get('out_bench_paid', []))
+    return {'total': free + paid, 'free': free, 'paid': paid, 'points_hit': paid * penalty_points}
+
+
+def _previous_team(my_team):
+    team_df = my_team.current_team
+    starting = team_df[team_df['is_starting']]
+    counts = starting['position'].value_counts()
+    return {
+        'gameweek': _native(getattr(my_team, 'current_gw', None)),
+        'starting': _players(team_df[team_df['is_starting']].rename(columns={'player_id': 'id'})),
+        'bench': _players(team_df[~team_df['is_starting']].rename(columns={'player_id': 'id'})),
+        'team_value': round(float(my_team.team_value), 1),
+        'bank': round(float(my_team.budget), 1),
+        'free_transfers': int(my_team.free_transfers),
+        'formation': f"{counts.get('GK', 0)}-{counts.get('DEF', 0)}-{counts.get('MID', 0)}-{counts.get('FWD', 0)}",
+    }
+
+
+def build_report(prob, squad, my_team=None, penalty_points=4):
+    """
+    Structured, JSON-serialisable report of a solved transfer model.
+
+    Args:
+        prob: Solved PuLP problem, or None to take status and objective from the squad (e.g. a cached one)
+        squad: Squad dictionary from process_optimization_results
+        my_team: Optional Team instance (previous squad, bank)
+        penalty_points: Points per paid transfer
+
+    Returns:
+        dict: gameweek, status, objective, captaincy, transfers, starting, bench, out,
+              formation, total_cost and (with my_team) previous_team
+    """
+    starting_df = squad['starting_df'].sort_values(
+        by='position', key=lambda col: col.map({pos: i for i, pos in enumerate(POSITION_ORDER)})
+    )
+    formation = squad['formation']
+    if prob is not None:
+        status = LpStatus[prob.status]
+        objective = value(prob.objective) if prob.status == 1 else None
+    else:
+        status, objective = squad['optimization_status'], squad.get('objective')
+
+    report = {
+        'gameweek': _native(squad['gameweek']),
+        'status': status,
+        'objective': round(float(objective), 3) if objective is not None else None,
+        'captain': _player_summary(squad['starting_df'], squad['captain_idx']),
+        'vice_captain': _player_summary(squad['starting_df'], squad['vice_captain_idx']),
+        'transfers': transfer_counts(squad.get('decision_results', {}), penalty_points),
+        'starting': _players(starting_df, ['is_captain', 'is_vice_captain']),
+        'bench': _players(squad['bench_df'], ['bench_order']),
+        'out': _players(squad.get('out_df', pd.DataFrame())),
+        'formation': '-'.join(str(formation.get(pos, 0)) for pos in POSITION_ORDER),
+        'total_cost': round(float(squad['total_cost']), 1),
+    }
+    if my_team is not None:
+        report['previous_team'] = _previous_team(my_team)
+    return report
+
+
+def _fmt_price(player):
+    return f"£{player['price']:.1f}m"
+
+
+def _role(player):
+    return "(C)" if player.get('is_captain') else "(VC)" if player.get('is_vice_captain') else ""
+
+
+def report_lines(report):
+    """
+    Lines of the text report; headings are (text, style) tuples so frontends can format them.
+
+    Styles: 'bold', 'title', 'header', 'important'.
+    """
+    lines = []
+    lines.append(("=" * 100, "bold"))
+    lines.append((" " * 35 + "FPL TEAM SELECTION", "title"))
+    if report['gameweek']:
+        lines.append((" " * 38 + f"GAMEWEEK {report['gameweek']}", "title"))
+    lines.append(("=" * 100, "bold"))
+    lines.append("")
+    lines.append((f"STATUS: {report['status']}", "important"))
+    if report['objective'] is not None:
+        lines.append((f"TOTAL EXPECTED POINTS: {report['objective']:.2f}", "important"))
+
+    captain, vice_captain = report['captain'], report['vice_captain']
+    if captain:
+        points = captain['expected_points']
+        lines.append((f"CAPTAIN: {captain['name']} ({points:.1f} x 2 = {points * 2:.1f} pts)", "important"))
+    else:
+        lines.append(("CAPTAIN: None selected", "important"))
+    if vice_captain:
+        lines.append((f"VICE-CAPTAIN: {vice_captain['name']} ({vice_captain['expected_points']:.1f} pts)", "important"))
+    else:
+        lines.append(("VICE-CAPTAIN: None selected", "important"))
+
+    transfers = report['transfers']
+    if transfers['total'] > 0:
+        lines.append("")
+        lines.append((f"TRANSFERS MADE: {transfers['total']}", "header"))
+        lines.append(f"  Free: {transfers['free']}")
+        lines.append(f"  Paid: {transfers['paid']}")
+        lines.append((f"  Points Hit: -{transfers['points_hit']}", "important"))
+
+    def section(title):
+        lines.append("")
+        lines.append(("=" * 100, "bold"))
+        lines.append((title, "header"))
+        lines.append(("=" * 100, "bold"))
+
+    section("STARTING XI")
+    if report['starting']:
+        lines.append(tabulate(
+            [[p['name'], p['position'], p['team'], p.get('opponent') or 'No fixture', _fmt_price(p),
+              f"{p['expected_points']:.1f}", p.get('transfer_type'), _role(p)] for p in report['starting']],
+            headers=['Name', 'Position', 'Team', 'Opponent', 'Price', 'Points', 'Transfer', 'Role'], tablefmt='grid'
+        ))
+
+    section("BENCH")
+    if report['bench']:
+        lines.append(tabulate(
+            [[p.get('bench_order'), p['name'], p['position'], p['team'], p.get('opponent') or 'No fixture',
+              _fmt_price(p), f"{p['expected_points']:.1f}", p.get('transfer_type')] for p in report['bench']],
+            headers=['#', 'Name', 'Position', 'Team', 'Opponent', 'Price', 'Points', 'Transfer'], tablefmt='grid'
+        ))
+
+    section("SUMMARY")
+    summary = [['Formation', report['formation']], ['Total Cost', f"£{report['total_cost']:.1f}m"]]
+    if 'previous_team' in report:
+        summary += [['Previous Team Cost', f"£{report['previous_team']['team_value']:.1f}m"],
+                    ['Previous Bank', f"£{report['previous_team']['bank']:.1f}m"]]
+    lines.append(tabulate(summary, tablefmt='simple'))
+
+    if report['out']:
+        section("OUT TRANSFERS")
+        lines.append(tabulate(
+            [[p['name'], p['position'], p['team'], p.get('opponent') or 'No fixture', _fmt_price(p),
+              f"{p['expected_points']:.1f}", p.get('transfer_type')] for p in report['out']],
+            headers=['Name', 'Position', 'Team', 'Opponent', 'Price', 'Points', 'Transfer Type'], tablefmt='grid'
+        ))
+    return lines
+
+
+def previous_team_lines(report):
+    """Lines describing the previous gameweek's squad"""
+    previous = report.get('previous_team')
+    if previous is None:
+        return ["No previous gameweek data available"]
+
+    lines = ["=" * 80, " " * 25 + f"PREVIOUS TEAM (GAMEWEEK {previous['gameweek']})", "=" * 80]
+    if previous['starting']:
+        lines += ["\nSTARTING XI", "=" * 80, tabulate(
+            [[p['name'], p['position'], p['team'], _fmt_price(p), f"{p['expected_points']:.1f}"]
+             for p in previous['starting']],
+            headers=['Name', 'Position', 'Team', 'Price', 'Points'], tablefmt='grid'
+        )]
+    if previous['bench']:
+        lines += ["\nBENCH", "=" * 80, tabulate(
+            [[i, p['name'], p['position'], p['team'], _fmt_price(p), f"{p['expected_points']:.1f}"]
+             for i, p in enumerate(previous['bench'], 1)],
+            headers=['#', 'Name', 'Position', 'Team', 'Price', 'Points'], tablefmt='grid'
+        )]
+    lines += [f"\n{'=' * 80}", "PREVIOUS TEAM SUMMARY", "=" * 80, tabulate([
+        ['Total Squad Value', f"£{previous['team_value']:.1f}m"],
+        ['Bank', f"£{previous['bank']:.1f}m"],
+        ['Free Transfers', str(previous['free_transfers'])],
+        ['Formation', previous['formation']],
+    ], tablefmt='simple')]
+    return lines
+
+
+def render_text(report):
+    """Plain-text report (the same content as the GUI window)"""
+    lines = [line[0] if isinstance(line, tuple) else line for line in report_lines(report)]
+    if 'previous_team' in report:
+        lines += [""] + previous_team_lines(report)
+    return "\n".join(lines)
+
+
+def render_json(report):
+    return json.dumps(report, indent=2, ensure_ascii=False)
+
+
+def _html_table(rows, columns):
+    """HTML table of dict rows; columns is a list of (heading, key or function)"""
+    head = "".join(f"<th>{html.escape(heading)}</th>" for heading, _ in columns)
+    body = "".join(
+        "<tr>" + "".join(
+            f"<td>{html.escape(str(get(row) if callable(get) else row.get(get, '')))}</td>" for _, get in columns
+        ) + "</tr>"
+        for row in rows
+    )
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+
+def render_html(report):
+    """Static, self-contained HTML report"""
+    gw_text = f" - Gameweek {report['gameweek']}" if report['gameweek'] else ""
+    player_columns = [('Name', 'name'), ('Position', 'position'), ('Team', 'team'),
+                      ('Opponent', lambda p: p.get('opponent') or 'No fixture'), ('Price', _fmt_price),
+                      ('Points', lambda p: f"{p['expected_points']:.1f}"), ('Transfer', 'transfer_type')]
+
+    parts = [f"<h1>FPL Team Selection{html.escape(gw_text)}</h1>",
+             f"<p><b>Status:</b> {html.escape(report['status'])}</p>"]
+    if report['objective'] is not None:
+        parts.append(f"<p><b>Total expected points:</b> {report['objective']:.2f}</p>")
+    for label, key in [('Captain', 'captain'), ('Vice-captain', 'vice_captain')]:
+        name = report[key]['name'] if report[key] else 'None selected'
+        parts.append(f"<p><b>{label}:</b> {html.escape(str(name))}</p>")
+
+    transfers = report['transfers']
+    if transfers['total'] > 0:
+        parts.append(f"<p><b>Transfers:</b> {transfers['total']} ({transfers['free']} free, "
+                     f"{transfers['paid']} paid, -{transfers['points_hit']} pts)</p>")
+
+    parts.append("<h2>Starting XI</h2>")
+    parts.append(_html_table(report['starting'], player_columns + [('Role', _role)]))
+    parts.append("<h2>Bench</h2>")
+    parts.append(_html_table(report['bench'], [('#', 'bench_order')] + player_columns))
+    if report['out']:
+        parts.append("<h2>Out Transfers</h2>")
+        parts.append(_html_table(report['out'], player_columns))
+    parts.append("<h2>Summary</h2>")
+    parts.append(f"<p>Formation {html.escape(report['formation'])}, total cost £{report['total_cost']:.1f}m</p>")
+
+    style = ("body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:1em}"
+             "th,td{border:1px solid #ccc;padding:4px 8px;text-align:left}th{background:#eee}")
+    return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>FPL Team Selection{html.escape(gw_text)}"
+            f"</title><style>{style}</style></head><body>{''.join(parts)}</body></html>\n")
+
+
+RENDERERS = {'json': render_json, 'txt': render_text, 'html': render_html}
+
+
+def write_report(report, path_stem, formats=('json',)):
+    """
+    Write a report in one or more formats.
+
+    Args:
+        report: Dictionary from build_report
+        path_stem: Output path without extension (e.g. 'output/gw_5')
+        formats: Any of 'json', 'txt', 'html'
+
+    Returns:
+        list: Paths written
+    """
+    directory = os.path.dirname(path_stem)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    paths = []
+    for fmt in formats:
+        path = f"{path_stem}.{fmt}"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(RENDERERS[fmt](report))
+        paths.append(path)
+    return paths
@@ -0,0 +1,185 @@
+# risk_objective.py
+# Scenario-based risk terms (CVaR or probability of beating a target) for the objective function
+
+import numpy as np
+from pulp import lpSum, LpVariable
+
+from simulation import PointsSimulator
+
+STARTING_VARS = ['stay_starting', 'bench_to_starting', 'in_to_starting_free', 'in_to_starting_paid']
+
+# Most players a plan can start and buy, for the target measure's big-M
+STARTERS = 11
+SQUAD_SIZE = 15
+
+
+class ScenarioRiskModel:
+    """
+    Generate and reduce xP scenarios for a risk-aware objective.
+
+    Scenarios are drawn with PointsSimulator and reduced to a handful of
+    weighted representatives with k-means. Because each centroid is the mean of
+    its cluster, the weighted scenarios keep the sample expectation exactly.
+    """
+
+    def __init__(self, measure='cvar', risk_weight=0.5, alpha=0.2, target_points=None,
+                 n_scenarios=2000, n_reduced=40, seed=None, simulator_kwargs=None):
+        """
+        Initialize the risk model
+
+        Args:
+            measure (str): 'cvar' (mean of the worst alpha share of outcomes) or
+                           'target' (probability of scoring at least target_points)
+            risk_weight (float): Weight of the risk term. For 'cvar' it scales points;
+                                 for 'target' it is the points traded for a 100% probability
+            alpha (float): Tail share used by CVaR (default: worst 20%)
+            target_points (float): Points needed to beat the rank threshold ('target' only)
+            n_scenarios (int): Scenarios sampled before reduction
+            n_reduced (int): Representative scenarios kept in the model
+            seed (int): Random seed
+            simulator_kwargs (dict): Extra arguments for PointsSimulator
+        """
+        if measure not in ('cvar', 'target'):
+            raise ValueError(f"Unknown risk measure: {measure}")
+        if measure == 'target' and target_points is None:
+            raise ValueError("target_points is required for the 'target' risk measure")
+
+        self.measure = measure
+        self.risk_weight = risk_weight
+        self.alpha = alpha
+        self.target_points = target_points
+        self.n_scenarios = n_scenarios
+        self.n_reduced = n_reduced
+        self.seed = seed
+        self.simulator_kwargs = simulator_kwargs or {}
+
+        self.scenario_points = None
+        self.scenario_weights = None
+
+    def generate_scenarios(self, df_players):
+        """
+        Sample scenarios for every player and reduce them.
+
+        Returns:
+            tuple: (scenario_points, scenario_weights) with shapes (n_reduced, n_players) and (n_reduced,)
+        """
+        simulator = PointsSimulator(df_players, seed=self.seed, **self.simulator_kwargs)
+        points, _ = simulator.sample(self.n_scenarios)
+
+        # Only players who can score carry information for clustering
+        active = simulator.play_prob > 0
+        self.scenario_points, self.scenario_weights = reduce_scenarios(
+            points, self.n_reduced, features=points[:, active], seed=self.seed
+        )
+        return self.scenario_points, self.scenario_weights
+
+
+def reduce_scenarios(points, n_reduced, features=None, n_iter=15, seed=None):
+    """
+    Reduce scenarios to weighted cluster means with k-means.
+
+    Args:
+        points: Array (n_scenarios, n_players) of scenario points
+        n_reduced (int): Number of representative scenarios
+        features: Optional array used for clustering (default: points)
+        n_iter (int): k-means iterations
+        seed (int): Random seed for the initial centroids
+
+    Returns:
+        tuple: (reduced_points, weights)
+    """
+    n_scenarios = len(points)
+    if n_reduced >= n_scenarios:
+        return points, np.full(n_scenarios, 1.0 / n_scenarios)
+
+    features = points if features is None else features
+    features = np.asarray(features, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    centroids = features[rng.choice(n_scenarios, n_reduced, replace=False)]
+
+    sq_norms = (features ** 2).sum(axis=1)
+    for _ in range(n_iter):
+        # Squared distances via the dot-product expansion (avoids an n x k x d tensor)
+        distances = sq_norms[:, None] - 2 * features @ centroids.T + (centroids ** 2).sum(axis=1)
+        labels = distances.argmin(axis=1)
+        counts = np.bincount(labels, minlength=n_reduced)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, features)
+        non_empty = counts > 0
+        centroids[non_empty] = sums[non_empty] / counts[non_empty, None]
+
+    labels = (sq_norms[:, None] - 2 * features @ centroids.T + (centroids ** 2).sum(axis=1)).argmin(axis=1)
+    counts = np.bincount(labels, minlength=n_reduced)
+    reduced = np.zeros((n_reduced, points.shape[1]), dtype=np.float64)
+    np.add.at(reduced, labels, points)
+
+    keep = counts > 0
+    reduced = reduced[keep] / counts[keep, None]
+    weights = counts[keep] / n_scenarios
+    return reduced, weights
+
+
+def add_risk_terms_to_objective(prob, df_players, vars, risk_model, penalty_points=4):
+    """
+    Add scenario-based risk terms to the objective function.
+
+    Compact formulation: each scenario score is a single linear expression over
+    the existing starting and captain variables, so no per-scenario copy of the
+    player variables is needed. CVaR uses the Rockafellar-Uryasev form
+    (one free variable plus one shortfall variable per scenario); the target
+    measure uses one binary hit indicator per scenario.
+
+    Args:
+        prob: PuLP problem instance
+        df_players: DataFrame with player data
+        vars: Dictionary of decision variables
+        risk_model: ScenarioRiskModel instance
+        penalty_points: Points penalty for paid transfers
+
+    Returns:
+        list: Risk terms to add to the objective function
+    """
+    if risk_model.scenario_points is None:
+        risk_model.generate_scenarios(df_players)
+
+    scenario_points = risk_model.scenario_points
+    weights = risk_model.scenario_weights
+    print(f"Adding {risk_model.measure} risk terms over {len(weights)} reduced scenarios "
+          f"(from {risk_model.n_scenarios}, weight {risk_model.risk_weight})")
+
+    indices = list(df_players.index)
+    transfer_hits = penalty_points * lpSum(
+        vars['in_to_starting_paid'][idx] + vars['in_to_bench_paid'][idx] for idx in indices
+    )
+
+    def scenario_score(row):
+        return lpSum(
+            row[i] * (lpSum(vars[var_type][idx] for var_type in STARTING_VARS) + vars['captain'][idx])
+            for i, idx in enumerate(indices) if row[i] != 0
+        ) - transfer_hits
+
+    risk_terms = []
+
+    if risk_model.measure == 'cvar':
+        eta = LpVariable("cvar_threshold")
+        shortfalls = []
+        for s, row in enumerate(scenario_points):
+            shortfall = LpVariable(f"cvar_shortfall_{s}", lowBound=0)
+            prob += shortfall >= eta - scenario_score(row), f"CVaR_Shortfall_{s}"
+            shortfalls.append(weights[s] * shortfall)
+
+        risk_terms.append(risk_model.risk_weight * eta)
+        risk_terms.append(-(risk_model.risk_weight / risk_model.alpha) * lpSum(shortfalls))
+
+    else:
+        target = risk_model.target_points
+        for s, row in enumerate(scenario_points):
+            hit = LpVariable(f"target_hit_{s}", cat='Binary')
+            # Scores can be negative (negative player points, transfer hits), so hit = 0 must
+            # relax the constraint down to the lowest possible score: the 11 worst players,
+            # all doubled by the captaincy bound, minus a hit on every squad place
+            lowest = 2 * np.sort(np.minimum(row, 0))[:STARTERS].sum() - SQUAD_SIZE * penalty_points
+            prob += scenario_score(row) >= lowest + (target - lowest) * hit, f"Target_Hit_{s}"
+            risk_terms.append(risk_model.risk_weight * weights[s] * hit)
+
+    return risk_terms
@@ -0,0 +1,551 @@
+# season_simulator.py
+# Play transfer policies through many synthetic seasons to estimate the distribution of final points
+
+import argparse
+import contextlib
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtest import HIT_COST, INITIAL_BUDGET, MAX_FREE_TRANSFERS, replay_gameweek
+from chip_planner import solve_best_squad
+from lineup_solver import SQUAD_POSITIONS, lineup_scores, select_lineups, solve_lineup, squad_layout
+from simulation import PointsSimulator, position_codes, score_lineups
+from synthetic import PRICE_FLOOR, make_fixtures, make_player_pool
+
+STATUS_CODES = np.array(['a', 'd', 'i', 's'])
+
+# Weekly status transitions (rows: from, columns: to, both in STATUS_CODES order)
+STATUS_TRANSITIONS = np.array([
+    [0.955, 0.020, 0.020, 0.005],   # available - knocks, injuries and the odd ban
+    [0.450, 0.250, 0.300, 0.000],   # doubtful - most recover, some are ruled out
+    [0.150, 0.150, 0.700, 0.000],   # injured - about six weeks out on average
+    [0.650, 0.000, 0.000, 0.350],   # suspended - one or two matches
+])
+
+# Share of xP shown for each status (as make_player_pool) and chance of playing relative to an available player
+STATUS_XP_FACTOR = np.array([1.0, 0.5, 0.0, 0.0])
+STATUS_PLAY_FACTOR = np.array([1.0, 0.5, 0.0, 0.0])
+
+# Price moves by PRICE_STEP with PRICE_CHANGE_PROBABILITY a week while form (smoothed
+# points above or below the true mean) is past these thresholds
+PRICE_STEP = 0.1
+PRICE_RISE_FORM = 1.5
+PRICE_FALL_FORM = -1.0
+PRICE_CHANGE_PROBABILITY = 0.35
+FORM_SMOOTHING = 0.6
+
+# Named policies: (kind, parameters)
+DEFAULT_POLICIES = {
+    'hold': ('greedy', {'max_transfers': 0}),
+    'greedy': ('greedy', {}),
+    'greedy_hits': ('greedy', {'max_transfers': 2, 'allow_hits': True}),
+    'optimiser': ('optimiser', {}),
+}
+
+
+class SeasonWorld:
+    """
+    Synthetic gameweeks for many seasons at once, all arrays shaped (n_seasons, n_players).
+
+    Each week every season draws its own status flips (a Markov chain over
+    STATUS_CODES), ability drift (a log AR(1) around the snapshot's xP), noisy
+    xP forecasts and correlated points from PointsSimulator; prices then move
+    with form. Fixtures are a fresh random pairing each week, shared by all
+    seasons. Nothing here depends on the policy, so policies played on worlds
+    with the same seed see exactly the same seasons.
+    """
+
+    def __init__(self, df_players, n_seasons, seed=None, ability_persistence=0.9, ability_volatility=0.1,
+                 forecast_noise=0.15, first_gameweek=1):
+        """
+        Initialize the world from a player snapshot
+
+        Args:
+            df_players: DataFrame with player data; team ids must run 1..n_teams (as FPL and make_player_pool)
+            n_seasons (int): Seasons simulated side by side
+            seed: Random seed (int or np.random.SeedSequence)
+            ability_persistence (float): Weekly autocorrelation of each player's log ability drift
+            ability_volatility (float): Weekly standard deviation of the log ability drift
+            forecast_noise (float): Log-scale noise of the xP the policies see around the true mean
+            first_gameweek (int): Gameweek of the first step
+        """
+        self.base = df_players.drop(columns=['chance_of_playing_next_round'], errors='ignore').copy()
+        self.base['status'] = 'a'
+        self.n_seasons = n_seasons
+        self.n_players = len(df_players)
+        self.rng = np.random.default_rng(seed)
+        self.ability_persistence = ability_persistence
+        self.ability_volatility = ability_volatility
+        self.forecast_noise = forecast_noise
+        self.gameweek = first_gameweek - 1
+
+        self.team_ids = df_players['team_id'].to_numpy()
+        self.n_teams = int(self.team_ids.max())
+        self.team_names = df_players.groupby('team_id')['team'].first()
+        self.ability = pd.to_numeric(df_players['expected_points'], errors='coerce').fillna(0).to_numpy(dtype=float)
+        self.price_floor = df_players['position'].map(PRICE_FLOOR).fillna(0).to_numpy(dtype=float)
+
+        # Every player starts the season available at the snapshot's price
+        shape = (n_seasons, self.n_players)
+        self.status = np.zeros(shape, dtype=np.int8)
+        self.drift = np.zeros(shape)
+        self.form = np.zeros(shape)
+        self.price = np.tile(df_players['price'].to_numpy(dtype=float), (n_seasons, 1))
+        self._transition_cdf = np.cumsum(STATUS_TRANSITIONS, axis=1)
+
+    def _advance(self):
+        """Status flips and ability drift between gameweeks"""
+        u = self.rng.random(self.status.shape)
+        self.status = (u[..., None] > self._transition_cdf[self.status]).sum(axis=-1).astype(np.int8)
+        self.drift = (self.ability_persistence * self.drift
+                      + self.ability_volatility * self.rng.standard_normal(self.drift.shape))
+
+    def step(self):
+        """
+        Draw the next gameweek for every season.
+
+        Returns:
+            tuple: (view, outcome) where view holds what a policy may use before the
+                   deadline (gameweek, opponent_id, opponent, expected_points, price,
+                   status codes) and outcome the points and played arrays
+        """
+        if self.gameweek >= 1:
+            self._advance()
+        self.gameweek += 1
+
+        opponents = make_fixtures(self.n_teams, self.rng)
+        opponent_id = np.array([opponents.get(int(team), np.nan) for team in self.team_ids], dtype=float)
+        has_fixture = ~np.isnan(opponent_id)
+
+        # What the manager sees: a noisy forecast of the true mean, cut by status
+        drift = np.exp(self.drift)
+        noise = np.exp(self.forecast_noise * self.rng.standard_normal(self.drift.shape) - 0.5 * self.forecast_noise ** 2)
+        expected_points = np.round(self.ability * drift * noise * STATUS_XP_FACTOR[self.status] * has_fixture, 1)
+
+        # Outcomes: one PointsSimulator scenario per season on the snapshot's xP, scaled by
+        # each season's drift; doubtful players play half as often, injured and banned never
+        frame = self.base.assign(opponent_id=opponent_id, gameweek=self.gameweek)
+        frame['opponent'] = self._opponent_names(opponent_id)
+        simulator = PointsSimulator(frame, seed=self.rng.integers(2**32))
+        points, played = simulator.sample(self.n_seasons)
+        played &= self.rng.random(played.shape, dtype=np.float32) < STATUS_PLAY_FACTOR[self.status]
+        points = np.where(played, points * drift, 0.0)
+
+        view = {
+            'gameweek': self.gameweek,
+            'opponent_id': opponent_id,
+            'opponent': frame['opponent'].to_numpy(),
+            'expected_points': expected_points,
+            'price': self.price.copy(),
+            'status': self.status.copy(),
+        }
+        self._update_prices(points, self.ability * drift)
+        return view, {'points': points, 'played': played}
+
+    def _opponent_names(self, opponent_id):
+        names = pd.Series(opponent_id).map(self.team_names)
+        return names.fillna('No fixture').to_numpy()
+
+    def _update_prices(self, points, true_mean):
+        """Move prices one step with form; injured players' zeros drag theirs down"""
+        self.form = FORM_SMOOTHING * self.form + (1 - FORM_SMOOTHING) * (points - true_mean)
+        change = self.rng.random(self.form.shape) < PRICE_CHANGE_PROBABILITY
+        step = PRICE_STEP * ((change & (self.form > PRICE_RISE_FORM)).astype(int)
+                             - (change & (self.form < PRICE_FALL_FORM)).astype(int))
+        self.price = np.maximum(np.round(self.price + step, 1), self.price_floor)
+
+    def snapshot(self, view, season):
+        """One season's gameweek as a df_players snapshot (same columns as the input)"""
+        df_players = self.base.copy()
+        df_players['opponent_id'] = view['opponent_id']
+        df_players['opponent'] = view['opponent']
+        df_players['price'] = view['price'][season]
+        df_players['expected_points'] = view['expected_points'][season]
+        df_players['status'] = STATUS_CODES[view['status'][season]]
+        df_players['gameweek'] = view['gameweek']
+        return df_players
+
+
+class GreedyPolicy:
+    """
+    Fast-path policy played for all seasons at once with NumPy.
+
+    Each pass makes, per season, the single transfer with the largest lineup
+    gain (best XI plus captain, as lineup_scores) that respects the bank, the
+    3-per-club rule and availability (only status 'a' players can be bought, as
+    add_availability_constraints). For a given outgoing slot the best incoming
+    player is simply the highest-xP eligible one, since lineup points never fall
+    when one player's xP rises, so each pass costs 15 masked argmaxes. A
+    transfer is made when its gain beats min_gain, plus the hit when no free
+    transfer is left (and hits are allowed).
+    """
+
+    def __init__(self, world, initial, max_transfers=1, min_gain=0.5, allow_hits=False, hit_cost=HIT_COST,
+                 max_per_team=3):
+        """
+        Args:
+            world: SeasonWorld the policy plays in
+            initial: Initial squad dict from initial_squad
+            max_transfers (int): Most transfers per gameweek (0 holds the squad)
+            min_gain (float): Expected-points gain a transfer must clear (after any hit)
+            allow_hits (bool): Take paid transfers once the free ones are used
+            hit_cost: Points per paid transfer
+            max_per_team (int): Players allowed from one club
+        """
+        n_seasons = world.n_seasons
+        self.max_transfers = max_transfers
+        self.min_gain = min_gain
+        self.allow_hits = allow_hits
+        self.hit_cost = hit_cost
+        self.max_per_team = max_per_team
+
+        self.team_codes = world.team_ids - 1
+        self.n_teams = world.n_teams
+        positions = position_codes(world.base)
+        self.position_players = {code: np.flatnonzero(positions == code) for code in range(4)}
+
+        self.squads = np.tile(initial['squad'], (n_seasons, 1))
+        self.bank = np.full(n_seasons, float(initial['bank']))
+        self.free_transfers = np.full(n_seasons, initial['free_transfers'])
+
+    def _best_transfers(self, xp, price, available):
+        """Best single transfer per season: (slot, incoming player or -1, lineup gain)"""
+        n_seasons = len(self.squads)
+        rows = np.arange(n_seasons)
+        squad_xp = np.take_along_axis(xp, self.squads, axis=1)
+
+        owned = np.zeros(xp.shape, dtype=bool)
+        owned[rows[:, None], self.squads] = True
+        squad_teams = self.team_codes[self.squads]
+        counts = (squad_teams[:, :, None] == np.arange(self.n_teams)).sum(axis=1)
+
+        best_in = np.full((n_seasons, 15), -1)
+        best_xp = np.full((n_seasons, 15), -np.inf)
+        for slot, code in enumerate(SQUAD_POSITIONS):
+            candidates = self.position_players[code]
+            out_player = self.squads[:, slot]
+            limit = price[rows, out_player] + self.bank
+            candidate_teams = self.team_codes[candidates]
+            team_after = counts[:, candidate_teams] + 1 - (candidate_teams[None, :] == squad_teams[:, slot][:, None])
+
+            eligible = (available[:, candidates] & ~owned[:, candidates]
+                        & (price[:, candidates] <= limit[:, None] + 1e-9) & (team_after <= self.max_per_team))
+            scores = np.where(eligible, xp[:, candidates], -np.inf)
+            pick = np.argmax(scores, axis=1)
+            best_xp[:, slot] = scores[rows, pick]
+            best_in[:, slot] = np.where(np.isfinite(best_xp[:, slot]), candidates[pick], -1)
+
+        # Lineup points of the 15 one-swap squads of every season in one call
+        trial = np.repeat(squad_xp[:, None, :], 15, axis=1)
+        diagonal = np.arange(15)
+        trial[:, diagonal, diagonal] = np.where(best_in >= 0, best_xp, squad_xp)
+        gains = lineup_scores(trial.reshape(-1, 15)).reshape(n_seasons, 15) - lineup_scores(squad_xp)[:, None]
+        gains = np.where(best_in >= 0, gains, -np.inf)
+
+        slot = np.argmax(gains, axis=1)
+        return slot, best_in[rows, slot], gains[rows, slot]
+
+    def play(self, view, outcome):
+        """
+        Make this gameweek's transfers, pick the XI and score every season.
+
+        Returns:
+            dict: Per-season arrays points, transfers, hits, expected_points and team_value
+        """
+        xp, price = view['expected_points'], view['price']
+        available = view['status'] == 0
+        n_seasons = len(self.squads)
+        rows = np.arange(n_seasons)
+        transfers = np.zeros(n_seasons, dtype=int)
+        hits = np.zeros(n_seasons, dtype=int)
+
+        for _ in range(self.max_transfers):
+            slot, incoming, gain = self._best_transfers(xp, price, available)
+            paid = transfers >= self.free_transfers
+            make = (incoming >= 0) & (gain - np.where(paid, self.hit_cost, 0) > self.min_gain) & (~paid | self.allow_hits)
+            if not make.any():
+                break
+            seasons = np.flatnonzero(make)
+            outgoing = self.squads[seasons, slot[seasons]]
+            self.bank[seasons] = np.round(self.bank[seasons] + price[seasons, outgoing]
+                                          - price[seasons, incoming[seasons]], 1)
+            self.squads[seasons, slot[seasons]] = incoming[seasons]
+            transfers[seasons] += 1
+            hits[seasons] += paid[seasons]
+
+        self.free_transfers = np.minimum(MAX_FREE_TRANSFERS, np.maximum(self.free_transfers - transfers, 0) + 1)
+
+        # XI and captain by xP; slot order for score_lineups is starters, bench GK,
+        # then outfield bench by xP
+        squad_xp = np.take_along_axis(xp, self.squads, axis=1)
+        starting, captain = select_lineups(squad_xp)
+        others = starting & (np.arange(15) != captain[:, None])
+        vice_captain = np.argmax(np.where(others, squad_xp, -np.inf), axis=1)
+
+        group = np.where(starting, 0, np.where(SQUAD_POSITIONS == 0, 1, 2))
+        order = np.lexsort((-squad_xp, group))
+        slots = np.take_along_axis(self.squads, order, axis=1)
+        points = score_lineups(
+            np.take_along_axis(outcome['points'], slots, axis=1),
+            np.take_along_axis(outcome['played'], slots, axis=1),
+            SQUAD_POSITIONS[order],
+            np.argmax(order == captain[:, None], axis=1),
+            np.argmax(order == vice_captain[:, None], axis=1),
+        )
+        return {
+            'points': points,
+            'transfers': transfers,
+            'hits': hits,
+            'expected_points': lineup_scores(squad_xp),
+            'team_value': price[rows[:, None], self.squads].sum(axis=1) + self.bank,
+        }
+
+
+class OptimiserPolicy:
+    """
+    The weekly transfer MILP (backtest.replay_gameweek) run season by season.
+
+    Each season's gameweek becomes a df_players snapshot, so sampled status
+    flips reach add_availability_constraints and price changes the budget
+    constraint. About one CBC solve per season-week: use it to check the fast
+    path on tens of seasons, not for thousands.
+    """
+
+    def __init__(self, world, initial, time_limit=None, **params):
+        """
+        Args:
+            world: SeasonWorld the policy plays in
+            initial: Initial squad dict from initial_squad
+            time_limit: Optional CBC time limit per solve in seconds
+            **params: Model parameters (backtest.MODEL_PARAMS)
+        """
+        self.world = world
+        self.time_limit = time_limit
+        self.params = params
+        self.states = [dict(initial['state']) for _ in range(world.n_seasons)]
+
+    def play(self, view, outcome):
+        """
+        Solve and score this gameweek for every season.
+
+        Returns:
+            dict: Per-season arrays points, transfers, hits, expected_points and team_value
+        """
+        records = []
+        for season, state in enumerate(self.states):
+            df_players = self.world.snapshot(view, season)
+            live = pd.DataFrame({
+                'total_points': outcome['points'][season],
+                'minutes': np.where(outcome['played'][season], 90, 0),
+            }, index=df_players['id'].to_numpy())
+            record, self.states[season] = replay_gameweek(df_players, state, live, self.params, self.time_limit)
+            records.append(record)
+
+        return {
+            'points': np.array([record['points'] for record in records]),
+            'transfers': np.array([record['transfers'] for record in records]),
+            'hits': np.array([record['hits'] for record in records]),
+            'expected_points': np.array([record['expected_points'] for record in records]),
+            'team_value': np.array([record['team_value'] + record['bank'] for record in records]),
+        }
+
+
+POLICY_CLASSES = {'greedy': GreedyPolicy, 'optimiser': OptimiserPolicy}
+
+
+def initial_squad(df_players, budget=INITIAL_BUDGET, time_limit=None):
+    """
+    Season-start squad shared by every policy and season: the initial-squad
+    model's best 15 on the snapshot, with the XI from lineup_solver.
+
+    Returns:
+        dict: squad (15 integer positions in canonical layout), bank, free_transfers
+              and the equivalent backtest state
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        labels, _ = solve_best_squad(df_players, budget=budget, time_limit=time_limit)
+    if labels is None:
+        raise ValueError("No valid initial squad in the snapshot")
+    lineup = solve_lineup(df_players, labels)
+    bank = round(budget - df_players.loc[labels, 'price'].sum(), 1) or 0.0
+    return {
+        'squad': df_players.index.get_indexer(squad_layout(df_players, labels)),
+        'bank': bank,
+        'free_transfers': 1,
+        'state': {
+            'starting_ids': df_players.loc[lineup['starting'], 'id'].tolist(),
+            'bench_ids': df_players.loc[lineup['bench'], 'id'].tolist(),
+            'bank': bank,
+            'free_transfers': 1,
+        },
+    }
+
+
+def _resolve_policies(policies):
+    """Policy names or {name: (kind, params)} as a {name: (kind, params)} dict"""
+    if isinstance(policies, dict):
+        resolved = dict(policies)
+    else:
+        resolved = {name: DEFAULT_POLICIES[name] for name in policies}
+    unknown = {kind for kind, _ in resolved.values()} - set(POLICY_CLASSES)
+    if unknown:
+        raise ValueError(f"Unknown policy kinds: {sorted(unknown)}")
+    return resolved
+
+
+def _simulate_batch(task):
+    """Play every policy through one batch of seasons on a shared world"""
+    df_players = task['df_players']
+    world = SeasonWorld(df_players, task['n_seasons'], seed=task['seed'], **task['world_params'])
+    players = {name: POLICY_CLASSES[kind](world, task['initial'], **params)
+               for name, (kind, params) in task['policies'].items()}
+
+    keys = ['points', 'transfers', 'hits', 'expected_points']
+    totals = {name: {key: np.zeros(task['n_seasons']) for key in keys} for name in players}
+    seconds = dict.fromkeys(players, 0.0)
+    last = {}
+    for _ in range(task['n_gameweeks']):
+        view, outcome = world.step()
+        for name, player in players.items():
+            start = time.perf_counter()
+            result = player.play(view, outcome)
+            seconds[name] += time.perf_counter() - start
+            for key in keys:
+                totals[name][key] += result[key]
+            last[name] = result
+
+    frames = []
+    for name, total in totals.items():
+        frames.append(pd.DataFrame({
+            'policy': name,
+            'season': task['first_season'] + np.arange(task['n_seasons']),
+            'points': total['points'],
+            'hits': total['hits'].astype(int),
+            'net_points': total['points'] - HIT_COST * total['hits'],
+            'transfers': total['transfers'].astype(int),
+            'expected_points': total['expected_points'],
+            'final_value': np.round(last[name]['team_value'], 1) if name in last else np.nan,
+            'seconds': seconds[name] / task['n_seasons'],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def simulate_seasons(df_players=None, n_seasons=1000, n_gameweeks=38, policies=('hold', 'greedy'), initial=None,
+                     batch_size=250, n_workers=None, seed=0, **world_params):
+    """
+    Play policies through many synthetic seasons, in batches across processes.
+
+    Seasons in a batch are simulated side by side (SeasonWorld) and every
+    policy plays the same seasons, so differences between policies are paired.
+
+    Args:
+        df_players: Season-start snapshot (default: make_player_pool(seed=seed))
+        n_seasons (int): Seasons per policy
+        n_gameweeks (int): Gameweeks per season
+        policies: DEFAULT_POLICIES names, or {name: (kind, params)} with kind 'greedy' or 'optimiser'
+        initial: Initial squad dict (default: initial_squad on df_players)
+        batch_size (int): Seasons simulated together in one process
+        n_workers: Worker processes (default: CPU count; 1 runs inline)
+        seed (int): Seed for the batch worlds
+        **world_params: SeasonWorld options (ability_persistence, ability_volatility, forecast_noise)
+
+    Returns:
+        pd.DataFrame: One row per policy and season with points, hits, net_points,
+                      transfers, expected_points, final_value and seconds (policy time per season)
+    """
+    df_players = make_player_pool(seed=seed) if df_players is None else df_players
+    initial = initial_squad(df_players) if initial is None else initial
+    policies = _resolve_policies(policies)
+
+    sizes = [min(batch_size, n_seasons - start) for start in range(0, n_seasons, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [
+        {'df_players': df_players, 'initial': initial, 'policies': policies, 'n_seasons': size,
+         'n_gameweeks': n_gameweeks, 'seed': batch_seed, 'first_season': i * batch_size, 'world_params': world_params}
+        for i, (size, batch_seed) in enumerate(zip(sizes, seeds))
+    ]
+
+    if n_workers == 1 or len(tasks) == 1:
+        frames = [_simulate_batch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            frames = list(pool.map(_simulate_batch, tasks))
+    return pd.concat(frames, ignore_index=True)
+
+
+def summarise_seasons(results, baseline=None):
+    """
+    Distribution of net season points per policy.
+
+    Args:
+        results: Output of simulate_seasons
+        baseline: Policy the paired differences are taken against (default: the first)
+
+    Returns:
+        pd.DataFrame: One row per policy with mean, std, percentiles, hits,
+                      transfers and the mean paired difference to the baseline with a 95% interval
+    """
+    names = list(pd.unique(results['policy']))
+    baseline = names[0] if baseline is None else baseline
+    net = results.pivot(index='season', columns='policy', values='net_points')
+
+    rows = []
+    for name in names:
+        group = results[results['policy'] == name]
+        diff = (net[name] - net[baseline]).dropna()
+        half_width = 1.96 * diff.std(ddof=1) / np.sqrt(len(diff)) if len(diff) > 1 else np.nan
+        rows.append({
+            'policy': name,
+            'seasons': len(group),
+            'mean': round(group['net_points'].mean(), 1),
+            'std': round(group['net_points'].std(), 1),
+            'p5': round(group['net_points'].quantile(0.05), 1),
+            'p25': round(group['net_points'].quantile(0.25), 1),
+            'median': round(group['net_points'].median(), 1),
+            'p75': round(group['net_points'].quantile(0.75), 1),
+            'p95': round(group['net_points'].quantile(0.95), 1),
+            'hits': round(group['hits'].mean(), 1),
+            'transfers': round(group['transfers'].mean(), 1),
+            'vs_baseline': round(diff.mean(), 1),
+            'vs_baseline_ci': round(half_width, 1),
+            'seconds_per_season': round(group['seconds'].mean(), 3),
+        })
+    return pd.DataFrame(rows)
+
+
+def print_season_summary(summary):
+    """Net season points per policy, best first"""
+    print("\n🎲 SIMULATED SEASONS")
+    print("=" * 110)
+    print(summary.sort_values('mean', ascending=False).to_string(index=False))
+    print("=" * 110)
+
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate transfer policies over synthetic seasons")
+    parser.add_argument('--snapshot', help="Season-start df_players CSV (default: a synthetic pool)")
+    parser.add_argument('--players', type=int, default=700)
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--seasons', type=int, default=1000)
+    parser.add_argument('--gameweeks', type=int, default=38)
+    parser.add_argument('--policies', nargs='+', default=['hold', 'greedy', 'greedy_hits'], choices=list(DEFAULT_POLICIES))
+    parser.add_argument('--batch-size', type=int, default=250)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--forecast-noise', type=float, default=0.15)
+    parser.add_argument('--output', help="Optional CSV of per-season results")
+    args = parser.parse_args()
+
+    df_players = pd.read_csv(args.snapshot) if args.snapshot else make_player_pool(args.players, args.teams, seed=args.seed)
+    start = time.perf_counter()
+    results = simulate_seasons(df_players, args.seasons, args.gameweeks, args.policies, batch_size=args.batch_size,
+                               n_workers=args.workers, seed=args.seed, forecast_noise=args.forecast_noise)
+    print_season_summary(summarise_seasons(results))
+    print(f"⏱️ {args.seasons} seasons x {len(args.policies)} policies in {time.perf_counter() - start:.1f}s")
+    if args.output:
+        results.to_csv(args.output, index=False)
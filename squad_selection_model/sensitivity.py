@@ -0,0 +1,630 @@
+# sensitivity.py
+# "What would it take" analysis: xP change needed for each player to enter the plan or be sold
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from pulp import PULP_CBC_CMD, LpConstraint, LpConstraintEQ, LpProblem, LpStatus, lpSum, value
+
+from lineup_solver import LINEUP_MASKS, LINEUP_PAIR_MASKS, PAIR_I, PAIR_J, lineup_scores, squad_layout
+from simulation import position_codes
+from transfer_search import dominance_pool
+
+# Decision variables that put a player in the starting XI / on the bench of the final squad
+STARTING_VARIABLE_TYPES = ['stay_starting', 'bench_to_starting', 'in_to_starting_free', 'in_to_starting_paid']
+BENCH_VARIABLE_TYPES = ['stay_bench', 'starting_to_bench', 'in_to_bench_free', 'in_to_bench_paid']
+
+# Previous-gameweek status codes used by the swap enumeration
+NOT_OWNED, OWNED_STARTING, OWNED_BENCH = 0, 1, 2
+
+# Objective values closer than this are treated as ties
+TOLERANCE = 1e-6
+
+
+def _problem_to_dict(prob):
+    """Serialise a PuLP problem (toDict on PuLP 3, to_dict before)"""
+    return prob.toDict() if hasattr(prob, 'toDict') else prob.to_dict()
+
+
+def _problem_from_dict(data):
+    """Rebuild a PuLP problem as (variables by name, problem)"""
+    return LpProblem.fromDict(data) if hasattr(LpProblem, 'fromDict') else LpProblem.from_dict(data)
+
+
+def _variable_names(vars, var_types, idx):
+    return [vars[var_type][idx].name for var_type in var_types]
+
+
+@contextmanager
+def _preserved_solution(prob):
+    """Restore prob's variable values and status after re-solving it in place"""
+    saved = [(var, var.varValue) for var in prob.variables()]
+    status = prob.status
+    try:
+        yield
+    finally:
+        for var, var_value in saved:
+            var.varValue = var_value
+        prob.status = status
+
+
+def _solve_forced(prob, variables, forced, time_limit=None):
+    """
+    Solve prob with some variable sums fixed, then remove those constraints again.
+
+    Args:
+        prob: PuLP problem (modified in place while solving)
+        variables: Dictionary of prob's variables by name
+        forced: List of (variable names, right-hand side) pairs; each sum is fixed to the value
+        time_limit: Optional CBC time limit in seconds
+
+    Returns:
+        float: Optimal objective, or -inf when infeasible
+    """
+    names = []
+    for k, (var_names, rhs) in enumerate(forced):
+        names.append(f"Sensitivity_Force_{k}")
+        prob += LpConstraint(lpSum(variables[name] for name in var_names), LpConstraintEQ, names[-1], rhs)
+    status = prob.solve(PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+    for name in names:
+        del prob.constraints[name]
+    if LpStatus[status] != 'Optimal':
+        return -np.inf
+    return value(prob.objective)
+
+
+def _forced_objectives(prob, jobs, n_workers=1, time_limit=None):
+    """
+    Run every forced re-solve in jobs.
+
+    With one worker the original problem is re-used in place and its solution
+    restored afterwards. With more, each thread rebuilds its own copy once and
+    re-uses it for all of its jobs; CBC runs as a separate process per solve,
+    so the threads overlap the solver time.
+
+    Returns:
+        dict: job key -> objective
+    """
+    if n_workers <= 1:
+        variables = {var.name: var for var in prob.variables()}
+        with _preserved_solution(prob):
+            return {key: _solve_forced(prob, variables, forced, time_limit) for key, forced in jobs.items()}
+
+    model_dict = _problem_to_dict(prob)
+    local = threading.local()
+
+    def run(forced):
+        if not hasattr(local, 'prob'):
+            local.variables, local.prob = _problem_from_dict(model_dict)
+        return _solve_forced(local.prob, local.variables, forced, time_limit)
+
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        futures = {key: pool.submit(run, forced) for key, forced in jobs.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+
+def objective_coefficients(prob, vars, df_players):
+    """
+    Per-player objective terms of a built transfer model, read from its objective.
+
+    Reading them back means the swap enumeration scores plans exactly as the
+    model does, whatever penalty, FDR and opposing-pair settings built it.
+
+    Returns:
+        tuple: (start points (n,), captain points (n,), paid transfer penalty,
+                opposing pairs as (positions i (m,), positions j (m,), penalties (m,)))
+
+    Raises:
+        ValueError: The objective has terms other than points, hits and opposing pairs
+                    (e.g. from a risk_model), which the enumeration cannot score
+    """
+    coefficients = {var.name: coefficient for var, coefficient in prob.objective.items()}
+    model_names = {var.name for player_vars in vars.values() for var in player_vars.values()}
+    position_of = {str(idx): position for position, idx in enumerate(df_players.index)}
+
+    pair_i, pair_j, pair_penalty = [], [], []
+    for name, coefficient in coefficients.items():
+        if name in model_names:
+            continue
+        labels = name[len('opposing_pair_'):].split('_') if name.startswith('opposing_pair_') else []
+        if len(labels) != 2 or not all(label in position_of for label in labels):
+            raise ValueError(f"Sensitivity analysis cannot score objective term {name}")
+        pair_i.append(position_of[labels[0]])
+        pair_j.append(position_of[labels[1]])
+        pair_penalty.append(-coefficient)
+
+    def per_player(var_type):
+        return np.array([coefficients.get(vars[var_type][idx].name, 0.0) for idx in df_players.index])
+
+    start_points = per_player('in_to_starting_free')
+    captain_points = per_player('captain')
+    penalty = float(np.max(start_points - per_player('in_to_starting_paid'), initial=0.0))
+    pairs = (np.array(pair_i, dtype=int), np.array(pair_j, dtype=int), np.array(pair_penalty, dtype=float))
+    return start_points, captain_points, penalty, pairs
+
+
+def _pair_penalties(squads, pairs, n_players):
+    """Opposing penalty per slot pair (n_squads, 105) from the pair list of objective_coefficients"""
+    pair_i, pair_j, penalties = pairs
+    if not len(penalties):
+        return np.zeros((len(squads), len(PAIR_I)))
+    keys = np.minimum(pair_i, pair_j) * n_players + np.maximum(pair_i, pair_j)
+    order = np.argsort(keys)
+    keys, penalties = keys[order], penalties[order]
+    a, b = squads[:, PAIR_I], squads[:, PAIR_J]
+    wanted = np.minimum(a, b) * n_players + np.maximum(a, b)
+    found = np.clip(np.searchsorted(keys, wanted), 0, len(keys) - 1)
+    return np.where(keys[found] == wanted, penalties[found], 0.0)
+
+
+class SwapNeighbourhood:
+    """
+    Exact plan values for every squad within two swaps of the optimal squad.
+
+    A squad keeps its 2/5/5/3 shape, so each change is a same-position swap.
+    The first swap may bring in any player who can join (players outside the
+    current team need status 'a'); the second is drawn from a dominance-pruned
+    pool (see dominance_pool) plus the current team, which covers downgrades
+    that pay for an expensive player, upgrades paid for by a cheap one, and
+    undoing a transfer. Swaps must respect the budget and the club limit
+    together, so one can make room for the other.
+
+    One-swap squads are all scored. Two-swap squads are ranked by an upper
+    bound (the greedy XI of lineup_scores, the best captain in the squad, no
+    opposing penalty or flow rule) and scored in rounds, best bound first per
+    incoming player, until no remaining bound could change any answer.
+    """
+
+    def __init__(self, df_players, my_team, squad_positions, budget, start_points, captain_points, penalty, pairs,
+                 max_per_team=3):
+        """
+        Args:
+            df_players: DataFrame with player data
+            my_team: Team instance the model was built for
+            squad_positions: Integer positions (15,) of the optimal squad in canonical layout
+            budget: Most the squad may cost (£m)
+            start_points, captain_points, penalty, pairs: Objective terms from objective_coefficients
+            max_per_team: Players allowed from one club
+        """
+        self.n_players = len(df_players)
+        self.codes = position_codes(df_players)
+        self.prices = df_players['price'].to_numpy(dtype=float)
+        self.clubs = pd.factorize(df_players['team'])[0]
+        ids = df_players['id']
+        self.status = np.where(ids.map(my_team.is_in_starting), OWNED_STARTING,
+                               np.where(ids.map(my_team.is_on_bench), OWNED_BENCH, NOT_OWNED))
+        self.can_join = (self.status != NOT_OWNED) | (df_players['status'] == 'a').to_numpy()
+        self.free_transfers = min(my_team.free_transfers, 5)
+        self.budget = budget
+        self.max_per_team = max_per_team
+        self.start_points = start_points
+        self.captain_points = captain_points
+        self.penalty = penalty
+        self.pairs = pairs
+
+        self.squad = np.asarray(squad_positions)
+        self.in_squad = np.zeros(self.n_players, dtype=bool)
+        self.in_squad[self.squad] = True
+        self.squad_cost = self.prices[self.squad].sum()
+        self.club_count = np.bincount(self.clubs[self.squad], minlength=self.clubs.max() + 1)
+
+        self.z_bench, self.z_start, self.z_captain, self.z_sold = (np.full(self.n_players, -np.inf) for _ in range(4))
+        self.squads_scored = 0
+
+    def _joining(self, slot, candidates):
+        """Candidates (integer positions) who may take the optimal squad's slot"""
+        return candidates[(self.codes[candidates] == self.codes[self.squad[slot]]) & ~self.in_squad[candidates]
+                          & self.can_join[candidates]]
+
+    def _swapped(self, first_slot, first_in, second_slot=None, second_in=None):
+        """Squads (n, 15) with one or two slots of the optimal squad replaced"""
+        squads = np.repeat(self.squad[None, :], len(first_in), axis=0)
+        rows = np.arange(len(first_in))
+        squads[rows, first_slot] = first_in
+        if second_slot is not None:
+            squads[rows, second_slot] = second_in
+        return squads
+
+    def _hits(self, squads):
+        transfers = (self.status[squads] == NOT_OWNED).sum(axis=1)
+        return self.penalty * np.maximum(transfers - self.free_transfers, 0)
+
+    def score(self, squads, removed_slots, slots=None):
+        """
+        Score squads exactly and fold them into the per-player best values.
+
+        Args:
+            squads: Integer player positions (n_squads, 15) in canonical layout
+            removed_slots: Slots (n_squads, k) of the optimal squad each squad replaced (-1 for none)
+            slots: Optional slots (n_squads, m) whose players' role values are kept (default: all 15)
+
+        Returns:
+            np.ndarray: Best plan value per squad
+        """
+        slots = np.broadcast_to(np.arange(15), squads.shape) if slots is None else np.asarray(slots)
+        best, benched, starts, captained = score_plans(
+            squads, self.status, self.start_points, self.captain_points,
+            _pair_penalties(squads, self.pairs, self.n_players), self._hits(squads), slots)
+        players = np.take_along_axis(squads, slots, axis=1)
+        np.maximum.at(self.z_bench, players, benched)
+        np.maximum.at(self.z_start, players, starts)
+        np.maximum.at(self.z_captain, players, captained)
+        for removed in np.asarray(removed_slots).T:
+            sold = removed >= 0
+            np.maximum.at(self.z_sold, self.squad[removed[sold]], best[sold])
+        self.squads_scored += len(squads)
+        return best
+
+    def one_swaps(self):
+        """The optimal squad and every feasible one-swap squad, with the slot each replaced"""
+        everyone = np.arange(self.n_players)
+        slots, joining = [np.array([-1])], [np.array([-1])]
+        for slot, leaving in enumerate(self.squad):
+            candidates = self._joining(slot, everyone)
+            candidates = candidates[
+                (self.squad_cost - self.prices[leaving] + self.prices[candidates] <= self.budget + TOLERANCE)
+                & (self.club_count[self.clubs[candidates]] - (self.clubs[candidates] == self.clubs[leaving])
+                   < self.max_per_team)
+            ]
+            slots.append(np.full(len(candidates), slot))
+            joining.append(candidates)
+        slots, joining = np.concatenate(slots), np.concatenate(joining)
+        squads = self._swapped(np.maximum(slots, 0), np.where(slots >= 0, joining, self.squad[0]))
+        return squads, slots[:, None]
+
+    def two_swaps(self, keep_threshold=6):
+        """
+        Every feasible two-swap squad as (first slot, first player, second slot, second player) arrays.
+
+        The second player comes from the current team or the dominance pool.
+        """
+        everyone = np.arange(self.n_players)
+        owned = np.flatnonzero(self.status != NOT_OWNED)
+        pool = np.union1d(owned, np.concatenate([
+            dominance_pool(np.flatnonzero((self.codes == code) & (self.status == NOT_OWNED) & self.can_join),
+                           self.prices, self.start_points, self.clubs, keep_threshold)
+            for code in range(4)
+        ]))
+        in_pool = np.zeros(self.n_players, dtype=bool)
+        in_pool[pool] = True
+        seconds = [(slot, self._joining(slot, pool)) for slot in range(15)]
+        second_slot = np.concatenate([np.full(len(players), slot) for slot, players in seconds])
+        second_in = np.concatenate([players for _, players in seconds])
+
+        combos = []
+        for first_slot in range(15):
+            first_in = self._joining(first_slot, everyone)
+            other = second_slot != first_slot
+            s, u = second_slot[other], second_in[other]
+            p = np.repeat(first_in, len(s))
+            s, u = np.tile(s, len(first_in)), np.tile(u, len(first_in))
+            # A pool player as the first swap pairs with every second swap; count each pair once
+            keep = (u != p) & ~(in_pool[p] & (s < first_slot))
+
+            leaving_t, leaving_s = self.squad[first_slot], self.squad[s]
+            keep &= (self.squad_cost - self.prices[leaving_t] - self.prices[leaving_s] + self.prices[p]
+                     + self.prices[u] <= self.budget + TOLERANCE)
+            for joining, other_joining in ((p, u), (u, p)):
+                club = self.clubs[joining]
+                count = (self.club_count[club] - (self.clubs[leaving_t] == club) - (self.clubs[leaving_s] == club)
+                         + 1 + (self.clubs[other_joining] == club))
+                keep &= count <= self.max_per_team
+            combos.append((np.full(keep.sum(), first_slot), p[keep], s[keep], u[keep]))
+        return tuple(np.concatenate(parts) for parts in zip(*combos))
+
+    def upper_bounds(self, squads):
+        """Greedy XI (no opposing penalty, no flow rule) minus hits, and each slot's captain points"""
+        start = self.start_points[squads]
+        xi = lineup_scores(start) - start.max(axis=1) - self._hits(squads)
+        return xi, self.captain_points[squads]
+
+    def explore(self, objective, keep_threshold=6, per_player=32, batch_size=4096):
+        """
+        Score the optimal squad, all one-swap squads and every two-swap squad that could change an answer.
+
+        Args:
+            objective: Optimal objective z* (the optimal squad must reproduce it)
+            keep_threshold (int): Dominance threshold for the second-swap pool
+            per_player (int): Two-swap squads scored per incoming player and round
+            batch_size (int): Squads scored at once
+
+        Returns:
+            SwapNeighbourhood: self, with z_bench, z_start, z_captain and z_sold filled in
+        """
+        squads, removed = self.one_swaps()
+        best = np.concatenate([self.score(squads[k:k + batch_size], removed[k:k + batch_size])
+                               for k in range(0, len(squads), batch_size)])
+        if abs(best[0] - objective) > 1e-4:
+            raise ValueError(f"Swap enumeration scores the optimal squad at {best[0]:.3f}, the model at {objective:.3f}")
+
+        first_slot, first_in, second_slot, second_in = self.two_swaps(keep_threshold)
+        joining = np.stack([first_in, second_in], axis=1)
+        changed = np.stack([first_slot, second_slot], axis=1)
+        leaving = self.squad[changed]
+
+        # Upper bounds: any role, and per joining player starting or captained (bought players
+        # can only start when a previous starter is sold, as in score_plans)
+        bound = np.empty(len(first_in))
+        start_bound, captain_bound = np.empty(joining.shape), np.empty(joining.shape)
+        previous_starters = (self.status == OWNED_STARTING).sum()
+        for k in range(0, len(first_in), 50 * batch_size):
+            batch = slice(k, k + 50 * batch_size)
+            squads = self._swapped(first_slot[batch], first_in[batch], second_slot[batch], second_in[batch])
+            xi, captain = self.upper_bounds(squads)
+            bound[batch] = xi + captain.max(axis=1)
+            sold_starters = previous_starters - (self.status[squads] == OWNED_STARTING).sum(axis=1)
+            can_start = (self.status[joining[batch]] != NOT_OWNED) | (sold_starters[:, None] > 0)
+            start_bound[batch] = np.where(can_start, bound[batch, None], -np.inf)
+            captain_bound[batch] = np.where(can_start, xi[:, None] + np.take_along_axis(captain, changed[batch], axis=1),
+                                            -np.inf)
+
+        unscored = np.ones(len(first_in), dtype=bool)
+        while True:
+            # A squad is useful while a bound beats what it takes to change an answer:
+            # an entering player's start, captain or bench route, or a removed member's best sale
+            needed = _entering_needed(self.z_bench, self.z_start, self.z_captain, objective)[joining]
+            useful = unscored & (
+                (start_bound > objective - needed + TOLERANCE)
+                | (captain_bound > objective - 2 * needed + TOLERANCE)
+                | ((bound[:, None] >= objective - TOLERANCE) & (needed > 0))
+            ).any(axis=1)
+            useful |= unscored & (bound > self.z_sold[leaving].min(axis=1) + TOLERANCE)
+            candidates = np.flatnonzero(useful)
+            if len(candidates) == 0:
+                return self
+
+            # Best bounds first, per_player squads per first joining player this round
+            order = candidates[np.lexsort((-bound[candidates], first_in[candidates]))]
+            group_start = np.r_[0, np.flatnonzero(np.diff(first_in[order])) + 1]
+            rank = np.arange(len(order)) - np.repeat(group_start, np.diff(np.r_[group_start, len(order)]))
+            chosen = order[rank < per_player]
+            unscored[chosen] = False
+            for k in range(0, len(chosen), batch_size):
+                batch = chosen[k:k + batch_size]
+                squads = self._swapped(first_slot[batch], first_in[batch], second_slot[batch], second_in[batch])
+                self.score(squads, changed[batch], changed[batch])
+
+
+def _entering_needed(z_bench, z_start, z_captain, z_plan):
+    """Vectorised _entering over players"""
+    needed = np.maximum(0.0, np.minimum(z_plan - z_start, (z_plan - z_captain) / 2))
+    return np.where(z_bench >= z_plan - TOLERANCE, 0.0, needed)
+
+
+def score_plans(squads, status, start_points, captain_points, pair_penalty, hits, slots=None):
+    """
+    Exact plan values of fixed squads, split by the role of chosen slots.
+
+    Every valid XI (LINEUP_MASKS) is scored as in solve_lineups. An XI is only
+    allowed when the players bought into it match the previous starters sold,
+    as the model's flow constraints require.
+
+    Args:
+        squads: Integer player positions (n_squads, 15) in canonical layout
+        status: Previous status per player (NOT_OWNED, OWNED_STARTING or OWNED_BENCH)
+        start_points: Objective points per player when starting
+        captain_points: Extra objective points per player as captain
+        pair_penalty: Opposing penalty per slot pair (n_squads, 105)
+        hits: Paid transfer penalty per squad (n_squads,)
+        slots: Optional slots (n_squads, k) to report per squad (default: all 15)
+
+    Returns:
+        tuple: best plan value (n_squads,) and, per reported slot (n_squads, k),
+               the best value with that slot benched, starting under another
+               captain, and captained
+    """
+    points = start_points[squads] @ LINEUP_MASKS.T - pair_penalty @ LINEUP_PAIR_MASKS.T - hits[:, None]
+    incoming = (status[squads] == NOT_OWNED).astype(float) @ LINEUP_MASKS.T
+    sold_starters = (status == OWNED_STARTING).sum() - (status[squads] == OWNED_STARTING).sum(axis=1)
+    points[incoming != sold_starters[:, None]] = -np.inf
+
+    # First and second captain choice of each XI, walking the squad's captain-points ranking
+    captain = captain_points[squads]
+    ranking = np.argsort(-captain, axis=1, kind='stable')
+    first = np.full(points.shape, -1)
+    second = np.full(points.shape, -1)
+    for rank in range(15):
+        slot = ranking[:, rank]
+        contains = LINEUP_MASKS.T[slot]
+        second = np.where(contains & (first >= 0) & (second < 0), slot[:, None], second)
+        first = np.where(contains & (first < 0), slot[:, None], first)
+        if (second >= 0).all():
+            break
+    first_points = np.take_along_axis(captain, first, axis=1)
+    second_points = np.take_along_axis(captain, second, axis=1)
+    plan_points = points + first_points
+
+    rows = np.arange(len(squads))
+    slots = np.broadcast_to(np.arange(15), squads.shape) if slots is None else np.asarray(slots)
+    benched, starting, captained = (np.empty(slots.shape) for _ in range(3))
+    for k, slot in enumerate(slots.T):
+        in_xi = LINEUP_MASKS.T[slot]
+        other_captain = np.where(first == slot[:, None], second_points, first_points)
+        benched[:, k] = np.where(in_xi, -np.inf, plan_points).max(axis=1)
+        starting[:, k] = np.where(in_xi, points + other_captain, -np.inf).max(axis=1)
+        captained[:, k] = np.where(in_xi, points, -np.inf).max(axis=1) + captain[rows, slot]
+    return plan_points.max(axis=1), benched, starting, captained
+
+
+def _entering(z_bench, z_start, z_captain, z_plan):
+    """xP increase that brings a player into a plan worth z_plan"""
+    if z_bench >= z_plan - TOLERANCE:
+        return 0.0
+    return max(0.0, min(z_plan - z_start, (z_plan - z_captain) / 2))
+
+
+def _leaving(z_bench, z_start, z_captain, z_sold):
+    """xP drop that gets a selected player sold for the best plan without them, worth z_sold"""
+    if z_bench > z_sold + TOLERANCE:
+        return np.inf
+    return max(0.0, z_start - z_sold, (z_captain - z_sold) / 2)
+
+
+def analyse_sensitivity(prob, vars, df_players, squad, my_team, max_exact=0, n_workers=1, time_limit=None):
+    """
+    xP change needed for every player to enter the optimal plan, or to be sold from it.
+
+    The objective is linear in xP, but only through the XI: a starter earns
+    their xP once, a captain twice, and bench players nothing. With z* the
+    optimum and z(...) the best plan with a player in a given role:
+
+    - A player outside the plan enters once either of their starting plans
+      catches up: min(z* - z(starts, not captain), (z* - z(captain)) / 2),
+      or 0 when a plan with them on the bench already ties z*.
+    - A selected player is sold once their best starting plans fall below
+      z(sold): max(z(starts, not captain) - z(sold), (z(captain) - z(sold)) / 2).
+      If z(benched) beats z(sold) they are benched rather than sold and the
+      drop tolerated is inf (a tie counts as sold: some optimal plan sells them).
+    - Bench players' xP is not in the objective, so no drop gets them sold (inf).
+
+    Every z(...) is taken over the plans within two swaps of the optimal
+    squad (see SwapNeighbourhood), each scored exactly over all 550 XIs with
+    the coefficients of prob's own objective; a few seconds for a 700-player
+    pool. The answers are exact over those plans; a plan three or more
+    changes away can only lower them, so they are reported with exact=False.
+    Players the neighbourhood cannot place at all (no affordable plan with
+    them in, or none without them) keep inf and are reported as truncated,
+    except for up to max_exact of them, cheapest first, which get forced CBC
+    re-solves on the warm model (about three solves each).
+
+    Assumes a deterministic objective (no risk_model), since scenario terms
+    also depend on xP.
+
+    Args:
+        prob: Solved PuLP problem built by build_transfer_model
+        vars: Dictionary of decision variables
+        df_players: DataFrame with player data
+        squad: Squad dictionary from process_optimization_results
+        my_team: Team instance the model was built for
+        max_exact (int): Maximum number of unresolved players re-solved
+        n_workers (int): Concurrent CBC solves (each worker holds its own model copy)
+        time_limit (float): Optional CBC time limit per solve in seconds
+
+    Returns:
+        pd.DataFrame: One row per player with role, xp_change_needed (increase for
+                      players outside the plan, drop for selected players; inf when
+                      it cannot happen), exact and truncated
+    """
+    objective = value(prob.objective)
+    starting = list(squad['starting_df'].index)
+    bench = list(squad['bench_df'].index)
+    captain_idx = squad['captain_idx']
+
+    role = pd.Series('not selected', index=df_players.index)
+    role[bench] = 'bench'
+    role[starting] = 'starting'
+    if captain_idx is not None:
+        role[captain_idx] = 'captain'
+
+    # Score every plan within two swaps of the optimal squad that could change an answer
+    start_points, captain_points, penalty, pairs = objective_coefficients(prob, vars, df_players)
+    squad_positions = df_players.index.get_indexer(squad_layout(df_players, starting + bench))
+    neighbourhood = SwapNeighbourhood(df_players, my_team, squad_positions,
+                                      -prob.constraints['Budget_Constraint'].constant,
+                                      start_points, captain_points, penalty, pairs).explore(objective)
+    z_bench, z_start, z_captain = neighbourhood.z_bench, neighbourhood.z_start, neighbourhood.z_captain
+    z_sold = neighbourhood.z_sold
+
+    needed, exact, unresolved = {}, {}, []
+    for position, idx in enumerate(df_players.index):
+        values = z_bench[position], z_start[position], z_captain[position]
+        if role[idx] == 'bench':
+            needed[idx] = np.inf
+            exact[idx] = True
+        elif role[idx] == 'not selected':
+            needed[idx] = _entering(*values, objective)
+            exact[idx] = False
+            if np.isinf(needed[idx]) and neighbourhood.can_join[position]:
+                unresolved.append(idx)
+        else:
+            needed[idx] = _leaving(*values, z_sold[position])
+            exact[idx] = False
+            if z_sold[position] == -np.inf:
+                unresolved.append(idx)
+    needed, exact = pd.Series(needed), pd.Series(exact)
+
+    # Forced re-solves for the cheapest players no plan within two swaps could place
+    unresolved = df_players.loc[unresolved, 'price'].sort_values(kind='stable').index
+    resolved = unresolved[:max_exact]
+    truncated = unresolved[max_exact:]
+
+    jobs = {}
+    for idx in resolved:
+        starting_names = _variable_names(vars, STARTING_VARIABLE_TYPES, idx)
+        bench_names = _variable_names(vars, BENCH_VARIABLE_TYPES, idx)
+        captain_name = vars['captain'][idx].name
+        jobs[(idx, 'bench')] = [(bench_names, 1)]
+        jobs[(idx, 'start')] = [(starting_names, 1), ([captain_name], 0)]
+        jobs[(idx, 'captain')] = [([captain_name], 1)]
+        if role[idx] != 'not selected':
+            jobs[(idx, 'sold')] = [(starting_names + bench_names, 0)]
+
+    forced = _forced_objectives(prob, jobs, n_workers=n_workers, time_limit=time_limit)
+
+    for idx in resolved:
+        values = forced[(idx, 'bench')], forced[(idx, 'start')], forced[(idx, 'captain')]
+        if role[idx] == 'not selected':
+            needed[idx] = _entering(*values, objective)
+        else:
+            needed[idx] = _leaving(*values, forced[(idx, 'sold')])
+        exact[idx] = True
+
+    if len(truncated):
+        names = ", ".join(df_players.loc[truncated[:10], 'name'].astype(str))
+        more = f" and {len(truncated) - 10} more" if len(truncated) > 10 else ""
+        print(f"⚠️ {len(truncated)} players with no plan within two swaps beyond max_exact={max_exact} "
+              f"keep inf: {names}{more}")
+
+    result = df_players[['name', 'position', 'team', 'price', 'expected_points']].copy()
+    result['role'] = role
+    result['xp_change_needed'] = needed.round(3)
+    result['exact'] = exact
+    result['truncated'] = result.index.isin(truncated)
+    return result
+
+
+def print_sensitivity_summary(sensitivity, top_n=10):
+    """Print the players closest to entering the plan and to being sold from it"""
+    print("\n🔍 SENSITIVITY: WHAT WOULD IT TAKE")
+    print("=" * 60)
+
+    outside = sensitivity[sensitivity['role'] == 'not selected'].nsmallest(top_n, 'xp_change_needed')
+    print("Closest to entering the plan (xP increase needed):")
+    for _, player in outside.iterrows():
+        marker = "" if player['exact'] else " ~"
+        print(f"  {player['name']} ({player['position']}, £{player['price']}m): +{player['xp_change_needed']:.2f}{marker}")
+
+    selected = sensitivity[sensitivity['role'].isin(['starting', 'captain', 'bench'])]
+    inside = selected[np.isfinite(selected['xp_change_needed'])].nsmallest(top_n, 'xp_change_needed')
+    print("Closest to being sold (xP drop tolerated):")
+    for _, player in inside.iterrows():
+        marker = "" if player['exact'] else " ~"
+        captain = " (C)" if player['role'] == 'captain' else ""
+        print(f"  {player['name']}{captain}: -{player['xp_change_needed']:.2f}{marker}")
+    never_sold = (~np.isfinite(selected['xp_change_needed']) & ~selected['truncated']).sum()
+    print(f"  ({never_sold} selected players would be benched rather than sold at any xP)")
+
+    print("(~ = best plan within two swaps of the optimum; otherwise exact)")
+    if sensitivity['truncated'].any():
+        print(f"({sensitivity['truncated'].sum()} players with no plan within two swaps kept inf; raise max_exact)")
+    print("=" * 60)
+
+
+# Example usage
+if __name__ == "__main__":
+    from team_class import Team
+    from model_builder import build_transfer_model
+    from squad_creator import process_optimization_results
+
+    my_team = Team(team_id=2562804, budget=0, free_transfers=1)
+    df_players = pd.read_csv('data/fpl_players_gw_5.csv')
+
+    prob, vars = build_transfer_model(df_players, my_team, base_opposing_penalty=0.5)
+    prob.solve(PULP_CBC_CMD(msg=False))
+    squad = process_optimization_results(vars, df_players, prob)
+
+    sensitivity = analyse_sensitivity(prob, vars, df_players, squad, my_team)
+    print_sensitivity_summary(sensitivity)
@@ -0,0 +1,350 @@
+# service.py
+# Local HTTP/JSON optimisation service: warm data and model templates, request queue, worker pool
+
+import contextlib
+import io
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import requests
+from pulp import PULP_CBC_CMD
+
+from fdr import CSVFDRCalculator
+from league_batch import FPL_API, current_gameweek, summarise_solution
+from model_builder import apply_team_to_template, build_transfer_template
+from solution_cache import snapshot_hash
+from team_class import Team
+
+# Model parameters a request may set, with their defaults (as in optimiser.py)
+DEFAULT_PARAMS = {
+    'penalty_points': 4,
+    'base_opposing_penalty': 0.5,
+    'fdr_penalty_weight': 1.0,
+}
+
+
+class ServiceError(Exception):
+    """Request error with the HTTP status to answer with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def normalise_request(payload):
+    """
+    Validate an /optimise payload and fill in defaults.
+
+    Identical normalised requests are deduplicated while in flight.
+
+    Args:
+        payload: Dict with team_id, and optionally bank, free_transfers, gameweek and params
+
+    Returns:
+        dict: Normalised request
+    """
+    if not isinstance(payload, dict) or 'team_id' not in payload:
+        raise ServiceError(400, "Request must be a JSON object with a team_id")
+
+    params = dict(DEFAULT_PARAMS)
+    unknown = set(payload.get('params', {})) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ServiceError(400, f"Unknown params: {sorted(unknown)}")
+    try:
+        params.update({key: float(val) for key, val in payload.get('params', {}).items()})
+        return {
+            'team_id': int(payload['team_id']),
+            'bank': None if payload.get('bank') is None else round(float(payload['bank']), 1),
+            'free_transfers': int(payload.get('free_transfers', 1)),
+            'gameweek': None if payload.get('gameweek') is None else int(payload['gameweek']),
+            'params': params,
+        }
+    except (TypeError, ValueError) as error:
+        raise ServiceError(400, f"Invalid request: {error}")
+
+
+class OptimisationService:
+    """
+    Solve transfer requests on a bounded worker pool with warm shared state.
+
+    - Player CSVs are read once per gameweek and kept in memory.
+    - bootstrap-static is cached for bootstrap_ttl seconds.
+    - Model templates (build_transfer_template) are kept per gameweek and
+      parameter set; each worker checks one out, applies the team and solves,
+      so templates are only built when all existing ones are busy.
+    - Requests identical to one already queued or running share its result.
+    - Each team's budget is its squad value plus bank (the request's bank,
+      else the entry's), set on the template's budget constraint.
+    - With a SolutionCache, a team already solved on the same gameweek data
+      and parameters is answered without solving (and "cached": true).
+    - At most n_workers + max_queue requests are accepted at once.
+    """
+
+    def __init__(self, data_dir='data', n_workers=4, max_queue=64, bootstrap_ttl=300, time_limit=None,
+                 cache=None):
+        """
+        Args:
+            data_dir: Directory with fpl_players_gw_{gw}.csv files
+            n_workers (int): Concurrent solves
+            max_queue (int): Requests allowed to wait for a worker
+            bootstrap_ttl (float): Seconds bootstrap-static is cached
+            time_limit (float): Optional CBC time limit per solve in seconds
+            cache: Optional SolutionCache shared by all requests
+        """
+        self.data_dir = data_dir
+        self.bootstrap_ttl = bootstrap_ttl
+        self.time_limit = time_limit
+        self.cache = cache
+
+        self.executor = ThreadPoolExecutor(max_workers=n_workers)
+        self.slots = threading.BoundedSemaphore(n_workers + max_queue)
+        self.session = requests.Session()
+
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._players = {}
+        self._snapshots = {}
+        self._fdr = {}
+        self._templates = {}
+        self._bootstrap = (None, 0.0)
+
+        self.counters = Counter()
+        self.latencies = deque(maxlen=1000)
+
+    # ----- warm state -----
+
+    def players(self, gameweek):
+        """Player data for a gameweek, read from CSV on first use"""
+        with self._lock:
+            if gameweek not in self._players:
+                path = os.path.join(self.data_dir, f'fpl_players_gw_{gameweek}.csv')
+                if not os.path.exists(path):
+                    raise ServiceError(404, f"No player data for gameweek {gameweek}")
+                self._players[gameweek] = pd.read_csv(path)
+                self._snapshots[gameweek] = snapshot_hash(self._players[gameweek])
+            return self._players[gameweek]
+
+    def fdr_calculator(self, gameweek):
+        """FDR calculator for a gameweek's CSV, created on first use; None if the CSV has no team_fdr_5gw"""
+        has_fdr = 'team_fdr_5gw' in self.players(gameweek).columns
+        with self._lock:
+            if gameweek not in self._fdr:
+                path = os.path.join(self.data_dir, f'fpl_players_gw_{gameweek}.csv')
+                with contextlib.redirect_stdout(io.StringIO()):
+                    self._fdr[gameweek] = CSVFDRCalculator(path) if has_fdr else None
+            return self._fdr[gameweek]
+
+    def bootstrap(self):
+        """bootstrap-static, refreshed after bootstrap_ttl seconds"""
+        with self._lock:
+            data, fetched_at = self._bootstrap
+            if data is None or time.time() - fetched_at > self.bootstrap_ttl:
+                data = self.session.get(f'{FPL_API}/bootstrap-static/').json()
+                self._bootstrap = (data, time.time())
+            return data
+
+    def _checkout_template(self, gameweek, params):
+        key = (gameweek, tuple(sorted(params.items())))
+        with self._lock:
+            pool = self._templates.setdefault(key, queue.LifoQueue())
+        try:
+            return key, pool.get_nowait()
+        except queue.Empty:
+            fdr_calculator = self.fdr_calculator(gameweek) if params['fdr_penalty_weight'] > 0 else None
+            with contextlib.redirect_stdout(io.StringIO()):
+                template = build_transfer_template(
+                    self.players(gameweek),
+                    penalty_points=params['penalty_points'],
+                    base_opposing_penalty=params['base_opposing_penalty'],
+                    fdr_calculator=fdr_calculator,
+                    fdr_penalty_weight=params['fdr_penalty_weight'],
+                )
+            self.counters['templates_built'] += 1
+            return key, template
+
+    def _checkin_template(self, key, template):
+        self._templates[key].put(template)
+
+    # ----- request handling -----
+
+    def fetch_team(self, team_id, bank=None, free_transfers=1):
+        """Fetch an entry's current picks using the cached bootstrap"""
+        bootstrap = self.bootstrap()
+        gameweek = current_gameweek(bootstrap)
+        try:
+            resp = self.session.get(f'{FPL_API}/entry/{team_id}/event/{gameweek}/picks/')
+        except requests.RequestException as error:
+            raise ServiceError(502, f"Could not fetch team {team_id}: {error}")
+        if resp.status_code != 200:
+            raise ServiceError(404, f"Could not fetch team {team_id}")
+        return Team.from_picks(team_id, bootstrap, resp.json(), budget=bank, free_transfers=free_transfers)
+
+    def _run(self, request, queued_at, team=None):
+        started = time.perf_counter()
+        latency = {'queue_seconds': started - queued_at}
+
+        team = team or self.fetch_team(request['team_id'], request['bank'], request['free_transfers'])
+        gameweek = request['gameweek'] or team.current_gw + 1
+        df_players = self.players(gameweek)
+        latency['fetch_seconds'] = time.perf_counter() - started
+
+        cache_key = None
+        if self.cache is not None:
+            params = dict(request['params'], time_limit=self.time_limit)
+            cache_key = self.cache.key_for(df_players, team, params, source=gameweek,
+                                           snapshot=self._snapshots[gameweek])
+            result = self.cache.get(cache_key)
+            if result is not None:
+                self.counters['cache_hits'] += 1
+                latency['total_seconds'] = time.perf_counter() - queued_at
+                result['cached'] = True
+                result['latency'] = {name: round(seconds, 4) for name, seconds in latency.items()}
+                return result
+
+        mark = time.perf_counter()
+        key, (prob, vars) = self._checkout_template(gameweek, request['params'])
+        latency['template_seconds'] = time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        try:
+            apply_team_to_template(prob, vars, df_players, team, budget=round(float(team.team_value) + team.budget, 1))
+            status = prob.solve(PULP_CBC_CMD(msg=False, timeLimit=self.time_limit))
+            result = summarise_solution(team, prob, vars, df_players, status)
+        finally:
+            self._checkin_template(key, (prob, vars))
+        latency['solve_seconds'] = time.perf_counter() - mark
+
+        result['gameweek'] = gameweek
+        if cache_key is not None and result['status'] == 'Optimal':
+            self.cache.put(cache_key, result)
+
+        latency['total_seconds'] = time.perf_counter() - queued_at
+        result['latency'] = {name: round(seconds, 4) for name, seconds in latency.items()}
+        self.latencies.append(latency)
+        return result
+
+    def _finished(self, key, future):
+        with self._lock:
+            self._in_flight.pop(key, None)
+        self.slots.release()
+        self.counters['failed' if future.exception() else 'completed'] += 1
+
+    def submit(self, request, team=None):
+        """
+        Queue a normalised request, or join an identical one already in flight.
+
+        Args:
+            request: Normalised request (normalise_request)
+            team: Optional Team already built by the caller, so its picks are not fetched again
+
+        Returns:
+            tuple: (future, deduplicated)
+        """
+        key = json.dumps(request, sort_keys=True)
+        with self._lock:
+            self.counters['requests'] += 1
+            if key in self._in_flight:
+                self.counters['deduplicated'] += 1
+                return self._in_flight[key], True
+            if not self.slots.acquire(blocking=False):
+                self.counters['rejected'] += 1
+                raise ServiceError(503, "Request queue is full")
+            future = self.executor.submit(self._run, request, time.perf_counter(), team)
+            self._in_flight[key] = future
+        future.add_done_callback(lambda done: self._finished(key, done))
+        return future, False
+
+    def optimise(self, payload, timeout=None):
+        """Validate, queue and wait for one request; returns the JSON-ready result"""
+        future, deduplicated = self.submit(normalise_request(payload))
+        result = dict(future.result(timeout=timeout))
+        result['deduplicated'] = deduplicated
+        return result
+
+    def metrics(self):
+        """Request counters and latency percentiles over the last 1000 solves"""
+        metrics = dict(self.counters)
+        with self._lock:
+            metrics['in_flight'] = len(self._in_flight)
+            metrics['gameweeks_loaded'] = sorted(self._players)
+            metrics['templates_cached'] = sum(pool.qsize() for pool in self._templates.values())
+        if self.cache is not None:
+            metrics['cache'] = self.cache.stats()
+        if self.latencies:
+            frame = pd.DataFrame(list(self.latencies))
+            for column in frame.columns:
+                metrics[column] = {
+                    'mean': round(float(frame[column].mean()), 4),
+                    'p50': round(float(np.percentile(frame[column], 50)), 4),
+                    'p95': round(float(np.percentile(frame[column], 95)), 4),
+                }
+        return metrics
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """POST /optimise, GET /metrics and GET /health"""
+
+    service = None
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/metrics':
+            self._send_json(200, self.service.metrics())
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/optimise':
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            self._send_json(200, self.service.optimise(payload))
+        except json.JSONDecodeError:
+            self._send_json(400, {'error': "Body must be JSON"})
+        except ServiceError as error:
+            self._send_json(error.status, {'error': str(error)})
+        except Exception as error:
+            self._send_json(500, {'error': f"{type(error).__name__}: {error}"})
+
+
+def serve(host='127.0.0.1', port=8050, **service_kwargs):
+    """Run the service until interrupted"""
+    service = OptimisationService(**service_kwargs)
+    handler = type('BoundServiceHandler', (ServiceHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"🚀 Optimisation service on http://{host}:{port} (POST /optimise, GET /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+# Example usage
+if __name__ == "__main__":
+    # curl -X POST localhost:8050/optimise -d '{"team_id": 2562804, "bank": 0.5, "free_transfers": 1}'
+    serve(data_dir='data', n_workers=4)
@@ -0,0 +1,346 @@
+# simulation.py
+# Vectorised Monte Carlo simulation of gameweek points
+
+import numpy as np
+import pandas as pd
+
+POSITION_ORDER = ['Goalkeeper', 'Defender', 'Midfielder', 'Forward']
+
+# Formation limits for the starting XI (GK, DEF, MID, FWD)
+MIN_STARTERS = np.array([1, 3, 2, 1])
+MAX_STARTERS = np.array([1, 5, 5, 3])
+
+# Chance of playing by FPL status when no explicit chance is available
+STATUS_PLAY_PROBABILITY = {'a': 0.95, 'd': 0.5, 'i': 0.0, 's': 0.0, 'u': 0.0, 'n': 0.0}
+
+# Loadings of each position on its own team's (attack, defence) factor
+POSITION_FACTOR_LOADINGS = np.array([
+    [0.0, 1.0],     # Goalkeeper - clean sheets and saves
+    [0.3, 0.95],    # Defender - mostly clean sheets, some attacking returns
+    [0.9, 0.35],    # Midfielder - mostly attacking returns
+    [1.0, 0.0],     # Forward - attacking returns only
+])
+
+# Log-scale spread of returns given the player plays (larger = more haul-prone)
+POSITION_LOG_SPREAD = np.array([0.55, 0.7, 0.85, 0.9])
+
+
+def position_codes(df_players):
+    """
+    Map the position column to integer codes (0=GK, 1=DEF, 2=MID, 3=FWD).
+    """
+    return df_players['position'].map({pos: i for i, pos in enumerate(POSITION_ORDER)}).to_numpy(dtype=np.int8)
+
+
+def play_probability(df_players):
+    """
+    Estimate the probability that each player features in the gameweek.
+
+    Uses 'chance_of_playing_next_round' (percent) when present, otherwise the
+    FPL status code. Players without a fixture, and players who have not played
+    a minute so far, are scaled down accordingly.
+
+    Returns:
+        np.ndarray: Probability of playing per player (aligned with df_players)
+    """
+    status_prob = df_players['status'].map(STATUS_PLAY_PROBABILITY).fillna(0.0).to_numpy(dtype=float)
+
+    if 'chance_of_playing_next_round' in df_players.columns:
+        chance = pd.to_numeric(df_players['chance_of_playing_next_round'], errors='coerce').to_numpy(dtype=float)
+        prob = np.where(np.isnan(chance), status_prob, chance / 100.0)
+    else:
+        prob = status_prob
+
+    if 'minutes' in df_players.columns:
+        minutes = pd.to_numeric(df_players['minutes'], errors='coerce').fillna(0).to_numpy(dtype=float)
+        prob = np.where(minutes > 0, prob, prob * 0.3)
+
+    prob = np.where(_has_fixture(df_players), prob, 0.0)
+    return np.clip(prob, 0.0, 1.0)
+
+
+def _has_fixture(df_players):
+    """Boolean mask of players whose team has a fixture this gameweek"""
+    opponent_id = pd.to_numeric(df_players['opponent_id'], errors='coerce').to_numpy(dtype=float)
+    has_fixture = ~np.isnan(opponent_id)
+    if 'opponent' in df_players.columns:
+        has_fixture &= (df_players['opponent'] != 'No fixture').to_numpy()
+    return has_fixture
+
+
+class PointsSimulator:
+    """
+    Draw correlated per-player gameweek points for many scenarios at once.
+
+    Each team gets an attack and a defence factor per scenario. A team's
+    defence factor is negatively correlated with its opponent's attack factor,
+    so teammates move together and opposing attackers/defenders move apart.
+    Conditional on playing, points follow a shifted lognormal whose mean keeps
+    the overall expectation equal to 'expected_points'.
+    """
+
+    def __init__(self, df_players, team_weight=0.35, opponent_correlation=0.6, seed=None):
+        """
+        Initialize the simulator from a player snapshot
+
+        Args:
+            df_players: DataFrame with player data (position, team_id, opponent_id, expected_points, status)
+            team_weight (float): Share of a player's variance explained by team factors (0-1)
+            opponent_correlation (float): Negative correlation between a team's attack and its opponent's defence
+            seed (int): Random seed for reproducible draws
+        """
+        self.df_players = df_players
+        self.team_weight = team_weight
+        self.opponent_correlation = opponent_correlation
+        self.rng = np.random.default_rng(seed)
+
+        self.index = df_players.index
+        self.positions = position_codes(df_players)
+        self.expected_points = pd.to_numeric(df_players['expected_points'], errors='coerce').fillna(0).to_numpy(dtype=float)
+        self.play_prob = play_probability(df_players)
+
+        # Dense team codes so factor arrays can be indexed directly
+        team_ids = df_players['team_id'].to_numpy()
+        self.team_lookup = {team_id: code for code, team_id in enumerate(pd.unique(team_ids))}
+        self.team_codes = np.array([self.team_lookup[t] for t in team_ids], dtype=np.int32)
+
+        opponent_ids = pd.to_numeric(df_players['opponent_id'], errors='coerce')
+        opponent_by_team = np.full(len(self.team_lookup), -1, dtype=np.int32)
+        for team_id, opponent_id in zip(team_ids, opponent_ids):
+            if not np.isnan(opponent_id) and opponent_id in self.team_lookup:
+                opponent_by_team[self.team_lookup[team_id]] = self.team_lookup[opponent_id]
+        self.opponent_by_team = opponent_by_team
+
+        # Mean points given the player plays, so that E[points] == expected_points
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.conditional_mean = np.where(self.play_prob > 0, self.expected_points / self.play_prob, 0.0)
+
+        loadings = POSITION_FACTOR_LOADINGS[self.positions]
+        loadings = loadings / np.linalg.norm(loadings, axis=1, keepdims=True)
+        self.attack_loading = loadings[:, 0]
+        self.defence_loading = loadings[:, 1]
+        self.log_spread = POSITION_LOG_SPREAD[self.positions]
+
+    def positions_of(self, labels):
+        """Integer positions in the snapshot for a list of df_players index labels"""
+        return self.index.get_indexer(labels)
+
+    def sample_team_factors(self, n_scenarios):
+        """
+        Draw attack and defence factors for every team.
+
+        Returns:
+            tuple: (attack, defence) arrays of shape (n_scenarios, n_teams)
+        """
+        n_teams = len(self.team_lookup)
+        attack = self.rng.standard_normal((n_scenarios, n_teams), dtype=np.float32)
+        noise = self.rng.standard_normal((n_scenarios, n_teams), dtype=np.float32)
+
+        rho = self.opponent_correlation
+        has_opponent = self.opponent_by_team >= 0
+        opponent_attack = attack[:, np.where(has_opponent, self.opponent_by_team, 0)]
+        defence = np.where(has_opponent, -rho * opponent_attack + np.sqrt(1 - rho ** 2) * noise, noise)
+        return attack, defence.astype(np.float32)
+
+    def sample(self, n_scenarios, players=None):
+        """
+        Sample points and minutes outcomes.
+
+        Args:
+            n_scenarios (int): Number of scenarios to draw
+            players: Optional df_players index labels to restrict the draw to (default: all players)
+
+        Returns:
+            tuple: (points, played) arrays of shape (n_scenarios, n_players);
+                   points is float32, played is bool
+        """
+        cols = np.arange(len(self.index)) if players is None else self.positions_of(players)
+
+        attack, defence = self.sample_team_factors(n_scenarios)
+        team = self.team_codes[cols]
+        factor = attack[:, team] * self.attack_loading[cols] + defence[:, team] * self.defence_loading[cols]
+
+        w = self.team_weight
+        z = np.sqrt(w) * factor + np.sqrt(1 - w) * self.rng.standard_normal((n_scenarios, len(cols)), dtype=np.float32)
+
+        played = self.rng.random((n_scenarios, len(cols)), dtype=np.float32) < self.play_prob[cols]
+
+        # Shifted lognormal above one appearance point: mean stays at conditional_mean
+        mean = self.conditional_mean[cols]
+        spread = self.log_spread[cols]
+        upside = np.maximum(mean - 1.0, 0.0)
+        base = np.minimum(mean, 1.0)
+        points = base + upside * np.exp(spread * z - 0.5 * spread ** 2)
+        points = np.where(played, points, 0.0).astype(np.float32)
+        return points, played
+
+    def score_squad(self, slots, captain_slot=0, vice_captain_slot=1, n_scenarios=100000, captain_multiplier=2):
+        """
+        Simulate and score a 15-man squad including captaincy and auto-subs.
+
+        Args:
+            slots: 15 df_players index labels in slot order (see score_lineups)
+            captain_slot (int): Slot of the captain (0-10)
+            vice_captain_slot (int): Slot of the vice-captain (0-10)
+            n_scenarios (int): Number of scenarios
+            captain_multiplier (int): 2 normally, 3 with triple captain
+
+        Returns:
+            np.ndarray: Total squad points per scenario
+        """
+        points, played = self.sample(n_scenarios, players=slots)
+        slot_positions = self.positions[self.positions_of(slots)]
+        return score_lineups(points, played, slot_positions, captain_slot, vice_captain_slot, captain_multiplier)
+
+
+def apply_auto_subs(played, slot_positions):
+    """
+    Apply FPL automatic substitutions for every scenario at once.
+
+    Slot layout: 0-10 starting XI, 11 bench goalkeeper, 12-14 outfield bench in
+    priority order. A non-playing starter is replaced by the first bench player
+    (in order) who played and keeps the formation valid.
+
+    Args:
+        played: Bool array (n_rows, 15)
+        slot_positions: Position codes for the 15 slots, either shared (15,) or
+                        per row (n_rows, 15) so different squads or bench orders
+                        can be stacked into one call
+
+    Returns:
+        np.ndarray: Bool array (n_rows, 15) marking the final XI
+    """
+    slot_positions = np.broadcast_to(np.asarray(slot_positions), played.shape)
+    in_xi = np.zeros(played.shape, dtype=bool)
+    in_xi[:, :11] = True
+
+    # Only scenarios where a starter missed out need any work
+    needs_sub_any = ~played[:, :11].all(axis=1)
+    active = np.flatnonzero(needs_sub_any)
+    if len(active) == 0:
+        return in_xi
+
+    played = played[active]
+    slot_positions = slot_positions[active]
+    sub_xi = in_xi[active]
+
+    rows_all = np.arange(len(active))
+    starter_positions = slot_positions[:, :11]
+    outfield = starter_positions != 0
+    needs_sub = ~played[:, :11]
+    counts = (starter_positions[:, :, None] == np.arange(4, dtype=starter_positions.dtype)).sum(axis=1, dtype=np.int8)
+
+    # Goalkeeper can only be replaced by the bench goalkeeper
+    gk_slot = np.argmax(starter_positions == 0, axis=1)
+    swap = needs_sub[rows_all, gk_slot] & played[:, 11]
+    sub_xi[rows_all[swap], gk_slot[swap]] = False
+    sub_xi[swap, 11] = True
+
+    for bench_slot in range(12, 15):
+        q = slot_positions[:, bench_slot]
+        can_leave = counts > MIN_STARTERS
+        leaving_ok = np.take_along_axis(can_leave, starter_positions.astype(np.intp), axis=1)
+        joining_ok = counts[rows_all, q] < MAX_STARTERS[q]
+        valid = (starter_positions == q[:, None]) | (leaving_ok & joining_ok[:, None])
+
+        candidates = needs_sub & outfield & valid & played[:, bench_slot][:, None]
+        rows = rows_all[candidates.any(axis=1)]
+        cols = candidates[rows].argmax(axis=1)
+
+        sub_xi[rows, cols] = False
+        sub_xi[rows, bench_slot] = True
+        needs_sub[rows, cols] = False
+        counts[rows, starter_positions[rows, cols]] -= 1
+        counts[rows, q[rows]] += 1
+
+    in_xi[active] = sub_xi
+    return in_xi
+
+
+def score_lineups(points, played, slot_positions, captain_slot, vice_captain_slot, captain_multiplier=2):
+    """
+    Score a squad in every scenario after auto-subs and captaincy.
+
+    The vice-captain takes the armband only when the captain does not play.
+
+    Args:
+        points: Float array (n_rows, 15) in slot order
+        played: Bool array (n_rows, 15) in slot order
+        slot_positions: Position codes for the 15 slots, shared (15,) or per row (n_rows, 15)
+        captain_slot: Slot of the captain (int or per-row array)
+        vice_captain_slot: Slot of the vice-captain (int or per-row array)
+        captain_multiplier (int): Captain multiplier
+
+    Returns:
+        np.ndarray: Total points per row
+    """
+    rows = np.arange(points.shape[0])
+    captain_slot = np.broadcast_to(captain_slot, rows.shape)
+    vice_captain_slot = np.broadcast_to(vice_captain_slot, rows.shape)
+
+    in_xi = apply_auto_subs(played, slot_positions)
+    total = np.where(in_xi, points, 0.0).sum(axis=1)
+
+    armband = np.where(
+        played[rows, captain_slot], points[rows, captain_slot],
+        np.where(played[rows, vice_captain_slot], points[rows, vice_captain_slot], 0.0)
+    )
+    return total + (captain_multiplier - 1) * armband
+
+
+def squad_slots(squad):
+    """
+    Convert a squad dict from process_optimization_results into slot order.
+
+    Returns:
+        tuple: (slots, captain_slot, vice_captain_slot) where slots is a list of 15
+               df_players index labels (starters, bench GK, outfield bench by bench_order)
+    """
+    starting = list(squad['starting_df'].index)
+    bench_df = squad['bench_df']
+    if 'bench_order' in bench_df.columns:
+        bench_df = bench_df.sort_values('bench_order')
+    bench_gk = list(bench_df[bench_df['position'] == 'Goalkeeper'].index)
+    bench_outfield = list(bench_df[bench_df['position'] != 'Goalkeeper'].index)
+    slots = starting + bench_gk + bench_outfield
+
+    captain_slot = starting.index(squad['captain_idx'])
+    vice_idx = squad.get('vice_captain_idx')
+    vice_captain_slot = starting.index(vice_idx) if vice_idx in starting else captain_slot
+    return slots, captain_slot, vice_captain_slot
+
+
+def estimate_position_penalty_matrix(points, df_players, min_pairs=5):
+    """
+    Derive opposing-position penalty multipliers from point outcomes.
+
+    The multiplier for a position combination is the average negative
+    correlation between opposing players in those positions, rescaled so the
+    multipliers average 1.0 (keeping base_opposing_penalty on the same scale
+    as the hand-tuned matrix in opposing_teams.get_position_penalty_matrix).
+
+    Args:
+        points: Array (n_samples, n_players) of simulated or historical points, aligned with df_players
+        df_players: DataFrame with player data
+        min_pairs (int): Minimum opposing pairs needed to estimate a combination
+
+    Returns:
+        dict: Position combination penalty multipliers, same format as get_position_penalty_matrix()
+    """
+    from opposing_teams import find_opposing_pairs
+
+    points = np.asarray(points, dtype=np.float64)
+    std = points.std(axis=0)
+    z = np.where(std > 0, (points - points.mean(axis=0)) / np.where(std > 0, std, 1.0), 0.0)
+
+    pairs = find_opposing_pairs(df_players)
+    pairs = pairs[(std[pairs['pos_i']] > 0) & (std[pairs['pos_j']] > 0)]
+    pairs = pairs.assign(corr=np.einsum('si,si->i', z[:, pairs['pos_i']], z[:, pairs['pos_j']]) / len(points))
+
+    by_combo = pairs.groupby(['position_a', 'position_b'])['corr'].agg(['mean', 'size'])
+    by_combo = by_combo[by_combo['size'] >= min_pairs]
+    strength = (-by_combo['mean']).clip(lower=0)
+    if strength.mean() > 0:
+        strength = strength / strength.mean()
+
+    return {combo: round(float(value), 2) for combo, value in strength.items()}
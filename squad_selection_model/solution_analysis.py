@@ -0,0 +1,218 @@
+# solution_analysis.py
+# Post-solve analysis of a squad as DataFrames: opposing pairs, FDR contribution and transfers
+
+import numpy as np
+import pandas as pd
+
+from opposing_teams import get_position_penalty_array
+
+POSITIONS = ['Goalkeeper', 'Defender', 'Midfielder', 'Forward']
+
+# Transfer decision variables: (action, location, paid)
+TRANSFER_VAR_TYPES = {
+    'out_starting_free': ('Sold', '', False),
+    'out_starting_paid': ('Sold', '', True),
+    'out_bench_free': ('Sold', ' from bench', False),
+    'out_bench_paid': ('Sold', ' from bench', True),
+    'in_to_starting_free': ('Bought', '', False),
+    'in_to_starting_paid': ('Bought', '', True),
+    'in_to_bench_free': ('Bought', ' to bench', False),
+    'in_to_bench_paid': ('Bought', ' to bench', True),
+}
+
+OPPOSING_PAIR_COLUMNS = ['idx_i', 'idx_j', 'name_i', 'team_i', 'name_j', 'team_j', 'opponent_i',
+                         'position_a', 'position_b', 'multiplier', 'penalty']
+
+
+def opposing_pairs_in_squad(starting_df, base_penalty=1.0, penalty_matrix=None):
+    """
+    Opposing player pairs in a starting XI with their position-weighted penalties.
+
+    Uses the same rules as the optimisation (opposing_teams.find_opposing_pairs):
+    both players' teams face each other, the fixture exists and GK vs GK pairs
+    are skipped.
+
+    Args:
+        starting_df: Starting XI DataFrame (squad['starting_df'])
+        base_penalty: Penalty per pair before the position multiplier
+        penalty_matrix: Optional penalty matrix overriding get_position_penalty_matrix()
+
+    Returns:
+        pd.DataFrame: One row per pair (OPPOSING_PAIR_COLUMNS)
+    """
+    if starting_df.empty:
+        return pd.DataFrame(columns=OPPOSING_PAIR_COLUMNS)
+
+    # All (i, j) combinations at once: a starting XI is small, so an n x n mask is cheapest.
+    # Same rules as find_opposing_pairs; pairs are oriented by index label (idx_i < idx_j)
+    starting_df = starting_df.sort_index()
+    team_id = starting_df['team_id'].to_numpy(dtype=float)
+    opponent_id = pd.to_numeric(starting_df['opponent_id'], errors='coerce').to_numpy(dtype=float)
+    has_fixture = ~np.isnan(opponent_id)
+    if 'opponent' in starting_df.columns:
+        has_fixture &= starting_df['opponent'].to_numpy() != 'No fixture'
+
+    opposing = ((opponent_id[:, None] == team_id[None, :]) & (opponent_id[None, :] == team_id[:, None])
+                & has_fixture[:, None] & has_fixture[None, :])
+    pos_i, pos_j = np.nonzero(np.triu(opposing, k=1))
+
+    # Position multipliers; unknown positions default to 1.0, as in get_penalty_for_positions
+    codes = pd.Categorical(starting_df['position'], categories=POSITIONS).codes
+    penalties = get_position_penalty_array(penalty_matrix, POSITIONS)
+    code_i, code_j = codes[pos_i], codes[pos_j]
+    multiplier = np.where((code_i >= 0) & (code_j >= 0), penalties[code_i, code_j], 1.0)
+
+    # GK vs GK pairs are skipped
+    positions = starting_df['position'].to_numpy()
+    keep = ~((positions[pos_i] == 'Goalkeeper') & (positions[pos_j] == 'Goalkeeper'))
+    pos_i, pos_j, multiplier = pos_i[keep], pos_j[keep], multiplier[keep]
+    position_a = np.minimum(positions[pos_i], positions[pos_j])
+    position_b = np.maximum(positions[pos_i], positions[pos_j])
+
+    names = starting_df['name'].to_numpy()
+    teams = starting_df['team'].to_numpy()
+    opponents = starting_df['opponent'].to_numpy() if 'opponent' in starting_df.columns else teams
+    labels = starting_df.index.to_numpy()
+
+    return pd.DataFrame({
+        'idx_i': labels[pos_i], 'idx_j': labels[pos_j],
+        'name_i': names[pos_i], 'team_i': teams[pos_i],
+        'name_j': names[pos_j], 'team_j': teams[pos_j],
+        'opponent_i': opponents[pos_i],
+        'position_a': position_a, 'position_b': position_b,
+        'multiplier': multiplier,
+        'penalty': base_penalty * multiplier,
+    }, columns=OPPOSING_PAIR_COLUMNS)
+
+
+def fdr_contribution(starting_df, fdr_calculator, base_points=1.0):
+    """
+    FDR rating and bonus/penalty of each starter's team.
+
+    The calculator is queried once per club rather than once per player, or
+    per player by position when it provides player_fdr_bonus.
+
+    Args:
+        starting_df: Starting XI DataFrame (squad['starting_df'])
+        fdr_calculator: FDRCalculator, CSVFDRCalculator or StrengthFDRCalculator instance
+        base_points: Points scaled by the FDR multiplier
+
+    Returns:
+        pd.DataFrame: name, team, team_id, fdr_rating and fdr_bonus, indexed like starting_df
+    """
+    team_ids = starting_df['team_id']
+    if hasattr(fdr_calculator, 'player_fdr_bonus'):
+        bonus = pd.Series(fdr_calculator.player_fdr_bonus(starting_df, base_points), index=starting_df.index)
+    else:
+        clubs = team_ids.unique()
+        bonus = team_ids.map({team_id: fdr_calculator.get_fdr_penalty_points(team_id, base_points) for team_id in clubs})
+
+    return pd.DataFrame({
+        'name': starting_df['name'],
+        'team': starting_df['team'],
+        'team_id': team_ids,
+        'fdr_rating': team_ids.map(fdr_calculator.team_fdr_ratings).fillna(0).astype(float),
+        'fdr_bonus': bonus.astype(float),
+    }, index=starting_df.index)
+
+
+def transfer_summary(decision_results, df_players):
+    """
+    Every transfer in a solution, from its decision results.
+
+    Args:
+        decision_results: Decision results (squad['decision_results'])
+        df_players: DataFrame with player data
+
+    Returns:
+        pd.DataFrame: var_type, action, location, paid, name and price, one row per
+                      transfer, indexed by player index label (sales first)
+    """
+    var_types = [var_type for var_type in TRANSFER_VAR_TYPES for _ in decision_results.get(var_type, [])]
+    indices = [idx for var_type in TRANSFER_VAR_TYPES for idx in decision_results.get(var_type, [])]
+    action, location, paid = zip(*(TRANSFER_VAR_TYPES[var_type] for var_type in var_types)) if var_types else ((), (), ())
+
+    transfers = pd.DataFrame({'var_type': var_types, 'action': action, 'location': location, 'paid': paid},
+                             index=pd.Index(indices, dtype=df_players.index.dtype))
+    players = df_players.loc[indices, ['name', 'price']]
+    transfers['name'] = players['name'].to_numpy()
+    transfers['price'] = players['price'].to_numpy()
+    return transfers
+
+
+def analyse_solution(squad, df_players, fdr_calculator=None, base_penalty=1.0, penalty_matrix=None):
+    """
+    Opposing pairs, FDR contribution and transfers of a solved squad.
+
+    Args:
+        squad: Squad dictionary from process_optimization_results
+        df_players: DataFrame with player data
+        fdr_calculator: Optional FDR calculator; without it 'fdr' is None
+        base_penalty: Opposing-pair penalty per pair before the position multiplier
+        penalty_matrix: Optional opposing-position penalty matrix
+
+    Returns:
+        dict: 'opposing_pairs', 'fdr' and 'transfers' DataFrames plus the totals
+              'opposing_penalty' and 'fdr_total'
+    """
+    starting_df = squad['starting_df']
+    pairs = opposing_pairs_in_squad(starting_df, base_penalty, penalty_matrix)
+    fdr = fdr_contribution(starting_df, fdr_calculator) if fdr_calculator is not None else None
+
+    return {
+        'opposing_pairs': pairs,
+        'opposing_penalty': float(pairs['penalty'].sum()),
+        'fdr': fdr,
+        'fdr_total': float(fdr['fdr_bonus'].sum()) if fdr is not None else None,
+        'transfers': transfer_summary(squad['decision_results'], df_players),
+    }
+
+
+def print_opposing_pairs(pairs, base_penalty=1.0):
+    """Print opposing pairs grouped by position combination"""
+    print("\n" + "="*60)
+    print("POSITION-WEIGHTED OPPOSING TEAMS ANALYSIS")
+    print("="*60)
+
+    if pairs.empty:
+        print("✅ No opposing player pairs found in starting XI")
+        print("💰 No penalty applied")
+        print("="*60)
+        return
+
+    print(f"⚠️  {len(pairs)} opposing player pairs in your starting XI:")
+    for (position_a, position_b), group in pairs.groupby(['position_a', 'position_b'], sort=False):
+        multiplier = group['multiplier'].iloc[0]
+        print(f"\n📍 {position_a} vs {position_b} (penalty: {multiplier}x base = {base_penalty * multiplier:.1f} pts each):")
+        for row in group.itertuples(index=False):
+            print(f"  • {row.name_i} ({row.team_i}) vs {row.name_j} ({row.team_j})")
+            print(f"    Match: {row.team_i} vs {row.opponent_i} | Penalty: -{row.penalty:.1f} pts")
+
+    total_penalty = pairs['penalty'].sum()
+    print(f"\n💰 Total position-weighted penalty: -{total_penalty:.1f} points")
+    print(f"📊 Average penalty per pair: {total_penalty/len(pairs):.1f} points")
+    print("="*60)
+
+
+def print_fdr_analysis(fdr):
+    """Print each starter's FDR rating and bonus, and the squad total"""
+    print("\n🎯 FDR ANALYSIS OF SELECTED SQUAD")
+    print("=" * 50)
+    for row in fdr.itertuples(index=False):
+        indicator = "💚" if row.fdr_bonus > 0 else "❤️" if row.fdr_bonus < 0 else "💛"
+        print(f"{indicator} {row.name} ({row.team}): {row.fdr_rating:.1f} FDR ({row.fdr_bonus:+.1f})")
+
+    total = fdr['fdr_bonus'].sum()
+    print(f"\n📊 Total FDR Bonus/Penalty: {total:+.1f} points")
+    if total > 0:
+        print("✅ Squad benefits from easier fixtures!")
+    elif total < 0:
+        print("⚠️  Squad faces difficult fixtures")
+    else:
+        print("➡️  Squad has neutral fixture difficulty")
+
+
+def print_transfers(transfers):
+    """Print one line per transfer"""
+    for row in transfers.itertuples(index=False):
+        print(f"{row.action}: {row.name}{row.location} for £{row.price}m ({row.var_type})")
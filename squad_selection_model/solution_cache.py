@@ -0,0 +1,221 @@
+# solution_cache.py
+# Content-addressed cache of optimisation results, keyed on inputs and parameters
+
+import copy
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+from collections import Counter, OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Bump when the model changes in a way that changes results for the same inputs
+CACHE_VERSION = 1
+
+# Source -> current snapshot map kept in cache_dir, so later runs drop stale snapshots too
+SNAPSHOTS_FILE = 'snapshots.json'
+
+
+def snapshot_hash(df_players):
+    """Hash of a player snapshot (every value, the index and the column names)"""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df_players, index=True).to_numpy().tobytes())
+    digest.update(json.dumps([str(column) for column in df_players.columns]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _json_default(obj):
+    """Canonical JSON for the parameter types used by the models"""
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, pd.DataFrame):
+        return snapshot_hash(obj)
+    if hasattr(obj, 'team_fdr_ratings'):
+        return {'fdr_ratings': {str(team): rating for team, rating in obj.team_fdr_ratings.items()}}
+    return repr(obj)
+
+
+def _canonical_params(params):
+    """Parameters with dict keys as strings so tuple-keyed matrices serialise"""
+    def canonical(value):
+        if isinstance(value, dict):
+            return {str(k): canonical(v) for k, v in value.items()}
+        return value
+    return canonical(params)
+
+
+def solution_key(snapshot, team, params):
+    """
+    Key for one optimisation: snapshot + squad + bank + free transfers + parameters.
+
+    The first 16 characters are the snapshot's, so entries can be found and
+    dropped per snapshot.
+
+    Args:
+        snapshot: snapshot_hash of df_players
+        team: Team instance (starting_ids, bench_ids, budget, free_transfers)
+        params: Every objective and constraint parameter of the solve
+
+    Returns:
+        str: Cache key
+    """
+    payload = {
+        'version': CACHE_VERSION,
+        'snapshot': snapshot,
+        'starting': sorted(int(player_id) for player_id in team.starting_ids),
+        'bench': sorted(int(player_id) for player_id in team.bench_ids),
+        'bank': round(float(team.budget), 1),
+        'free_transfers': int(team.free_transfers),
+        'params': _canonical_params(params),
+    }
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=_json_default).encode('utf-8'))
+    return f"{snapshot[:16]}-{digest.hexdigest()}"
+
+
+class SolutionCache:
+    """
+    LRU cache of results with an optional on-disk tier.
+
+    Entries live in memory up to max_entries (least recently used evicted
+    first) and, with cache_dir, as pickles under cache_dir/<snapshot>/. When
+    a source (e.g. a gameweek) is seen with a new snapshot, every entry of
+    its previous snapshot is dropped from both tiers; with cache_dir the
+    source -> snapshot map is kept in cache_dir/snapshots.json, so this also
+    holds across runs. Values are copied on the way in and out, so callers
+    can modify what they get back.
+    """
+
+    def __init__(self, max_entries=256, cache_dir=None):
+        """
+        Args:
+            max_entries (int): Entries kept in memory
+            cache_dir: Directory for the on-disk tier (None for memory only)
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._snapshots = self._load_snapshots()
+        self._lock = threading.Lock()
+        self.counters = Counter()
+
+    def _load_snapshots(self):
+        if self.cache_dir is None:
+            return {}
+        try:
+            with open(os.path.join(self.cache_dir, SNAPSHOTS_FILE), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_snapshots(self):
+        """Write the source -> snapshot map atomically (called with the lock held)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, SNAPSHOTS_FILE)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._snapshots, f, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def _path(self, key):
+        snapshot, name = key.split('-', 1)
+        return os.path.join(self.cache_dir, snapshot, f"{name}.pkl")
+
+    def observe_snapshot(self, source, snapshot):
+        """Record the current snapshot of a source, invalidating its previous one if it changed"""
+        source = str(source)
+        with self._lock:
+            previous = self._snapshots.get(source)
+            self._snapshots[source] = snapshot
+            if self.cache_dir is not None and previous != snapshot:
+                self._save_snapshots()
+        if previous is not None and previous != snapshot:
+            self.invalidate(previous)
+
+    def key_for(self, df_players, team, params, source=None, snapshot=None):
+        """
+        Cache key for a solve; with source, a changed snapshot invalidates the old entries.
+
+        Args:
+            df_players: Player snapshot (hashed unless snapshot is given)
+            team: Team instance
+            params: Every objective and constraint parameter of the solve
+            source: Optional name of where df_players came from (gameweek, CSV path)
+            snapshot: Precomputed snapshot_hash(df_players)
+        """
+        snapshot = snapshot or snapshot_hash(df_players)
+        if source is not None:
+            self.observe_snapshot(source, snapshot)
+        return solution_key(snapshot, team, params)
+
+    def get(self, key):
+        """Cached value for key, or None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.counters['hits'] += 1
+                return copy.deepcopy(self._entries[key])
+
+        if self.cache_dir is not None and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), 'rb') as f:
+                    value = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                value = None
+            if value is not None:
+                self.counters['disk_hits'] += 1
+                self._remember(key, value)
+                return copy.deepcopy(value)
+
+        self.counters['misses'] += 1
+        return None
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def put(self, key, value):
+        """Store value in memory and, with cache_dir, on disk"""
+        value = copy.deepcopy(value)
+        self._remember(key, value)
+        if self.cache_dir is not None:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f)
+            os.replace(tmp_path, path)
+
+    def invalidate(self, snapshot):
+        """Drop every entry of a snapshot from memory and disk"""
+        prefix = f"{snapshot[:16]}-"
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+                self.counters['invalidated'] += 1
+        if self.cache_dir is not None:
+            shutil.rmtree(os.path.join(self.cache_dir, snapshot[:16]), ignore_errors=True)
+
+    def clear(self):
+        """Drop everything from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            self._snapshots.clear()
+        if self.cache_dir is not None:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def stats(self):
+        """Hit/miss counters and the number of entries in memory"""
+        stats = dict(self.counters)
+        stats['entries'] = len(self._entries)
+        return stats
@@ -1,16 +1,49 @@
+import operator
+
+import numpy as np
 import pulp
+from bench_order import optimise_bench_order
+
+# Decision variable types making up each part of the squad, in output order
+STARTING_VAR_TYPES = ['stay_starting', 'in_to_starting_free', 'in_to_starting_paid', 'bench_to_starting']
+BENCH_VAR_TYPES = ['stay_bench', 'in_to_bench_free', 'in_to_bench_paid', 'starting_to_bench']
+OUT_VAR_TYPES = ['out_starting_free', 'out_starting_paid', 'out_bench_free', 'out_bench_paid']
+
+_var_value = operator.attrgetter('varValue')
+
+def solution_matrix(vars):
+    """
+    Read the solved values of all decision variables in one pass.
+
+    Args:
+        vars: Dictionary of decision variables (var type -> index label -> LpVariable)
+
+    Returns:
+        tuple: (var_types, labels, values) where values[k, i] is the value of
+               vars[var_types[k]][labels[i]]; unsolved or missing variables are NaN
+    """
+    var_types = list(vars)
+    labels = list(vars[var_types[0]]) if var_types else []
+
+    rows = []
+    for var_type in var_types:
+        player_vars = vars[var_type]
+        if list(player_vars) == labels:
+            row = list(map(_var_value, player_vars.values()))
+        else:
+            row = [player_vars[label].varValue if label in player_vars else None for label in labels]
+        rows.append(row)
+
+    # None (no solution) becomes NaN
+    values = np.array(rows, dtype=float).reshape(len(var_types), len(labels))
+    return var_types, labels, values
+
 def extract_decision_variable_results(vars):
     """Extract decision variable results from optimization"""
-    results = {}
-    
-    for var_type, player_vars in vars.items():
-        active_ids = [
-            idx for idx, var in player_vars.items()
-            if var.value() is not None and var.value() > 0
-        ]
-        results[var_type] = active_ids
-    
-    return results
+    var_types, labels, values = solution_matrix(vars)
+    active = values > 0
+
+    return {var_type: [labels[i] for i in np.flatnonzero(active[k])] for k, var_type in enumerate(var_types)}
 
 def create_transfer_type_mapping(decision_results):
 
@@ -39,38 +72,22 @@ def create_transfer_type_mapping(decision_results):
     
     return index_to_transfer_type
 
+def _indices(decision_results, var_types):
+    return [idx for var_type in var_types for idx in decision_results.get(var_type, [])]
+
 def create_output_dataframes(decision_results, df_players, prob):
     # Create transfer type mapping
     transfer_type_map = create_transfer_type_mapping(decision_results)
     
-    # Get starting player indices
-    starting_indices = (
-        decision_results.get('stay_starting', []) +
-        decision_results.get('in_to_starting_free', []) +
-        decision_results.get('in_to_starting_paid', []) +
-        decision_results.get('bench_to_starting', [])
-    )
-    
-    # Get bench player indices
-    bench_indices = (
-        decision_results.get('stay_bench', []) +
-        decision_results.get('in_to_bench_free', []) +
-        decision_results.get('in_to_bench_paid', []) +
-        decision_results.get('starting_to_bench', [])
-    )
+    # Index labels of each part of the squad
+    starting_indices = _indices(decision_results, STARTING_VAR_TYPES)
+    bench_indices = _indices(decision_results, BENCH_VAR_TYPES)
+    out_indices = _indices(decision_results, OUT_VAR_TYPES)
 
-    # get out indicies
-    out_indices = (
-        decision_results.get('out_starting_free', []) +
-        decision_results.get('out_starting_paid', []) +
-        decision_results.get('out_bench_free', []) +
-        decision_results.get('out_bench_paid', [])
-    )
-    
-    # Create dataframes
-    starting_df = df_players.iloc[starting_indices].copy()
-    bench_df = df_players.iloc[bench_indices].copy()
-    out_df = df_players.iloc[out_indices].copy() 
+    # Create dataframes (by label: the model is keyed on df_players.index)
+    starting_df = df_players.loc[starting_indices].copy()
+    bench_df = df_players.loc[bench_indices].copy()
+    out_df = df_players.loc[out_indices].copy()
     
     # Add transfer type to dataframes
     starting_df['transfer_type'] = starting_df.index.map(transfer_type_map)
@@ -99,7 +116,12 @@ def create_output_dataframes(decision_results, df_players, prob):
     bench_df['is_captain'] = False  # Captains should never be on bench
     bench_df['is_vice_captain'] = False  # Vice-captains should never be on bench
     
-    # Add bench order (1-4)
+    # Add bench order (1-4): GK first, then outfield by expected points
+    bench_df = bench_df.sort_values(
+        by=['position', 'expected_points'],
+        key=lambda col: col.eq('Goalkeeper') if col.name == 'position' else col,
+        ascending=[False, False]
+    )
     bench_df['bench_order'] = range(1, len(bench_df) + 1)
     
     # Get optimization status
@@ -142,7 +164,7 @@ def select_vice_captain(starting_df, captain_idx, df_players):
         return None
     
     # Get captain's team
-    captain_team = df_players.iloc[captain_idx]['team']
+    captain_team = df_players.loc[captain_idx, 'team']
     
     # Filter starting players from different teams
     eligible_vc = starting_df[starting_df['team'] != captain_team]
@@ -179,7 +201,17 @@ def calculate_total_cost(starting_df, bench_df):
     return starting_cost + bench_cost
 
 # Main usage example
-def process_optimization_results(vars, df_players, prob):
+def process_optimization_results(vars, df_players, prob, bench_simulator=None):
+    """
+    Turn a solved model into the squad dictionary.
+
+    Args:
+        vars: Dictionary of decision variables
+        df_players: DataFrame with player data
+        prob: Solved PuLP problem
+        bench_simulator: Optional PointsSimulator; when given, the outfield bench is
+                         re-ordered for the best expected points after auto-subs
+    """
     
     # Step 1: Extract decision variable results using your preferred method
     decision_results = extract_decision_variable_results(vars)
@@ -191,7 +223,7 @@ def process_optimization_results(vars, df_players, prob):
     )
         
     # Return all outputs as a dictionary for easy access
-    return {
+    squad = {
         'starting_df': starting_df,
         'bench_df': bench_df,
         'out_df': out_df,
@@ -201,6 +233,13 @@ def process_optimization_results(vars, df_players, prob):
         'gameweek': gameweek,
         'optimization_status': optimization_status,
         'total_cost': total_cost,
+        'objective': pulp.value(prob.objective) if prob is not None and prob.status == 1 else None,
         'decision_results': decision_results  # Include raw results for reference
     }
 
+    # Step 2: Simulation-based bench order (formation-valid auto-subs and minutes risk)
+    if bench_simulator is not None and len(bench_df) == 4 and captain_idx is not None:
+        squad['bench_df'] = optimise_bench_order(squad, df_players, simulator=bench_simulator)
+
+    return squad
+
@@ -0,0 +1,155 @@
+# synthetic.py
+# Realistic synthetic player pools and squads for benchmarks and offline experiments
+
+import numpy as np
+import pandas as pd
+
+from team_class import Team
+
+POSITIONS = ['Goalkeeper', 'Defender', 'Midfielder', 'Forward']
+
+# Share of each position in a real FPL pool
+POSITION_SHARES = [0.11, 0.33, 0.40, 0.16]
+
+# Cheapest price and spread of prices by position (£m)
+PRICE_FLOOR = {'Goalkeeper': 4.0, 'Defender': 4.0, 'Midfielder': 4.5, 'Forward': 4.5}
+PRICE_SCALE = {'Goalkeeper': 0.5, 'Defender': 0.8, 'Midfielder': 1.4, 'Forward': 1.6}
+
+STATUSES = ['a', 'd', 'i', 's', 'u']
+STATUS_SHARES = [0.90, 0.04, 0.04, 0.01, 0.01]
+
+# Squad slots and the starting XI used for synthetic squads (4-4-2)
+SQUAD_SLOTS = {'Goalkeeper': 2, 'Defender': 5, 'Midfielder': 5, 'Forward': 3}
+STARTING_SLOTS = {'Goalkeeper': 1, 'Defender': 4, 'Midfielder': 4, 'Forward': 2}
+
+
+def make_fixtures(n_teams, rng):
+    """Random single-gameweek pairing of teams; with an odd count one team has no fixture"""
+    order = rng.permutation(np.arange(1, n_teams + 1))
+    opponents = {}
+    for home, away in zip(order[0::2], order[1::2]):
+        opponents[int(home)] = int(away)
+        opponents[int(away)] = int(home)
+    return opponents
+
+
+def make_player_pool(n_players=700, n_teams=20, seed=0, gameweek=1):
+    """
+    Synthetic df_players with the columns and distributions of player_data_loader's output.
+
+    - Positions follow real pool shares; prices are right-skewed per position.
+    - xP grows with price and team strength; about a third of players are
+      fringe players with few minutes and near-zero xP.
+    - A few players are doubtful, injured, suspended or unavailable, with
+      their xP cut accordingly.
+
+    Args:
+        n_players (int): Pool size
+        n_teams (int): Clubs in the league (each plays one fixture)
+        seed (int): Random seed
+        gameweek (int): Gameweek written to the 'gameweek' column
+
+    Returns:
+        pd.DataFrame: One row per player with a RangeIndex
+    """
+    rng = np.random.default_rng(seed)
+
+    team_id = np.sort(np.resize(np.arange(1, n_teams + 1), n_players))
+    position = rng.choice(POSITIONS, size=n_players, p=POSITION_SHARES)
+    # Every club gets 2 goalkeepers and 3 of each outfield position (when it has enough players)
+    minimum = np.array(['Goalkeeper'] * 2 + ['Defender', 'Midfielder', 'Forward'] * 3)
+    rank_in_team = np.arange(n_players) - np.searchsorted(team_id, team_id)
+    core = rank_in_team < len(minimum)
+    position[core] = minimum[rank_in_team[core]]
+
+    floor = pd.Series(position).map(PRICE_FLOOR).to_numpy()
+    scale = pd.Series(position).map(PRICE_SCALE).to_numpy()
+    price = np.round(floor + rng.gamma(1.5, scale), 1)
+
+    strength = rng.normal(0, 0.6, n_teams + 1)
+    regular = rng.random(n_players) > 0.35
+    xp = np.where(
+        regular,
+        np.maximum(0, 0.9 * (price - floor) + 2.0 + strength[team_id] + rng.normal(0, 1.0, n_players)),
+        np.maximum(0, rng.normal(0.4, 0.4, n_players)),
+    )
+
+    status = rng.choice(STATUSES, size=n_players, p=STATUS_SHARES)
+    xp = np.where(status == 'd', xp * 0.5, np.where(status == 'a', xp, 0.0))
+
+    opponents = make_fixtures(n_teams, rng)
+    opponent_id = np.array([opponents.get(int(t), np.nan) for t in team_id], dtype=float)
+
+    popularity = np.exp(0.45 * xp + rng.normal(0, 0.8, n_players))
+    selected_by_percent = np.round(np.minimum(80, 100 * popularity / popularity.sum() * 15), 1)
+
+    return pd.DataFrame({
+        'id': np.arange(1, n_players + 1),
+        'name': [f"Player{i}" for i in range(1, n_players + 1)],
+        'position': position,
+        'team': [f"Team {t}" for t in team_id],
+        'team_id': team_id,
+        'opponent_id': opponent_id,
+        'opponent': [f"Team {opponents[int(t)]}" if int(t) in opponents else 'No fixture' for t in team_id],
+        'price': price,
+        'expected_points': np.round(xp, 1),
+        'selected_by_percent': selected_by_percent,
+        'status': status,
+        'gameweek': gameweek,
+        'minutes': np.where(regular, rng.integers(60, 90, n_players) * gameweek, rng.integers(0, 30, n_players)),
+        'form': np.round(np.maximum(0, xp + rng.normal(0, 1.0, n_players)), 1),
+    })
+
+
+def make_team(df_players, seed=0, team_id=1, bank=0.0, free_transfers=1, budget=100.0, max_per_team=3):
+    """
+    Random valid squad (15 available players, max 3 per club, within budget) as a Team.
+
+    The best 4-4-2 by xP starts; the rest make up the bench.
+
+    Args:
+        df_players: DataFrame from make_player_pool (or real data)
+        seed (int): Random seed
+        team_id: Team ID used in outputs
+        bank (float): Money in the bank
+        free_transfers (int): Free transfers available
+        budget (float): Most the squad may cost
+        max_per_team (int): Players allowed from one club
+
+    Returns:
+        Team: Squad built with Team.from_squad
+    """
+    rng = np.random.default_rng(seed)
+    available = df_players[df_players['status'] == 'a']
+    cheapest = available.groupby('position')['price'].min()
+
+    slots = [pos for pos in POSITIONS for _ in range(SQUAD_SLOTS[pos])]
+    for _ in range(100):
+        picks, club_counts, remaining = [], {}, budget
+        for k, pos in enumerate(slots):
+            reserve = sum(cheapest[p] for p in slots[k + 1:])
+            candidates = available[
+                (available['position'] == pos)
+                & (available['price'] <= remaining - reserve)
+                & ~available['id'].isin(picks)
+                & (available['team_id'].map(club_counts).fillna(0) < max_per_team)
+            ]
+            if candidates.empty:
+                break
+            player = candidates.iloc[rng.integers(len(candidates))]
+            picks.append(player['id'])
+            club_counts[player['team_id']] = club_counts.get(player['team_id'], 0) + 1
+            remaining -= player['price']
+        if len(picks) == len(slots):
+            break
+    else:
+        raise ValueError("Could not build a valid squad from this player pool")
+
+    squad = available.set_index('id').loc[picks]
+    starting = [
+        player_id
+        for pos in POSITIONS
+        for player_id in squad[squad['position'] == pos].nlargest(STARTING_SLOTS[pos], 'expected_points').index
+    ]
+    bench = [player_id for player_id in picks if player_id not in starting]
+    return Team.from_squad(team_id, df_players, starting, bench, budget=bank, free_transfers=free_transfers)
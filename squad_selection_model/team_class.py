@@ -34,8 +34,72 @@ class Team:
         if picks_resp.status_code != 200:
             raise ValueError(f"Could not fetch team {self.team_id}")
         
-        picks_data = picks_resp.json()
+        self._load_picks(bootstrap, picks_resp.json())
+    
+    @classmethod
+    def from_picks(cls, team_id, bootstrap, picks_data, budget=None, free_transfers=1):
+        """
+        Build a Team from already-fetched API data (no requests made)
         
+        Args:
+            team_id: FPL team ID
+            bootstrap: bootstrap-static JSON, shared between teams
+            picks_data: entry/{id}/event/{gw}/picks JSON
+            budget: Bank balance (default: bank from picks_data)
+            free_transfers: Number of free transfers available
+        """
+        team = cls.__new__(cls)
+        team.team_id = team_id
+        team.budget = picks_data['entry_history']['bank'] / 10 if budget is None else budget
+        team.free_transfers = free_transfers
+        team.current_gw = next((e['id'] for e in bootstrap['events'] if e['is_current']), 
+                               next((e['id'] for e in bootstrap['events'] if e['is_next']), 1))
+        team._load_picks(bootstrap, picks_data)
+        return team
+    
+    @classmethod
+    def from_squad(cls, team_id, df_players, starting_ids, bench_ids, budget=0.0, free_transfers=1, current_gw=None):
+        """
+        Build a Team from player IDs in a df_players snapshot (no requests made),
+        e.g. for synthetic or historical squads
+
+        Args:
+            team_id: Team ID used in outputs
+            df_players: DataFrame with player data ('id', 'name', 'position', 'team', 'price', 'expected_points')
+            starting_ids: IDs of the 11 starters
+            bench_ids: IDs of the 4 substitutes
+            budget: Bank balance
+            free_transfers: Number of free transfers available
+            current_gw: Gameweek the squad was picked for (default: df_players' gameweek)
+        """
+        team = cls.__new__(cls)
+        team.team_id = team_id
+        team.budget = budget
+        team.free_transfers = free_transfers
+        if current_gw is None and 'gameweek' in df_players.columns:
+            current_gw = int(df_players['gameweek'].iloc[0])
+        team.current_gw = current_gw
+
+        starting_ids, bench_ids = list(starting_ids), list(bench_ids)
+        squad = df_players.set_index('id').loc[starting_ids + bench_ids]
+        team.current_team = pd.DataFrame({
+            'player_id': squad.index.to_numpy(),
+            'name': squad['name'].to_numpy(),
+            'position': squad['position'].map({'Goalkeeper': 'GK', 'Defender': 'DEF', 'Midfielder': 'MID', 'Forward': 'FWD'}).to_numpy(),
+            'team': squad['team'].to_numpy(),
+            'price': squad['price'].to_numpy(),
+            'is_starting': [True] * len(starting_ids) + [False] * len(bench_ids),
+            'expected_points': squad['expected_points'].to_numpy(),
+        })
+
+        team.starting_ids = set(starting_ids)
+        team.bench_ids = set(bench_ids)
+        team.all_ids = team.starting_ids | team.bench_ids
+        team.team_value = team.current_team['price'].sum()
+        return team
+
+    def _load_picks(self, bootstrap, picks_data):
+        """Build current_team and the ID sets from bootstrap and picks JSON"""
         # Create player lookup
         players = {p['id']: p for p in bootstrap['elements']}
         
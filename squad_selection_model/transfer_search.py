@@ -0,0 +1,333 @@
+# transfer_search.py
+# Fast combinatorial search over 0-2 transfers without a MILP
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from simulation import position_codes
+from lineup_solver import SQUAD_POSITIONS, select_lineups, squad_layout
+
+# Added to (or taken from) a locked slot's xP when picking the XI; larger than any XI's xP
+LOCK_POINTS = 1000.0
+
+
+def locked_lineups(xp, lock):
+    """
+    Best XI and captain for many squads with some slots locked to a role.
+
+    Shifting a slot's xP by +/-LOCK_POINTS makes select_lineups start (+1) or
+    bench (-1) it whenever a valid XI allows, and the greedy pick is still the
+    best XI among those. Points and the captain use the real xP.
+
+    Args:
+        xp: Array (n_squads, 15) of expected points in canonical layout
+        lock: Array (n_squads, 15): +1 must start, -1 must be benched, 0 free
+
+    Returns:
+        tuple: (starting mask, captain slot, lineup points including the captain bonus)
+    """
+    starting, _ = select_lineups(xp + LOCK_POINTS * lock)
+    starters_xp = np.where(starting, xp, -np.inf)
+    captain = starters_xp.argmax(axis=1)
+    points = np.where(starting, xp, 0.0).sum(axis=1) + starters_xp.max(axis=1)
+    return starting, captain, points
+
+
+def dominance_pool(players, price, points, team_codes, keep_threshold=6):
+    """
+    Players not dominated by keep_threshold or more other teams.
+
+    A player is dominated by a team when that team has another player (from
+    players) who is no more expensive and scores at least as many points.
+
+    Args:
+        players: Integer player positions to prune (one position)
+        price: Price per player
+        points: Points per player used for the comparison
+        team_codes: Integer team code per player
+        keep_threshold (int): Dominating teams needed to drop a player
+
+    Returns:
+        np.ndarray: Sorted integer positions of the players kept
+    """
+    if len(players) == 0:
+        return players
+    n_teams = team_codes.max() + 1
+
+    # Sort by price ascending, points descending: dominators come first
+    order = players[np.lexsort((-points[players], price[players]))]
+    best_by_team = np.full((len(order), n_teams), -np.inf)
+    best_by_team[np.arange(len(order)), team_codes[order]] = points[order]
+    best_by_team = np.maximum.accumulate(best_by_team, axis=0)
+
+    # Best points per team among strictly earlier players
+    earlier = np.vstack([np.full((1, n_teams), -np.inf), best_by_team[:-1]])
+    dominating_teams = (earlier >= points[order][:, None]).sum(axis=1)
+    return np.sort(order[dominating_teams < keep_threshold])
+
+
+class TransferSearch:
+    """
+    Enumerate every 1- and 2-transfer plan with NumPy and rank them.
+
+    Scoring matches the transfer MILP with base_opposing_penalty=0 and no FDR
+    calculator: best formation-valid XI plus captain, minus penalty_points for
+    each transfer beyond the free ones, under the same squad-cost limit and
+    3-per-team rule. As with the MILP's flow constraints, an incoming player
+    takes the outgoing player's place in the XI or on the bench, and only
+    retained players can move between the two. Buyable players are pruned by
+    dominance first: a player is dropped when six or more other teams each
+    offer a same-position player who is no more expensive and has at least the
+    same xP. At most five of those
+    can be blocked in any plan (full teams or the other incoming player), so
+    the best plan is never lost. Two-transfer plans are then skipped when an
+    upper bound built from the single-swap scores cannot reach the current
+    top-k, so only a small share of them is scored exactly.
+    """
+
+    def __init__(self, df_players, my_team, penalty_points=4, budget_limit=None, max_per_team=3):
+        """
+        Initialize the search from a player snapshot and the current team
+
+        Args:
+            df_players: DataFrame with player data
+            my_team: Team instance (current squad)
+            penalty_points: Points penalty per paid transfer
+            budget_limit: Maximum squad cost (matches add_budget_constraint; default: squad value plus bank,
+                          the budget the service and backtest give the MILP)
+            max_per_team: Maximum players from one club
+        """
+        self.df_players = df_players
+        self.my_team = my_team
+        self.penalty_points = penalty_points
+        self.budget_limit = (round(float(my_team.team_value) + my_team.budget, 1) if budget_limit is None
+                             else budget_limit)
+        self.max_per_team = max_per_team
+
+        self.xp = pd.to_numeric(df_players['expected_points'], errors='coerce').fillna(0).to_numpy(dtype=float)
+        self.price = df_players['price'].to_numpy(dtype=float)
+        self.positions = position_codes(df_players)
+        team_ids = df_players['team_id'].to_numpy()
+        self.team_codes = pd.factorize(team_ids)[0]
+        self.n_teams = self.team_codes.max() + 1
+
+        owned = df_players['id'].isin(my_team.all_ids).to_numpy()
+        self.squad = df_players.index.get_indexer(squad_layout(df_players, df_players.index[owned]))
+        # Role an incoming player inherits in each slot: +1 starting, -1 bench
+        squad_ids = df_players['id'].to_numpy()[self.squad]
+        self.slot_roles = np.where([my_team.is_in_starting(player_id) for player_id in squad_ids], 1, -1)
+        self.buyable = (df_players['status'] == 'a').to_numpy() & ~owned
+
+        self.squad_cost = self.price[self.squad].sum()
+        self.team_counts = np.bincount(self.team_codes[self.squad], minlength=self.n_teams)
+
+    def candidate_pool(self, keep_threshold=6):
+        """
+        Buyable players per position that survive dominance pruning.
+
+        Returns:
+            dict: position code -> array of integer player positions
+        """
+        return {code: dominance_pool(np.flatnonzero(self.buyable & (self.positions == code)),
+                                     self.price, self.xp, self.team_codes, keep_threshold)
+                for code in range(4)}
+
+    def _hits(self, n_transfers):
+        return self.penalty_points * max(0, n_transfers - min(self.my_team.free_transfers, 5))
+
+    def _one_transfer_candidates(self, pool):
+        out_slots, in_players = [], []
+        for slot, code in enumerate(SQUAD_POSITIONS):
+            out_player = self.squad[slot]
+            incoming = pool[code]
+            team_after = self.team_counts[self.team_codes[incoming]] + 1 \
+                - (self.team_codes[incoming] == self.team_codes[out_player])
+            cost_after = self.squad_cost - self.price[out_player] + self.price[incoming]
+            ok = (team_after <= self.max_per_team) & (cost_after <= self.budget_limit + 1e-9)
+            out_slots.append(np.full(ok.sum(), slot))
+            in_players.append(incoming[ok])
+        return np.concatenate(out_slots), np.concatenate(in_players)
+
+    def _locks(self, *slots):
+        """Lock array (n_plans, 15) giving each replaced slot (-1: none) its outgoing player's role"""
+        lock = np.zeros((len(slots[0]), 15))
+        for slot in slots:
+            replaced = np.flatnonzero(slot >= 0)
+            lock[replaced, slot[replaced]] = self.slot_roles[slot[replaced]]
+        return lock
+
+    def _single_swap_scores(self, pool, base_xp):
+        """
+        Lineup points for every single swap (slot -> pool player), ignoring
+        budget and team limits. Used to bound two-transfer plans.
+
+        Returns:
+            np.ndarray: (15, n_players) with NaN where the swap is not a candidate
+        """
+        scores = np.full((15, len(self.xp)), np.nan)
+        for slot, code in enumerate(SQUAD_POSITIONS):
+            incoming = pool[code]
+            xp = np.tile(base_xp, (len(incoming), 1))
+            xp[:, slot] = self.xp[incoming]
+            scores[slot, incoming] = locked_lineups(xp, self._locks(np.full(len(incoming), slot)))[2]
+        return scores
+
+    def _two_transfer_candidates(self, pool, swap_scores=None, threshold=-np.inf):
+        slot_pairs = np.array(list(itertools.combinations(range(15), 2)))
+        out_a, out_b, in_a, in_b = [], [], [], []
+
+        # Group slot pairs by position pair so each group is one broadcast
+        for code_a, code_b in itertools.combinations_with_replacement(range(4), 2):
+            pairs = slot_pairs[(SQUAD_POSITIONS[slot_pairs[:, 0]] == code_a) & (SQUAD_POSITIONS[slot_pairs[:, 1]] == code_b)]
+            if len(pairs) == 0:
+                continue
+
+            ia, ib = np.meshgrid(pool[code_a], pool[code_b], indexing='ij')
+            ia, ib = ia.ravel(), ib.ravel()
+            # Same position: unordered pairs of distinct players
+            keep = ia < ib if code_a == code_b else np.ones(len(ia), dtype=bool)
+            ia, ib = ia[keep], ib[keep]
+
+            pa, pb = self.squad[pairs[:, 0]], self.squad[pairs[:, 1]]
+            cost_after = (self.squad_cost - self.price[pa] - self.price[pb])[:, None] + (self.price[ia] + self.price[ib])[None, :]
+            ok = cost_after <= self.budget_limit + 1e-9
+
+            ta, tb = self.team_codes[ia][None, :], self.team_codes[ib][None, :]
+            oa, ob = self.team_codes[pa][:, None], self.team_codes[pb][:, None]
+            for team in (ta, tb):
+                after = self.team_counts[team] - (oa == team) - (ob == team) + (ta == team) + (tb == team)
+                ok &= after <= self.max_per_team
+
+            # Changing one player's xP from y to x moves XI + captain points by at most
+            # 2 * max(0, x - y), and the pair's XI is valid for either single swap (the
+            # other slot is unlocked there), so each single swap bounds the pair
+            if swap_scores is not None:
+                xa, xb = self.xp[ia][None, :], self.xp[ib][None, :]
+                ya, yb = self.xp[pa][:, None], self.xp[pb][:, None]
+                bound = np.minimum(
+                    swap_scores[pairs[:, 0]][:, ia] + 2 * np.maximum(0, xb - yb),
+                    swap_scores[pairs[:, 1]][:, ib] + 2 * np.maximum(0, xa - ya),
+                )
+                ok &= bound - self._hits(2) >= threshold - 1e-9
+
+            r, c = np.nonzero(ok)
+            out_a.append(pairs[r, 0])
+            out_b.append(pairs[r, 1])
+            in_a.append(ia[c])
+            in_b.append(ib[c])
+
+        return (np.concatenate(out_a), np.concatenate(out_b),
+                np.concatenate(in_a), np.concatenate(in_b))
+
+    def search(self, max_transfers=2, top_k=10, keep_threshold=6):
+        """
+        Rank all plans with up to max_transfers (0-2) transfers.
+
+        Args:
+            max_transfers (int): 0, 1 or 2
+            top_k (int): Number of plans to return
+            keep_threshold (int): Dominance pruning threshold (see class docstring)
+
+        Returns:
+            pd.DataFrame: Top plans sorted by net points, with transfers_out/transfers_in
+                          (df_players index labels), hits, squad_cost, lineup_points,
+                          net_points, captain_idx, starting (labels) and bench (labels)
+        """
+        pool = self.candidate_pool(keep_threshold)
+        base_xp = self.xp[self.squad]
+
+        plan_out, plan_in, plan_xp, plan_points, plan_hits, plan_cost = [], [], [], [], [], []
+
+        # No transfers
+        plan_out.append(np.full((1, 2), -1))
+        plan_in.append(np.full((1, 2), -1))
+        plan_xp.append(base_xp[None, :])
+        plan_points.append(locked_lineups(base_xp[None, :], np.zeros((1, 15)))[2])
+        plan_hits.append(np.zeros(1))
+        plan_cost.append(np.array([self.squad_cost]))
+
+        if max_transfers >= 1:
+            # Every single swap is scored once; feasible ones are the 1-transfer plans
+            swap_scores = self._single_swap_scores(pool, base_xp)
+            slots, incoming = self._one_transfer_candidates(pool)
+            xp = np.tile(base_xp, (len(slots), 1))
+            xp[np.arange(len(slots)), slots] = self.xp[incoming]
+            plan_out.append(np.column_stack([slots, np.full(len(slots), -1)]))
+            plan_in.append(np.column_stack([incoming, np.full(len(slots), -1)]))
+            plan_xp.append(xp)
+            plan_points.append(swap_scores[slots, incoming])
+            plan_hits.append(np.full(len(slots), self._hits(1)))
+            plan_cost.append(self.squad_cost - self.price[self.squad[slots]] + self.price[incoming])
+
+        if max_transfers >= 2:
+            # Exact scores of 0/1-transfer plans give the bar two-transfer plans must clear
+            known = np.concatenate(plan_points) - np.concatenate(plan_hits)
+            threshold = -np.partition(-known, top_k - 1)[top_k - 1] if len(known) >= top_k else -np.inf
+
+            sa, sb, ia, ib = self._two_transfer_candidates(pool, swap_scores, threshold)
+            rows = np.arange(len(sa))
+            xp = np.tile(base_xp, (len(sa), 1))
+            xp[rows, sa] = self.xp[ia]
+            xp[rows, sb] = self.xp[ib]
+            plan_out.append(np.column_stack([sa, sb]))
+            plan_in.append(np.column_stack([ia, ib]))
+            plan_xp.append(xp)
+            plan_points.append(locked_lineups(xp, self._locks(sa, sb))[2])
+            plan_hits.append(np.full(len(sa), self._hits(2)))
+            plan_cost.append(self.squad_cost - self.price[self.squad[sa]] - self.price[self.squad[sb]]
+                             + self.price[ia] + self.price[ib])
+
+        out_slots = np.vstack(plan_out)
+        in_players = np.vstack(plan_in)
+        xp = np.vstack(plan_xp)
+        points = np.concatenate(plan_points)
+        hits = np.concatenate(plan_hits)
+        cost = np.concatenate(plan_cost)
+
+        net = points - hits
+        top = np.argpartition(-net, top_k - 1)[:top_k] if len(net) > top_k else np.arange(len(net))
+        top = top[np.argsort(-net[top], kind='stable')]
+
+        starting, captain, _ = locked_lineups(xp[top], self._locks(out_slots[top, 0], out_slots[top, 1]))
+        index = self.df_players.index
+        plans = []
+        for row, plan in enumerate(top):
+            squad = self.squad.copy()
+            for slot, player in zip(out_slots[plan], in_players[plan]):
+                if slot >= 0:
+                    squad[slot] = player
+            plans.append({
+                'n_transfers': int((out_slots[plan] >= 0).sum()),
+                'transfers_out': [index[self.squad[s]] for s in out_slots[plan] if s >= 0],
+                'transfers_in': [index[p] for p in in_players[plan] if p >= 0],
+                'hits': float(hits[plan]),
+                'squad_cost': round(float(cost[plan]), 1),
+                'lineup_points': float(points[plan]),
+                'net_points': float(net[plan]),
+                'captain_idx': index[squad[captain[row]]],
+                'starting': list(index[squad[starting[row]]]),
+                'bench': list(index[squad[~starting[row]]]),
+            })
+        return pd.DataFrame(plans)
+
+
+def describe_plans(plans, df_players):
+    """
+    Print a readable summary of ranked transfer plans.
+    """
+    print("\n🔁 TOP TRANSFER PLANS")
+    print("=" * 60)
+    for rank, plan in plans.iterrows():
+        if plan['n_transfers'] == 0:
+            moves = "No transfers"
+        else:
+            moves = ", ".join(
+                f"{df_players.loc[o, 'name']} ➜ {df_players.loc[i, 'name']}"
+                for o, i in zip(plan['transfers_out'], plan['transfers_in'])
+            )
+        captain = df_players.loc[plan['captain_idx'], 'name']
+        hit_text = f" (-{plan['hits']:.0f} hit)" if plan['hits'] else ""
+        print(f"{rank + 1:2d}. {plan['net_points']:.2f} pts{hit_text} | {moves} | C: {captain}")
+    print("=" * 60)
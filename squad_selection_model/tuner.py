@@ -0,0 +1,373 @@
+# tuner.py
+# Random search with successive halving over the objective weights, scored by replaying past gameweeks
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtest import available_gameweeks, initial_state, replay, snapshot_path
+from opposing_teams import get_position_penalty_matrix
+
+# Parameters as build_transfer_model uses them today; always evaluated as the baseline
+DEFAULT_PARAMS = {
+    'penalty_points': 4,
+    'base_opposing_penalty': 0.5,
+    'fdr_penalty_weight': 1.0,
+    'position_penalty_matrix': None,
+    'bench_selection': None,
+}
+
+# Search space per parameter:
+#   ('uniform', low, high), ('int', low, high)
+#   ('matrix', low, high): every default position multiplier scaled by a log-uniform factor
+#   ('bench', {threshold: spec}): add_bench_selection_constraints thresholds, or None (half the time)
+SEARCH_SPACE = {
+    'penalty_points': ('uniform', 2.0, 8.0),
+    'base_opposing_penalty': ('uniform', 0.0, 2.0),
+    'fdr_penalty_weight': ('uniform', 0.0, 2.0),
+    'position_penalty_matrix': ('matrix', 0.5, 2.0),
+    'bench_selection': ('bench', {
+        'min_minutes': ('int', 0, 90),
+        'max_price': ('uniform', 4.5, 7.0),
+        'min_expected_points': ('uniform', 0.0, 3.0),
+        'min_form': ('uniform', 0.0, 3.0),
+    }),
+}
+
+# Bench thresholds that are not sampled are opened up so only the sampled ones bind
+OPEN_BENCH_THRESHOLDS = {
+    'min_minutes': 0, 'min_price': 0.0, 'max_price': 100.0, 'min_expected_points': 0.0,
+    'max_expected_points': 100.0, 'min_ownership': 0.0, 'max_ownership': 100.0,
+    'allow_injured': True, 'min_form': 0.0,
+}
+
+
+def _sample(spec, rng):
+    kind = spec[0]
+    if kind == 'uniform':
+        return round(float(rng.uniform(spec[1], spec[2])), 3)
+    if kind == 'int':
+        return int(rng.integers(spec[1], spec[2] + 1))
+    if kind == 'matrix':
+        low, high = np.log(spec[1]), np.log(spec[2])
+        return {pair: round(multiplier * float(np.exp(rng.uniform(low, high))), 3)
+                for pair, multiplier in get_position_penalty_matrix().items()}
+    if kind == 'bench':
+        if rng.random() < 0.5:
+            return None
+        return dict(OPEN_BENCH_THRESHOLDS, **{name: _sample(sub, rng) for name, sub in spec[1].items()})
+    raise ValueError(f"Unknown search space entry: {spec}")
+
+
+def sample_params(space=SEARCH_SPACE, rng=None):
+    """One random parameter set; parameters outside the space keep DEFAULT_PARAMS"""
+    rng = rng if rng is not None else np.random.default_rng()
+    return dict(DEFAULT_PARAMS, **{name: _sample(spec, rng) for name, spec in space.items()})
+
+
+def _canonical(obj):
+    """Parameters with tuple dict keys as strings and numpy scalars as Python values, for JSON"""
+    if isinstance(obj, dict):
+        return {str(key): _canonical(val) for key, val in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(val) for val in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def params_label(params):
+    """Canonical JSON of a parameter set (leaderboard label and part of cache keys)"""
+    return json.dumps(_canonical(params), sort_keys=True)
+
+
+def season_fingerprint(data_dir, gameweeks):
+    """Content hash of a season's snapshots, so cached replays are dropped when the data changes"""
+    digest = hashlib.sha256()
+    for gameweek in gameweeks:
+        with open(snapshot_path(data_dir, gameweek), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class EvaluationCache:
+    """
+    Replays already run, keyed on parameters, season data, gameweeks and time limit.
+
+    Each entry holds the per-gameweek records and the team state after the last
+    gameweek, so a longer replay of the same configuration resumes from it.
+    With a path, entries are appended to a JSON-lines file and re-used by later runs.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry['key']] = (entry['records'], entry['state'])
+
+    @staticmethod
+    def key(params, fingerprint, gameweeks, time_limit=None):
+        payload = json.dumps([params_label(params), fingerprint, list(gameweeks), time_limit])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        self.hits += entry is not None
+        return entry
+
+    def put(self, key, records, state):
+        self.entries[key] = (records, state)
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': key, 'records': records, 'state': state}, default=_canonical) + "\n")
+
+
+def _replay_task(task):
+    data_dir, gameweeks, params, state, time_limit = task
+    return replay(data_dir, gameweeks, params, state, time_limit)
+
+
+def bootstrap_ci(values, n_bootstrap=2000, confidence=0.95, seed=0):
+    """Percentile bootstrap interval of the mean"""
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2:
+        return (float('nan'), float('nan'))
+    rng = np.random.default_rng(seed)
+    means = values[rng.integers(0, len(values), size=(n_bootstrap, len(values)))].mean(axis=1)
+    tail = (1 - confidence) / 2
+    low, high = np.quantile(means, [tail, 1 - tail])
+    return (round(float(low), 3), round(float(high), 3))
+
+
+def rung_lengths(n_gameweeks, min_gameweeks=4, eta=2):
+    """Gameweeks replayed at each rung: min_gameweeks, times eta per rung, ending at the full window"""
+    lengths = []
+    length = min(min_gameweeks, n_gameweeks)
+    while length < n_gameweeks:
+        lengths.append(length)
+        length *= eta
+    return lengths + [n_gameweeks]
+
+
+def tune(data_dirs, n_candidates=16, eta=2, min_gameweeks=4, gameweeks=None, space=SEARCH_SPACE, seed=0,
+         n_workers=None, time_limit=None, cache=None, n_bootstrap=2000, confidence=0.95, holdout_gameweeks=4):
+    """
+    Search the objective weights by random search with successive halving.
+
+    Every candidate (DEFAULT_PARAMS plus n_candidates - 1 random draws) replays
+    the first min_gameweeks of each season; the best 1/eta go on to a window
+    eta times longer, until the full window. Replays resume from the cached end
+    of the previous rung, so no gameweek is solved twice for a candidate, and
+    the replays of a rung run concurrently in worker processes. The default
+    parameters are always replayed over the full window as the baseline.
+
+    The last holdout_gameweeks of each season are kept out of the search. The
+    best candidate was picked for scoring highest on the tuning window, so its
+    score there is biased upwards; the winner and the defaults carry on from
+    their end-of-window state over the held-out gameweeks, and those scores
+    are the ones to trust.
+
+    Args:
+        data_dirs: Season directory, or a list of them (snapshots + live/ points)
+        n_candidates (int): Parameter sets in the first rung (including the defaults)
+        eta (int): Halving rate
+        min_gameweeks (int): Gameweeks per season in the first rung
+        gameweeks: Gameweeks to replay in every season (default: all snapshots of each season)
+        space: Search space (SEARCH_SPACE)
+        seed (int): Random seed for sampling and the bootstrap
+        n_workers: Worker processes (default: CPU count; 1 runs in this process)
+        time_limit: Optional CBC time limit per gameweek in seconds
+        cache: Optional EvaluationCache (default: in-memory)
+        n_bootstrap (int): Bootstrap resamples for the intervals
+        confidence (float): Interval coverage
+        holdout_gameweeks (int): Gameweeks at the end of each season used only to re-score the winner
+                                 (0 for none)
+
+    Returns:
+        dict: best_params, best_score (mean net points per gameweek) with its interval,
+              the default parameters' score and the paired improvement over them with its
+              interval, all in-sample (tuning window); 'holdout' with the same scores on the
+              held-out gameweeks (None without them); the leaderboard of every rung and the
+              best run's history over the tuning window
+    """
+    data_dirs = [data_dirs] if isinstance(data_dirs, str) else list(data_dirs)
+    cache = cache if cache is not None else EvaluationCache()
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+
+    seasons = []
+    for data_dir in data_dirs:
+        season_gameweeks = available_gameweeks(data_dir) if gameweeks is None else list(gameweeks)
+        if len(season_gameweeks) <= holdout_gameweeks:
+            raise ValueError(f"{data_dir}: {len(season_gameweeks)} gameweeks leave none to tune on "
+                             f"with holdout_gameweeks={holdout_gameweeks}")
+        split = len(season_gameweeks) - holdout_gameweeks
+        first = pd.read_csv(snapshot_path(data_dir, season_gameweeks[0]))
+        first['gameweek'] = season_gameweeks[0]
+        seasons.append({
+            'data_dir': data_dir,
+            'gameweeks': season_gameweeks[:split],
+            'holdout': season_gameweeks[split:],
+            'fingerprint': season_fingerprint(data_dir, season_gameweeks),
+            'initial': initial_state(first, time_limit=time_limit),
+        })
+    lengths = rung_lengths(max(len(season['gameweeks']) for season in seasons), min_gameweeks, eta)
+
+    candidates = [dict(DEFAULT_PARAMS)] + [sample_params(space, rng) for _ in range(n_candidates - 1)]
+    pool = ProcessPoolExecutor(max_workers=n_workers) if n_workers != 1 else None
+
+    def evaluate(candidate_ids, length, holdout=False):
+        """
+        Replay every candidate over the first `length` gameweeks of each season; returns per-gameweek net points.
+
+        With holdout, the replay carries on over each season's held-out gameweeks and only those are scored.
+        """
+        def window(season):
+            return season['gameweeks'][:length] + (season['holdout'] if holdout else [])
+
+        jobs, pending = [], []
+        for cid in candidate_ids:
+            for s, season in enumerate(seasons):
+                target = window(season)
+                key = cache.key(candidates[cid], season['fingerprint'], target, time_limit)
+                if cache.get(key) is not None:
+                    continue
+                # Resume from the longest cached shorter window (a rung, or the season's whole tuning window)
+                done, records, state = 0, [], season['initial']
+                resume_lengths = set(lengths) | {len(season['gameweeks'])}
+                for shorter in sorted((l for l in resume_lengths if l < len(target)), reverse=True):
+                    entry = cache.entries.get(cache.key(candidates[cid], season['fingerprint'], target[:shorter], time_limit))
+                    if entry is not None:
+                        done, (records, state) = shorter, entry
+                        break
+                jobs.append((season['data_dir'], target[done:], candidates[cid], state, time_limit))
+                pending.append((key, records))
+
+        results = pool.map(_replay_task, jobs) if pool is not None else map(_replay_task, jobs)
+        for (key, earlier), (records, state) in zip(pending, results):
+            cache.put(key, earlier + records, state)
+
+        scores = {}
+        for cid in candidate_ids:
+            points = []
+            for season in seasons:
+                target = window(season)
+                records, _ = cache.entries[cache.key(candidates[cid], season['fingerprint'], target, time_limit)]
+                scored = season['holdout'] if holdout else target
+                points += [(season['data_dir'], record['gameweek'], record['net_points'])
+                           for record in records if record['gameweek'] in scored]
+            scores[cid] = pd.DataFrame(points, columns=['season', 'gameweek', 'net_points'])
+        return scores
+
+    leaderboard = []
+    alive = list(range(len(candidates)))
+    try:
+        for rung, length in enumerate(lengths):
+            final = rung == len(lengths) - 1
+            evaluated = sorted(set(alive) | ({0} if final else set()))
+            scores = evaluate(evaluated, length)
+            ranked = sorted(evaluated, key=lambda cid: scores[cid]['net_points'].mean(), reverse=True)
+            for position, cid in enumerate(ranked, 1):
+                leaderboard.append({
+                    'rung': rung, 'gameweeks': length, 'rank': position, 'candidate': cid,
+                    'mean_points': round(float(scores[cid]['net_points'].mean()), 3),
+                    'params': params_label(candidates[cid]),
+                })
+            if not final:
+                alive = ranked[:max(1, len(ranked) // eta)]
+
+        best = ranked[0]
+        holdout_scores = evaluate(sorted({best, 0}), lengths[-1], holdout=True) if holdout_gameweeks else None
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    def summary(scores):
+        """Winner's and defaults' mean points and the paired improvement (same seasons and gameweeks)"""
+        best_points = scores[best]['net_points'].to_numpy()
+        improvement = best_points - scores[0]['net_points'].to_numpy()
+        return {
+            'best_score': round(float(best_points.mean()), 3),
+            'best_ci': bootstrap_ci(best_points, n_bootstrap, confidence, seed),
+            'default_score': round(float(scores[0]['net_points'].mean()), 3),
+            'improvement': round(float(improvement.mean()), 3),
+            'improvement_ci': bootstrap_ci(improvement, n_bootstrap, confidence, seed),
+            'gameweeks': int(len(best_points)),
+        }
+
+    best_history = []
+    for season in seasons:
+        key = cache.key(candidates[best], season['fingerprint'], season['gameweeks'][:lengths[-1]], time_limit)
+        best_history += [dict(record, season=season['data_dir']) for record in cache.entries[key][0]]
+
+    return {
+        'best_params': candidates[best],
+        **summary(scores),
+        'holdout': summary(holdout_scores) if holdout_scores is not None else None,
+        'confidence': confidence,
+        'leaderboard': pd.DataFrame(leaderboard),
+        'history': pd.DataFrame(best_history),
+        'cache_hits': cache.hits,
+        'seconds': round(time.perf_counter() - start, 1),
+    }
+
+
+def print_tuning_summary(result, top_n=5):
+    """Best parameters, their intervals and the final-rung leaderboard"""
+    pct = int(round(result['confidence'] * 100))
+    print("\n🎛️ TUNING RESULT")
+    print("=" * 70)
+    scores = [("In-sample (tuning window, biased upwards by the selection)", result)]
+    if result['holdout'] is not None:
+        scores.append(("Held-out gameweeks", result['holdout']))
+    for title, score in scores:
+        print(f"{title}:")
+        print(f"  Best mean points per gameweek: {score['best_score']:.2f} "
+              f"({pct}% CI {score['best_ci'][0]:.2f} to {score['best_ci'][1]:.2f}) over {score['gameweeks']} gameweeks")
+        print(f"  Default parameters: {score['default_score']:.2f} | improvement {score['improvement']:+.2f} "
+              f"({pct}% CI {score['improvement_ci'][0]:+.2f} to {score['improvement_ci'][1]:+.2f})")
+    print("Best parameters:")
+    for name, val in result['best_params'].items():
+        print(f"  {name}: {json.dumps(_canonical(val))}")
+
+    leaderboard = result['leaderboard']
+    final = leaderboard[leaderboard['rung'] == leaderboard['rung'].max()].head(top_n)
+    print(f"\nFinal rung ({final['gameweeks'].iloc[0]} gameweeks per season):")
+    for row in final.itertuples(index=False):
+        label = " (default)" if row.candidate == 0 else ""
+        print(f"  #{row.rank} candidate {row.candidate}{label}: {row.mean_points:.2f}")
+    print(f"\n{result['cache_hits']} cached replays re-used, {result['seconds']:.0f}s")
+    print("=" * 70)
+
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune the objective weights on replayed past gameweeks")
+    parser.add_argument('data_dirs', nargs='+', help="Season directories with fpl_players_gw_{gw}.csv snapshots")
+    parser.add_argument('--candidates', type=int, default=16)
+    parser.add_argument('--eta', type=int, default=2)
+    parser.add_argument('--min-gameweeks', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--time-limit', type=float, default=None)
+    parser.add_argument('--holdout-gameweeks', type=int, default=4,
+                        help="Gameweeks at the end of each season kept out of the search to re-score the winner")
+    parser.add_argument('--cache', default='tuning_cache.jsonl', help="JSON-lines file of evaluated configurations")
+    args = parser.parse_args()
+
+    result = tune(args.data_dirs, n_candidates=args.candidates, eta=args.eta, min_gameweeks=args.min_gameweeks,
+                  seed=args.seed, n_workers=args.workers, time_limit=args.time_limit,
+                  cache=EvaluationCache(args.cache), holdout_gameweeks=args.holdout_gameweeks)
+    print_tuning_summary(result)
+    result['leaderboard'].to_csv('tuning_leaderboard.csv', index=False)
@@ -0,0 +1,336 @@
+# xp_model.py
+# Expected-points model from per-player history, with an incrementally updated feature store
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import requests
+
+from backtest import load_live_points
+from fixture_index import team_fixtures
+from league_batch import FPL_API
+from simulation import position_codes
+
+# Per-fixture features; rolling windows are over a player's last gameweeks with a fixture
+FEATURES = ['intercept', 'points_3', 'points_6', 'minutes_3', 'minutes_6', 'starts_6', 'appearances_6',
+            'difficulty', 'is_home']
+
+# Share of the prediction kept for each status in the first predicted gameweek (as make_player_pool)
+STATUS_XP_FACTOR = {'a': 1.0, 'd': 0.5}
+
+# Fewest training fixtures a position needs before its model replaces ep_next
+MIN_TRAINING_ROWS = 200
+
+
+class FeatureStore:
+    """
+    Rolling per-player history kept as lag arrays, updated one gameweek at a time.
+
+    append_gameweek() shifts each player's minutes and points lags by the new
+    result, and, before shifting, adds that gameweek's fixtures to the
+    per-position ridge normal equations (X'X and X'y) using the features the
+    player had going into it. Training therefore grows with each gameweek
+    instead of re-reading the season, and inference only needs the latest lags.
+    Players whose team blanks keep their lags, so blanks do not dilute form.
+
+    Saved as {path}/state.npz (lags, normal equations) with the raw results
+    appended to {path}/history.csv.
+    """
+
+    def __init__(self, path=None, window=6):
+        """
+        Args:
+            path: Optional directory the store is saved to and loaded from
+            window (int): Gameweeks of history kept per player (at least 6)
+        """
+        if window < 6:
+            raise ValueError("window must cover the 6-gameweek features")
+        self.path = path
+        self.window = window
+        self.ids = pd.Index([], dtype=int)
+        self.minutes = np.zeros((0, window))
+        self.points = np.zeros((0, window))
+        self.n_obs = np.zeros(0, dtype=int)
+        self.xtx = np.zeros((4, len(FEATURES), len(FEATURES)))
+        self.xty = np.zeros((4, len(FEATURES)))
+        self.n_rows = np.zeros(4, dtype=int)
+        self.gameweeks = []
+
+    @property
+    def last_gameweek(self):
+        return self.gameweeks[-1] if self.gameweeks else 0
+
+    def _rows_for(self, player_ids):
+        """Lag rows for player ids, adding zero rows for players not seen before"""
+        player_ids = pd.Index(player_ids)
+        new = player_ids[~player_ids.isin(self.ids)].unique()
+        if len(new):
+            self.ids = self.ids.append(pd.Index(new))
+            self.minutes = np.vstack([self.minutes, np.zeros((len(new), self.window))])
+            self.points = np.vstack([self.points, np.zeros((len(new), self.window))])
+            self.n_obs = np.concatenate([self.n_obs, np.zeros(len(new), dtype=int)])
+        return self.ids.get_indexer(player_ids)
+
+    def features(self, rows, difficulty, is_home):
+        """
+        Feature matrix for fixtures of the players at the given lag rows.
+
+        Args:
+            rows: Lag rows (from _rows_for), one per fixture
+            difficulty: FPL difficulty of each fixture
+            is_home: 1 for home fixtures
+
+        Returns:
+            np.ndarray: (n_fixtures, len(FEATURES))
+        """
+        minutes, points = self.minutes[rows], self.points[rows]
+        seen_3 = np.maximum(np.minimum(self.n_obs[rows], 3), 1)
+        seen_6 = np.maximum(np.minimum(self.n_obs[rows], 6), 1)
+        return np.column_stack([
+            np.ones(len(rows)),
+            points[:, :3].sum(axis=1) / seen_3,
+            points[:, :6].sum(axis=1) / seen_6,
+            minutes[:, :3].sum(axis=1) / seen_3 / 90,
+            minutes[:, :6].sum(axis=1) / seen_6 / 90,
+            (minutes[:, :6] >= 60).sum(axis=1) / seen_6,
+            (minutes[:, :6] > 0).sum(axis=1) / seen_6,
+            np.asarray(difficulty, dtype=float),
+            np.asarray(is_home, dtype=float),
+        ])
+
+    def append_gameweek(self, gameweek, results, fixtures):
+        """
+        Add one finished gameweek.
+
+        Args:
+            gameweek (int): The gameweek; must come after every gameweek already stored
+            results: DataFrame with id, team_id, position, minutes and total_points per player
+            fixtures: team_fixtures() rows (any gameweeks; only this one is used)
+
+        Returns:
+            int: Training fixtures added
+        """
+        if gameweek <= self.last_gameweek:
+            raise ValueError(f"Gameweek {gameweek} is not after the last stored gameweek {self.last_gameweek}")
+
+        results = results.reset_index(drop=True)
+        rows = self._rows_for(results['id'])
+        week = fixtures[fixtures['gameweek'] == gameweek]
+
+        # Training rows: each fixture of the week against the player's form before it;
+        # double-gameweek totals are split evenly over the fixtures
+        merged = results.assign(row=rows, position_code=position_codes(results)).merge(week, on='team_id')
+        n_fixtures = merged.groupby('id')['id'].transform('size').to_numpy()
+        X = self.features(merged['row'].to_numpy(), merged['difficulty'], merged['is_home'])
+        y = merged['total_points'].to_numpy(dtype=float) / n_fixtures
+        codes = merged['position_code'].to_numpy()
+        for code in range(4):
+            mask = codes == code
+            self.xtx[code] += X[mask].T @ X[mask]
+            self.xty[code] += X[mask].T @ y[mask]
+            self.n_rows[code] += int(mask.sum())
+
+        # Shift lags of players whose team played
+        played = rows[results['team_id'].isin(week['team_id']).to_numpy()]
+        played_results = results[results['team_id'].isin(week['team_id'])]
+        self.minutes[played, 1:] = self.minutes[played, :-1]
+        self.points[played, 1:] = self.points[played, :-1]
+        self.minutes[played, 0] = played_results['minutes'].to_numpy(dtype=float)
+        self.points[played, 0] = played_results['total_points'].to_numpy(dtype=float)
+        self.n_obs[played] += 1
+        self.gameweeks.append(int(gameweek))
+
+        if self.path is not None:
+            self._append_history(gameweek, results)
+            self.save()
+        return len(merged)
+
+    def _append_history(self, gameweek, results):
+        os.makedirs(self.path, exist_ok=True)
+        history_path = os.path.join(self.path, 'history.csv')
+        history = results[['id', 'team_id', 'minutes', 'total_points']].assign(gameweek=gameweek)
+        history.to_csv(history_path, mode='a', header=not os.path.exists(history_path), index=False)
+
+    def coefficients(self, ridge=1.0):
+        """
+        Ridge coefficients per position from the accumulated normal equations.
+
+        Returns:
+            tuple: (coefficients (4, len(FEATURES)), fitted (4,) bool - positions with
+                   at least MIN_TRAINING_ROWS training fixtures)
+        """
+        penalty = ridge * np.eye(len(FEATURES))
+        penalty[0, 0] = 0.0     # the intercept is not shrunk
+        coefficients = np.zeros((4, len(FEATURES)))
+        fitted = self.n_rows >= MIN_TRAINING_ROWS
+        for code in np.flatnonzero(fitted):
+            coefficients[code] = np.linalg.solve(self.xtx[code] + penalty, self.xty[code])
+        return coefficients, fitted
+
+    def save(self, path=None):
+        """Write the lag arrays and normal equations to {path}/state.npz"""
+        path = path or self.path
+        os.makedirs(path, exist_ok=True)
+        np.savez(os.path.join(path, 'state.npz'), ids=self.ids.to_numpy(), minutes=self.minutes, points=self.points,
+                 n_obs=self.n_obs, xtx=self.xtx, xty=self.xty, n_rows=self.n_rows,
+                 gameweeks=np.array(self.gameweeks, dtype=int), window=self.window)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Store saved at path, or an empty store there when none exists yet"""
+        state_path = os.path.join(path, 'state.npz')
+        if not os.path.exists(state_path):
+            return cls(path)
+        state = np.load(state_path)
+        store = cls(path, window=int(state['window']))
+        store.ids = pd.Index(state['ids'])
+        store.minutes, store.points, store.n_obs = state['minutes'], state['points'], state['n_obs']
+        store.xtx, store.xty, store.n_rows = state['xtx'], state['xty'], state['n_rows']
+        store.gameweeks = state['gameweeks'].tolist()
+        return store
+
+
+def predict_expected_points(df_players, store, fixtures, gameweeks, ridge=1.0):
+    """
+    xP of every player for each of several gameweeks in one vectorised pass.
+
+    Each fixture is predicted with the player's position model from the
+    current lags, clipped at zero and summed per gameweek, so doubles add up
+    and blanks are 0. Players without history, and positions with too little
+    training data, fall back to the snapshot's expected_points per fixture.
+    The first gameweek is scaled by status (doubtful halves it, injured,
+    suspended and unavailable zero it); unavailable players stay at 0 throughout.
+
+    Args:
+        df_players: DataFrame with id, team_id, position, status and expected_points
+        store: FeatureStore holding history up to just before gameweeks[0]
+        fixtures: team_fixtures() rows
+        gameweeks: Gameweeks to predict, in order
+        ridge (float): Ridge penalty of the position models
+
+    Returns:
+        pd.DataFrame: One column per gameweek, indexed like df_players
+    """
+    gameweeks = list(gameweeks)
+    players = pd.DataFrame({
+        'label': df_players.index,
+        'row': store._rows_for(df_players['id']),
+        'team_id': df_players['team_id'].to_numpy(),
+        'position_code': position_codes(df_players),
+        'prior': pd.to_numeric(df_players['expected_points'], errors='coerce').fillna(0).to_numpy(dtype=float),
+    })
+    rows = players.merge(fixtures[fixtures['gameweek'].isin(gameweeks)], on='team_id')
+
+    coefficients, fitted = store.coefficients(ridge)
+    X = store.features(rows['row'].to_numpy(), rows['difficulty'], rows['is_home'])
+    codes = rows['position_code'].to_numpy()
+    predicted = np.maximum((X * coefficients[codes]).sum(axis=1), 0.0)
+    use_model = fitted[codes] & (store.n_obs[rows['row'].to_numpy()] > 0)
+    rows['xp'] = np.where(use_model, predicted, rows['prior'])
+
+    xp = rows.pivot_table(index='label', columns='gameweek', values='xp', aggfunc='sum')
+    xp = xp.reindex(index=df_players.index, columns=gameweeks).fillna(0.0)
+
+    status = df_players['status']
+    xp[gameweeks[0]] *= status.map(STATUS_XP_FACTOR).fillna(0.0).to_numpy()
+    xp.loc[(status == 'u').to_numpy()] = 0.0
+    return xp.round(2)
+
+
+def add_expected_points(df_players, store, fixtures, horizon=1, ridge=1.0):
+    """
+    Replace the API's expected_points with the model's, as a drop-in for the optimiser.
+
+    Args:
+        df_players: Snapshot from load_fpl_data (gameweek column is the target gameweek)
+        store: FeatureStore updated to the gameweek before
+        fixtures: team_fixtures() rows
+        horizon (int): Gameweeks to predict from the target gameweek
+        ridge (float): Ridge penalty of the position models
+
+    Returns:
+        pd.DataFrame: Copy of df_players with expected_points from the model, the
+                      original kept as ep_next, xp_gw{gw} per gameweek and xp_{horizon}gw in total
+    """
+    first = int(df_players['gameweek'].iloc[0])
+    gameweeks = list(range(first, first + horizon))
+    xp = predict_expected_points(df_players, store, fixtures, gameweeks, ridge)
+
+    df_players = df_players.copy()
+    if 'ep_next' not in df_players.columns:
+        df_players['ep_next'] = df_players['expected_points']
+    for gameweek in gameweeks:
+        df_players[f'xp_gw{gameweek}'] = xp[gameweek].to_numpy()
+    df_players[f'xp_{horizon}gw'] = xp.sum(axis=1).round(2).to_numpy()
+    df_players['expected_points'] = xp[first].to_numpy()
+    return df_players
+
+
+def fetch_season(session=None):
+    """Bootstrap players (id, team_id, position) and team_fixtures() rows from the API"""
+    session = session or requests.Session()
+    bootstrap = session.get(f'{FPL_API}/bootstrap-static/').json()
+    fixtures = session.get(f'{FPL_API}/fixtures/').json()
+
+    positions = {pos['id']: pos['singular_name'] for pos in bootstrap['element_types']}
+    players = pd.DataFrame({
+        'id': [player['id'] for player in bootstrap['elements']],
+        'team_id': [player['team'] for player in bootstrap['elements']],
+        'position': [positions[player['element_type']] for player in bootstrap['elements']],
+    })
+    finished = [event['id'] for event in bootstrap['events'] if event['finished']]
+    return players, team_fixtures(fixtures), finished
+
+
+def update_store(store, players, fixtures, finished, data_dir='data', session=None):
+    """
+    Append every finished gameweek the store does not have yet.
+
+    Args:
+        store: FeatureStore
+        players: id, team_id and position per player (fetch_season)
+        fixtures: team_fixtures() rows
+        finished: Finished gameweeks
+        data_dir: Directory whose live/ cache load_live_points reads and fills
+
+    Returns:
+        list: Gameweeks appended
+    """
+    appended = []
+    for gameweek in sorted(finished):
+        if gameweek <= store.last_gameweek:
+            continue
+        live = load_live_points(gameweek, data_dir, session=session)
+        results = players.join(live, on='id').fillna({'total_points': 0, 'minutes': 0})
+        store.append_gameweek(gameweek, results, fixtures)
+        appended.append(gameweek)
+    return appended
+
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the xP feature store and write model xP into a snapshot")
+    parser.add_argument('snapshot', help="Snapshot CSV from player_data_loader (e.g. data/fpl_players_gw_5.csv)")
+    parser.add_argument('--store', default='data/xp_store')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--horizon', type=int, default=3)
+    parser.add_argument('--output', help="Output CSV (default: <snapshot>_xp.csv)")
+    args = parser.parse_args()
+
+    session = requests.Session()
+    store = FeatureStore.load(args.store)
+    players, fixtures, finished = fetch_season(session)
+    appended = update_store(store, players, fixtures, finished, args.data_dir, session)
+    print(f"📥 Appended gameweeks {appended or 'none'}; store holds {len(store.gameweeks)} gameweeks, "
+          f"{json.dumps(dict(zip(['GK', 'DEF', 'MID', 'FWD'], store.n_rows.tolist())))} training fixtures")
+
+    df_players = add_expected_points(pd.read_csv(args.snapshot), store, fixtures, horizon=args.horizon)
+    output = args.output or args.snapshot.replace('.csv', '_xp.csv')
+    df_players.to_csv(output, index=False)
+    columns = ['name', 'team', 'position', 'ep_next', 'expected_points', f'xp_{args.horizon}gw']
+    print(df_players.sort_values('expected_points', ascending=False)[columns].head(15).to_string(index=False))
+    print(f"\nSaved to: {output}")
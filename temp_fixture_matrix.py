@@ -5,10 +5,18 @@ Each column represents a gameweek, showing which teams play and their opponents.
 Handles double gameweeks (teams playing twice) and blank gameweeks (teams not playing).
 """
 
+import os
+import sys
+
 import requests
 import pandas as pd
 from datetime import datetime
 
+# The transfer model's modules import each other by name
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'squad_selection_model'))
+
+from fixture_index import get_fixture_index
+
 def load_fixture_matrix():
     """
     Load and display the fixture matrix for the rest of the season
@@ -39,40 +47,27 @@ def load_fixture_matrix():
         print(f"Remaining Gameweeks: {min(remaining_gws)} to {max(remaining_gws)} ({len(remaining_gws)} weeks)")
         print()
         
-        # Build fixture matrix
-        fixture_matrix = {}
-        
-        # Initialize matrix - each team for each remaining gameweek
-        for team_id in teams.keys():
-            fixture_matrix[team_id] = {gw: [] for gw in remaining_gws}
-        
-        # Process fixtures
+        # Build fixture matrix from the dense fixture index (team x gameweek x slot)
+        index = get_fixture_index(fixtures, team_ids=list(teams))
         future_fixtures = [f for f in fixtures if f['event'] and f['event'] in remaining_gws]
         print(f"Processing {len(future_fixtures)} remaining fixtures...")
         
-        for fixture in future_fixtures:
-            gw = fixture['event']
-            home_team = fixture['team_h']
-            away_team = fixture['team_a']
-            
-            # Add opponents to matrix
-            fixture_matrix[home_team][gw].append(f"vs {teams[away_team]} (H)")
-            fixture_matrix[away_team][gw].append(f"vs {teams[home_team]} (A)")
-        
-        # Create DataFrame for display
+        columns = [gw - 1 for gw in remaining_gws if gw <= index.n_gameweeks]
         matrix_data = []
-        for team_id, team_name in teams.items():
-            row = {'Team': team_name}
-            for gw in remaining_gws:
-                fixtures = fixture_matrix[team_id][gw]
-                if len(fixtures) == 0:
-                    row[f'GW{gw}'] = "BLANK"
-                elif len(fixtures) == 1:
-                    row[f'GW{gw}'] = fixtures[0]
+        for row, team_id in enumerate(index.team_ids):
+            entry = {'Team': teams[team_id]}
+            for gw, column in zip(remaining_gws, columns):
+                labels = [f"vs {teams[opponent]} ({'H' if home else 'A'})"
+                          for opponent, home in zip(index.opponent[row, column], index.is_home[row, column])
+                          if opponent >= 0]
+                if len(labels) == 0:
+                    entry[f'GW{gw}'] = "BLANK"
+                elif len(labels) == 1:
+                    entry[f'GW{gw}'] = labels[0]
                 else:
                     # Double gameweek
-                    row[f'GW{gw}'] = f"DGW: {' & '.join(fixtures)}"
-            matrix_data.append(row)
+                    entry[f'GW{gw}'] = f"DGW: {' & '.join(labels)}"
+            matrix_data.append(entry)
         
         df = pd.DataFrame(matrix_data)
         
@@ -93,39 +88,26 @@ def load_fixture_matrix():
         print("\n📊 FIXTURE SUMMARY")
         print("=" * 40)
         
-        for gw in remaining_gws:
-            gw_col = f'GW{gw}'
-            blanks = df[gw_col].str.contains('BLANK').sum()
-            doubles = df[gw_col].str.contains('DGW').sum()
-            singles = len(df) - blanks - doubles
-            
-            print(f"GW {gw:2d}: {singles:2d} single, {doubles:2d} double, {blanks:2d} blank")
+        summary = index.gameweek_summary([gw for gw in remaining_gws if gw <= index.n_gameweeks])
+        for gw, counts in summary.iterrows():
+            print(f"GW {gw:2d}: {counts['single']:2d} single, {counts['double']:2d} double, {counts['blank']:2d} blank")
+        
+        # Doubles and blanks per team over the remaining gameweeks
+        team_names = [teams[team_id] for team_id in index.team_ids]
+        dgw_counts = pd.Series(index.doubles()[:, columns].sum(axis=1), index=team_names)
+        blank_counts = pd.Series(index.blanks()[:, columns].sum(axis=1), index=team_names)
         
         # Find teams with most double gameweeks
         print("\n🔥 DOUBLE GAMEWEEK CHAMPIONS")
         print("=" * 40)
-        dgw_counts = {}
-        for _, row in df.iterrows():
-            team = row['Team']
-            dgw_count = sum(1 for gw in remaining_gws if 'DGW' in row[f'GW{gw}'])
-            dgw_counts[team] = dgw_count
-        
-        sorted_dgw = sorted(dgw_counts.items(), key=lambda x: x[1], reverse=True)
-        for team, count in sorted_dgw[:10]:
+        for team, count in dgw_counts.sort_values(ascending=False, kind='stable')[:10].items():
             if count > 0:
                 print(f"{team}: {count} double gameweeks")
         
         # Find teams with most blank gameweeks
         print("\n😴 BLANK GAMEWEEK VICTIMS")
         print("=" * 40)
-        blank_counts = {}
-        for _, row in df.iterrows():
-            team = row['Team']
-            blank_count = sum(1 for gw in remaining_gws if 'BLANK' in row[f'GW{gw}'])
-            blank_counts[team] = blank_count
-        
-        sorted_blanks = sorted(blank_counts.items(), key=lambda x: x[1], reverse=True)
-        for team, count in sorted_blanks[:10]:
+        for team, count in blank_counts.sort_values(ascending=False, kind='stable')[:10].items():
             if count > 0:
                 print(f"{team}: {count} blank gameweeks")
         
@@ -151,26 +133,22 @@ def analyze_gameweek_patterns():
         fixtures_response = requests.get('https://fantasy.premierleague.com/api/fixtures/')
         fixtures = fixtures_response.json()
         
-        # Group fixtures by gameweek
-        gw_fixture_counts = {}
-        for fixture in fixtures:
-            gw = fixture['event']
-            if gw:
-                gw_fixture_counts[gw] = gw_fixture_counts.get(gw, 0) + 1
+        # Fixtures and teams playing per gameweek from the fixture index
+        index = get_fixture_index(fixtures)
+        n_teams = len(index.team_ids)
+        summary = index.gameweek_summary()
         
         print("Fixtures per gameweek:")
-        for gw in sorted(gw_fixture_counts.keys()):
-            count = gw_fixture_counts[gw]
-            teams_playing = count * 2
-            teams_blank = 20 - teams_playing
+        for gw, counts in summary[summary['fixtures'] > 0].iterrows():
+            teams_playing = n_teams - counts['blank']
             
             status = ""
-            if teams_blank > 0:
-                status += f"({teams_blank} teams blank)"
-            if teams_playing > 20:
+            if counts['blank'] > 0:
+                status += f"({counts['blank']} teams blank)"
+            if counts['double'] > 0:
                 status += f"(Double gameweek detected!)"
             
-            print(f"GW {gw:2d}: {count:2d} fixtures, {teams_playing:2d} teams playing {status}")
+            print(f"GW {gw:2d}: {counts['fixtures']:2d} fixtures, {teams_playing:2d} teams playing {status}")
             
     except Exception as e:
         print(f"Error analyzing patterns: {e}")